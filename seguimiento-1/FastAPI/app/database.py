@@ -2,25 +2,88 @@
 Database models for the FastAPI application.
 
 This module contains the database models used for the application,
-including AuthorModel and BookModel.
+including AuthorModel and BookModel, the revision, group count and
+tombstone tables maintained by the repositories, and the connection pool they share.
 """
 
+from contextvars import ContextVar
 from datetime import date
 import os
 from dotenv import load_dotenv
 from peewee import *
+from peewee import _ConnectionState
+from playhouse.migrate import SchemaMigrator, migrate
+from playhouse.pool import PooledMySQLDatabase
+from pymysql.constants import CLIENT
 
 # Cargar variables de entorno desde el archivo .env
 load_dotenv()
 
-# Configuración de la base de datos MySQL
-database = MySQLDatabase(
+# Estado de la conexión de la petición en curso
+_db_state = ContextVar("db_state", default=None)
+
+class RequestConnectionState(_ConnectionState):
+    """
+    Connection state stored in a ContextVar instead of a thread-local.
+
+    FastAPI runs the dependencies and the sync route handlers of a request
+    in different threads of the thread pool. Keeping the state in a
+    ContextVar lets all of them share the connection checked out for the
+    request.
+    """
+
+    def __init__(self, **kwargs):
+        super().__setattr__("_state", _db_state)
+        super().__init__(**kwargs)
+
+    def __setattr__(self, name, value):
+        self._current()[name] = value
+
+    def __getattr__(self, name):
+        try:
+            return self._current()[name]
+        except KeyError as error:
+            raise AttributeError(name) from error
+
+    def _current(self):
+        state = self._state.get()
+        if state is None:
+            state = new_connection_state()
+            self._state.set(state)
+        return state
+
+def new_connection_state():
+    """
+    Returns an empty connection state (no connection checked out).
+    """
+    return {"closed": True, "conn": None, "ctx": [], "transactions": []}
+
+def reset_connection_state():
+    """
+    Starts a new connection state in the current context.
+
+    Must be called from the request's async context so that every thread
+    serving the request sees the same state.
+    """
+    _db_state.set(new_connection_state())
+
+# Configuración del pool de conexiones MySQL
+database = PooledMySQLDatabase(
     os.getenv("MYSQL_DATABASE"),
     user=os.getenv("MYSQL_USER"),
     passwd=os.getenv("MYSQL_PASSWORD"),
     host=os.getenv("MYSQL_HOST"),
     port=int(os.getenv("MYSQL_PORT")),
+    # Máximo de conexiones abiertas a la vez
+    max_connections=int(os.getenv("MYSQL_MAX_CONNECTIONS", "20")),
+    # Segundos tras los que una conexión inactiva se recicla
+    stale_timeout=int(os.getenv("MYSQL_STALE_TIMEOUT", "300")),
+    # Segundos de espera por una conexión libre cuando el pool está lleno
+    timeout=int(os.getenv("MYSQL_POOL_TIMEOUT", "10")),
+    # UPDATE devuelve las filas encontradas y no solo las modificadas
+    client_flag=CLIENT.FOUND_ROWS,
 )
+database._state = RequestConnectionState()  # pylint: disable=protected-access
 
 class BaseModel(Model):  # pylint: disable=too-few-public-methods
     """
@@ -37,13 +100,15 @@ class AuthorModel(BaseModel):  # pylint: disable=too-few-public-methods
 
     Attributes:
         id (int): Primary key for the author.
-        name (str): Name of the author.
-        nationality (str): Nationality of the author.
+        name (str): Name of the author, indexed for prefix suggestions.
+        nationality (str): Nationality of the author, indexed for filtering.
+        version (int): Revision number, increased on every update.
     """
     
     id = AutoField(primary_key=True)
-    name = CharField(max_length=100)
-    nationality = CharField(max_length=100)
+    name = CharField(max_length=100, index=True)
+    nationality = CharField(max_length=100, index=True)
+    version = IntegerField(default=1)
 
     class Meta:
         table_name = "authors"
@@ -54,26 +119,212 @@ class BookModel(BaseModel):  # pylint: disable=too-few-public-methods
 
     Attributes:
         id (int): Primary key for the book.
-        title (str): Title of the book.
+        title (str): Title of the book, indexed for prefix suggestions and, in
+            MySQL, with a FULLTEXT index for word searches.
         author_id (int): Foreign key referencing the author.
-        publication_date (date): Date when the book was published.
+        publication_date (date): Date when the book was published, indexed for ranges.
+        version (int): Revision number, increased on every update.
     """
     
     id = AutoField(primary_key=True)
-    title = CharField(max_length=200)
+    title = CharField(max_length=200, index=True)
     author_id = ForeignKeyField(AuthorModel, backref="books", on_delete="CASCADE")
-    publication_date = DateField(default=date.today)
+    publication_date = DateField(default=date.today, index=True)
+    version = IntegerField(default=1)
 
     class Meta:
         table_name = "books"
 
+# Contadores de revisión por tabla: cada escritura incrementa el de su id % REVISION_SHARDS
+REVISION_SHARDS = 16
+
+class RevisionModel(BaseModel):  # pylint: disable=too-few-public-methods
+    """
+    Model representing one shard of the modification counter of a table.
+
+    Attributes:
+        name (str): Table and shard ("books:3"), the primary key.
+        revision (int): Number of writes committed to the ids of the shard.
+        modified_at (float): Unix time of the last write to the shard, or None.
+    """
+
+    name = CharField(max_length=64, primary_key=True)
+    revision = BigIntegerField(default=0)
+    modified_at = DoubleField(null=True)
+
+    class Meta:
+        table_name = "revisions"
+
+def revision_names(table):
+    """
+    Returns the names of the revision counter shards of a table.
+
+    Args:
+        table (str): Name of the table.
+
+    Returns:
+        list: One name per shard, in shard order.
+    """
+    return [f"{table}:{shard}" for shard in range(REVISION_SHARDS)]
+
+class GroupCountModel(BaseModel):  # pylint: disable=too-few-public-methods
+    """
+    Model representing the number of rows of one group of a statistic.
+
+    Attributes:
+        statistic (str): Name of the statistic, such as "books_per_author".
+        group_key (str): Group counted (author id, year or nationality).
+        total (int): Number of rows of the group; groups at 0 are not reported.
+    """
+
+    statistic = CharField(max_length=32)
+    group_key = CharField(max_length=100)
+    total = BigIntegerField(default=0)
+
+    class Meta:
+        table_name = "group_counts"
+        primary_key = CompositeKey("statistic", "group_key")
+
+class TombstoneModel(BaseModel):  # pylint: disable=too-few-public-methods
+    """
+    Model representing the last version of a deleted book or author.
+
+    Attributes:
+        entity (str): Table the record was deleted from ("books" or "authors").
+        record_id (int): ID of the deleted record.
+        version (int): Version the record had when it was deleted.
+    """
+
+    entity = CharField(max_length=32)
+    record_id = BigIntegerField()
+    version = IntegerField()
+
+    class Meta:
+        table_name = "tombstones"
+        primary_key = CompositeKey("entity", "record_id")
+
+def group_count_queries():
+    """
+    Returns the GROUP BY query of each statistic kept in GroupCountModel.
+
+    Returns:
+        dict: Statistic name -> query selecting each group and its number of rows.
+    """
+    year = BookModel.publication_date.year
+    return {
+        "books_per_author": (BookModel.select(BookModel.author_id, fn.COUNT(BookModel.id))
+                             .group_by(BookModel.author_id)),
+        "books_per_year": BookModel.select(year, fn.COUNT(BookModel.id)).group_by(year),
+        "authors_per_nationality": (AuthorModel
+                                    .select(AuthorModel.nationality, fn.COUNT(AuthorModel.id))
+                                    .group_by(AuthorModel.nationality)),
+    }
+
 # Conectar a la base de datos y crear las tablas si no existen
 def initialize_database():
     """
     Connect to the database and create tables if they do not exist.
 
     This function initializes the connection to the database and ensures that
-    the tables for AuthorModel and BookModel are created.
+    the tables for AuthorModel, BookModel, RevisionModel, GroupCountModel and
+    TombstoneModel are created, adding the columns and indexes introduced since the tables
+    were first created (the FULLTEXT index on the book titles among them) and
+    the revision counter shards of each table. A new group_counts table is
+    filled from the rows already stored.
     """
     with database:
-        database.create_tables([AuthorModel, BookModel])
+        # pylint: disable=protected-access
+        new_counts = not database.table_exists(GroupCountModel._meta.table_name)
+        database.create_tables([AuthorModel, BookModel, RevisionModel, GroupCountModel,
+                                TombstoneModel])
+        for model in (AuthorModel, BookModel):
+            table = model._meta.table_name
+            names = revision_names(table)
+            shards = [{"name": name} for name in names]
+            RevisionModel.insert_many(shards).on_conflict_ignore().execute()
+            # Un contador único anterior pasa al primer shard: la suma nunca retrocede
+            legacy = RevisionModel.get_or_none(RevisionModel.name == table)
+            if legacy is not None:
+                with database.atomic():
+                    (RevisionModel.update(revision=RevisionModel.revision + legacy.revision)
+                     .where(RevisionModel.name == names[0]).execute())
+                    legacy.delete_instance()
+        add_missing_columns([AuthorModel.version, BookModel.version])
+        add_missing_indexes([AuthorModel.nationality, AuthorModel.name, BookModel.title,
+                             BookModel.publication_date])
+        add_missing_fulltext_index(BookModel.title)
+        if new_counts:
+            with database.atomic():
+                for statistic, query in group_count_queries().items():
+                    rows = [{"statistic": statistic, "group_key": group, "total": total}
+                            for group, total in query.tuples()]
+                    for batch in chunked(rows, 500):
+                        GroupCountModel.insert_many(batch).execute()
+
+def add_missing_columns(fields):
+    """
+    Adds to existing tables the given model fields they do not have yet.
+
+    Args:
+        fields (list): Peewee fields whose column may be missing.
+    """
+    migrator = SchemaMigrator.from_database(database)
+    operations = []
+    for field in fields:
+        table = field.model._meta.table_name  # pylint: disable=protected-access
+        columns = {column.name for column in database.get_columns(table)}
+        if field.column_name not in columns:
+            operations.append(migrator.add_column(table, field.column_name, field))
+    if operations:
+        migrate(*operations)
+
+def add_missing_indexes(fields):
+    """
+    Indexes the columns of the given model fields on existing tables that
+    have no index on them yet.
+
+    Args:
+        fields (list): Peewee fields whose index may be missing.
+    """
+    migrator = SchemaMigrator.from_database(database)
+    operations = []
+    for field in fields:
+        table = field.model._meta.table_name  # pylint: disable=protected-access
+        indexed = {tuple(index.columns) for index in database.get_indexes(table)}
+        if (field.column_name,) not in indexed:
+            operations.append(migrator.add_index(table, (field.column_name,)))
+    if operations:
+        migrate(*operations)
+
+def add_missing_fulltext_index(field):
+    """
+    Adds a FULLTEXT index on the column of a model field to an existing
+    MySQL table that has none yet. Other databases have no such index and
+    are left as they are.
+
+    Args:
+        field (Field): Peewee field whose column is searched by words.
+    """
+    if not isinstance(database, MySQLDatabase):
+        return
+    table = field.model._meta.table_name  # pylint: disable=protected-access
+    name = f"{table}_{field.column_name}_fulltext"
+    if name not in {index.name for index in database.get_indexes(table)}:
+        database.execute_sql(f"ALTER TABLE `{table}` ADD FULLTEXT INDEX `{name}` "
+                             f"(`{field.column_name}`)")
+
+def pool_statistics():
+    """
+    Returns the current usage of the connection pool.
+
+    Returns:
+        dict: Configured limits and the number of in-use and idle connections.
+    """
+    # pylint: disable=protected-access
+    return {
+        "max_connections": database._max_connections,
+        "stale_timeout": database._stale_timeout,
+        "wait_timeout": database._wait_timeout,
+        "in_use": len(database._in_use),
+        "idle": len(database._connections),
+    }
@@ -0,0 +1,28 @@
+"""
+This module parses the id lists of the batch lookups.
+
+A batch lookup receives the ids as one comma-separated query parameter
+('?ids=3,1,2'). The ids are returned in the requested order, without
+repetitions, and at most MAX_BATCH_IDS are accepted per request.
+"""
+
+from helpers.errors import bad_request
+
+MAX_BATCH_IDS = 1000
+
+def parse_ids(ids):
+    """
+    Parses a comma-separated list of ids.
+
+    :param ids: The value of the 'ids' query parameter.
+    :return: The ids, in order and without repetitions.
+    :raises HTTPException: If an id is not an integer or there are more
+        than MAX_BATCH_IDS, a 400 (Bad Request) exception is raised.
+    """
+    try:
+        parsed = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError as error:
+        raise bad_request("Every id must be an integer") from error
+    if len(parsed) > MAX_BATCH_IDS:
+        raise bad_request(f"At most {MAX_BATCH_IDS} ids are accepted")
+    return parsed
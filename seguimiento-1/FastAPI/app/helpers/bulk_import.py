@@ -0,0 +1,166 @@
+"""
+This module implements the bulk create endpoints.
+
+The request body is either a JSON array of records or NDJSON (one JSON
+record per line, 'application/x-ndjson' content type). JSON arrays are
+validated in a single pydantic-core pass; NDJSON bodies are read and
+validated line by line while they stream in, so very large loads never
+hold the whole body in memory. Valid records are written in chunks; the
+response is a summary with the counts and the errors of the failed rows.
+"""
+
+import json
+import os
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from peewee import DatabaseError
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+from helpers.errors import bad_request
+
+load_dotenv()
+
+# Registros escritos por lote (una transacción por lote)
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+MAX_BULK_CHUNK_SIZE = 10000
+# Máximo de errores detallados en la respuesta
+MAX_REPORTED_ERRORS = 100
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+class BulkResult:
+    """
+    Accumulates the per-row outcome of a bulk create request.
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+
+    def summary(self):
+        return {
+            "received": self.received,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+async def bulk_create(request, model, create_many, chunk_size):
+    """
+    Validates the records of the request body and writes them in chunks.
+
+    :param request: The incoming request with a JSON array or NDJSON body.
+    :param model: Pydantic model of the records.
+    :param create_many: Service method that stores a list of records.
+    :param chunk_size: Number of records written per call to create_many.
+    :return: The summary of the import.
+    """
+    result = BulkResult()
+    chunk = []
+    async for index, record in iter_records(request, model, result):
+        chunk.append((index, record))
+        if len(chunk) >= chunk_size:
+            await write_chunk(chunk, create_many, result)
+            chunk = []
+    if chunk:
+        await write_chunk(chunk, create_many, result)
+    return result.summary()
+
+async def write_chunk(chunk, create_many, result):
+    """
+    Stores one chunk of records, marking all of them failed on error.
+
+    Besides the HTTPExceptions of the services, database errors the
+    repositories do not translate (e.g. a DataError for a value too long
+    for its column) fail only the chunk, and the import goes on.
+    """
+    try:
+        await run_in_threadpool(create_many, [record for _, record in chunk])
+    except HTTPException as error:
+        message = error.detail.get("message") if isinstance(error.detail, dict) else error.detail
+        fail_chunk(chunk, message, result)
+        return
+    except DatabaseError as error:
+        fail_chunk(chunk, str(error), result)
+        return
+    result.created += len(chunk)
+
+def fail_chunk(chunk, message, result):
+    """
+    Records every row of a chunk that could not be written as failed.
+    """
+    for index, _ in chunk:
+        result.add_error({"index": index, "message": message})
+
+async def iter_records(request, model, result):
+    """
+    Yields (index, record) for every valid record of the request body.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type in NDJSON_MEDIA_TYPES:
+        async for index, line in iter_ndjson_lines(request):
+            result.received += 1
+            try:
+                yield index, model.model_validate_json(line)
+            except ValidationError as error:
+                result.add_error({"index": index, "message": first_error(error)})
+        return
+    for item in validate_array(await request.body(), model, result):
+        yield item
+
+def validate_array(body, model, result):
+    """
+    Validates a JSON array body, returning the (index, record) of valid rows.
+    """
+    adapter = TypeAdapter(list[model])
+    try:
+        records = adapter.validate_json(body)
+        result.received = len(records)
+        return list(enumerate(records))
+    except ValidationError as error:
+        invalid = {}
+        for detail in error.errors():
+            if not detail["loc"] or not isinstance(detail["loc"][0], int):
+                raise bad_request(detail["msg"]) from error
+            location = ".".join(str(part) for part in detail["loc"][1:])
+            invalid.setdefault(detail["loc"][0], f"{location}: {detail['msg']}")
+    rows = json.loads(body)
+    result.received = len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        if index in invalid:
+            result.add_error({"index": index, "message": invalid[index]})
+        else:
+            valid.append((index, model.model_validate(row)))
+    return valid
+
+async def iter_ndjson_lines(request):
+    """
+    Yields (index, line) for every non-empty line of an NDJSON body.
+    """
+    index = 0
+    pending = b""
+    async for data in request.stream():
+        pending += data
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield index, line
+                index += 1
+    if pending.strip():
+        yield index, pending
+
+def first_error(error):
+    """
+    Returns the message of the first error of a ValidationError.
+    """
+    detail = error.errors()[0]
+    location = ".".join(str(part) for part in detail["loc"])
+    return f"{location}: {detail['msg']}" if location else detail["msg"]
@@ -0,0 +1,117 @@
+"""
+This module implements conditional GET for the item and list routes.
+
+Item responses are validated by the version of the record and list
+responses by the revision of the whole collection, which the services
+update on every write. Both carry 'ETag' and 'Last-Modified' headers, and
+a request whose 'If-None-Match' (or, without it, 'If-Modified-Since')
+still matches is answered with an empty 304 (Not Modified) before any
+record is serialized.
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Response, status
+from helpers.versioning import ETAG_HEADER, entity_tag
+
+LAST_MODIFIED_HEADER = "Last-Modified"
+
+def collection_tag(revision):
+    """
+    Formats the revision of a collection as a weak ETag.
+
+    :param revision: Opaque revision string returned by the service.
+    :return: The ETag value.
+    """
+    return f'W/"{revision}"'
+
+def etag_matches(if_none_match, etag):
+    """
+    Compares an 'If-None-Match' header with an ETag (weak comparison).
+
+    :param if_none_match: The header value.
+    :param etag: The current ETag.
+    :return: True if any listed tag (or '*') matches.
+    """
+    current = etag.removeprefix("W/")
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == current:
+            return True
+    return False
+
+def not_modified_since(if_modified_since, last_modified):
+    """
+    Checks an 'If-Modified-Since' header against a modification time.
+
+    :param if_modified_since: The header value.
+    :param last_modified: Timestamp of the last modification.
+    :return: True if nothing changed after the given date. A malformed
+        date is ignored, as HTTP requires.
+    """
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # Last-Modified se envía con resolución de segundos
+    return int(last_modified) <= since.timestamp()
+
+def check_not_modified(response, etag, last_modified, if_none_match, if_modified_since):
+    """
+    Sets the validators of a response and evaluates the request conditions.
+
+    :param response: Response injected into the route, which receives the
+        'ETag' and 'Last-Modified' headers.
+    :param etag: Current ETag of the resource.
+    :param last_modified: Timestamp of its last modification, or None.
+    :param if_none_match: The 'If-None-Match' header, or None.
+    :param if_modified_since: The 'If-Modified-Since' header, or None.
+    :return: An empty 304 Response to return as is if the client's copy is
+        current, otherwise None.
+    """
+    response.headers[ETAG_HEADER] = etag
+    if last_modified is not None:
+        response.headers[LAST_MODIFIED_HEADER] = formatdate(last_modified, usegmt=True)
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, etag)
+    elif if_modified_since is not None and last_modified is not None:
+        fresh = not_modified_since(if_modified_since, last_modified)
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={
+        name: value for name, value in response.headers.items()
+        if name not in ("content-length", "content-type")
+    })
+
+def check_collection(response, revision, if_none_match, if_modified_since):
+    """
+    Conditional check of a list response against the collection revision.
+
+    :param response: Response injected into the route.
+    :param revision: Tuple (revision, last_modified) from the service, read
+        before the records.
+    :param if_none_match: The 'If-None-Match' header, or None.
+    :param if_modified_since: The 'If-Modified-Since' header, or None.
+    :return: The 304 Response, or None.
+    """
+    tag, last_modified = revision
+    return check_not_modified(response, collection_tag(tag), last_modified,
+                              if_none_match, if_modified_since)
+
+def check_item(response, record, last_modified, if_none_match, if_modified_since):
+    """
+    Conditional check of an item response against the record version.
+
+    :param response: Response injected into the route.
+    :param record: The book or author, or None if not found.
+    :param last_modified: Last modification of the collection, read before
+        the record so that it is never later than the record's own, or None.
+    :param if_none_match: The 'If-None-Match' header, or None.
+    :param if_modified_since: The 'If-Modified-Since' header, or None.
+    :return: The 304 Response, or None.
+    """
+    if record is None:
+        return None
+    return check_not_modified(response, entity_tag(record.version), last_modified,
+                              if_none_match, if_modified_since)
@@ -0,0 +1,32 @@
+"""
+This module scopes a pooled MySQL connection to each HTTP request.
+
+The connection is checked out of the pool when the request starts and
+returned to it when the request finishes, so concurrent requests served
+by the thread pool use different connections.
+"""
+
+from fastapi import Depends
+from database import database, reset_connection_state
+
+async def reset_database_state():
+    """
+    Gives the request its own connection state.
+
+    Runs in the request's async context so the state is inherited by the
+    threads that run the sync dependencies and route handlers.
+    """
+    reset_connection_state()
+
+def get_database_connection(_state=Depends(reset_database_state)):
+    """
+    Checks out a pooled connection for the duration of the request.
+
+    :yield: Nothing; the connection is used implicitly by the models.
+    """
+    database.connect(reuse_if_open=True)
+    try:
+        yield
+    finally:
+        if not database.is_closed():
+            database.close()
@@ -0,0 +1,21 @@
+"""
+This module builds the error responses shared by the helpers.
+"""
+
+from fastapi import HTTPException, status
+
+def bad_request(message):
+    """
+    Builds the 400 (Bad Request) exception raised for malformed input.
+
+    :param message: Description of what is wrong with the request.
+    :return: The HTTPException to raise.
+    """
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail={
+            "status": False,
+            "status_code": status.HTTP_400_BAD_REQUEST,
+            "message": message,
+        },
+    )
@@ -0,0 +1,97 @@
+"""
+This module implements the Server-Sent Events stream of the change feed.
+
+Each change is sent as a 'change' event whose id is its sequence number,
+so a client that reconnects with the 'Last-Event-ID' header first receives
+the retained changes it missed. A comment line is sent when the stream is
+idle to keep the connection open. A subscriber that falls behind or asks
+for changes no longer retained receives a 'resync' event and the stream
+ends; the client must reload the full lists.
+"""
+
+import json
+import os
+from dotenv import load_dotenv
+from pydantic_core import to_json
+
+# Cargar variables de entorno desde el archivo .env
+load_dotenv()
+
+# Cambios pendientes por suscriptor antes de desconectarlo
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+# Segundos sin cambios tras los que se envía un comentario de keep-alive
+EVENT_KEEP_ALIVE_SECONDS = float(os.getenv("EVENT_KEEP_ALIVE_SECONDS", "15"))
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+EVENT_STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+REPLAY_BATCH_SIZE = 1000
+KEEP_ALIVE = b": keep-alive\n\n"
+
+def encode_change(entry):
+    """
+    Encodes a change log entry as a 'change' event.
+
+    :param entry: The change (see ChangeLog.append).
+    :return: The event bytes.
+    """
+    return b"id: %d\nevent: change\ndata: %s\n\n" % (entry["seq"], to_json(entry))
+
+def control_event(name, last_seq):
+    """
+    Encodes a 'ready' or 'resync' event carrying the last sequence number.
+    """
+    data = json.dumps({"last_seq": last_seq})
+    return f"id: {last_seq}\nevent: {name}\ndata: {data}\n\n".encode()
+
+def parse_event_id(value):
+    """
+    Parses a 'Last-Event-ID' header.
+
+    :return: The sequence number, or -1 (always older than the retained
+        window) if the header is malformed.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return -1
+
+async def stream_changes(broker, change_log, last_event_id, keep_alive_seconds):
+    """
+    Async generator of the event stream of one client.
+
+    :param broker: ChangeBroker delivering the live changes.
+    :param change_log: ChangeLog used to replay missed changes.
+    :param last_event_id: The 'Last-Event-ID' header, or None.
+    :param keep_alive_seconds: Idle time before a keep-alive comment.
+    """
+    # La suscripción devuelve el último número de secuencia leído a la vez:
+    # ningún cambio queda entre ambos
+    subscription, last_seq = broker.subscribe()
+    try:
+        if last_event_id is None:
+            yield control_event("ready", last_seq)
+        else:
+            last_seq = parse_event_id(last_event_id)
+            while True:
+                changes, current_seq, resync_required = change_log.since(
+                    last_seq, REPLAY_BATCH_SIZE)
+                if resync_required:
+                    yield control_event("resync", current_seq)
+                    return
+                for entry in changes:
+                    yield encode_change(entry)
+                if not changes:
+                    break
+                last_seq = changes[-1]["seq"]
+        while True:
+            changes = await subscription.get(keep_alive_seconds)
+            if subscription.overflowed:
+                yield control_event("resync", change_log.statistics()["last_seq"])
+                return
+            if not changes:
+                yield KEEP_ALIVE
+            for seq, payload in changes:
+                # Los cambios ya reenviados desde el registro se omiten
+                if seq > last_seq:
+                    yield payload
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,62 @@
+"""
+This module streams full catalog exports as NDJSON or CSV.
+
+Rows are pulled from the services in fixed-size batches and encoded batch
+by batch into a StreamingResponse, so memory use does not depend on the
+number of exported rows.
+"""
+
+import csv
+import io
+import json
+from fastapi.responses import StreamingResponse
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def iter_export(batches, fields, export_format):
+    """
+    Encodes batches of row tuples as NDJSON lines or CSV records.
+
+    :param batches: Iterable of lists of tuples ordered like `fields`.
+    :param fields: Names of the exported columns.
+    :param export_format: 'ndjson' or 'csv'.
+    :yield: The encoded bytes of each batch.
+    """
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for rows in batches:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+        return
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(fields, row)), default=str) + "\n" for row in rows
+        ).encode()
+
+def export_response(iter_rows, fields, export_format, filename):
+    """
+    Builds the StreamingResponse of an export.
+
+    :param iter_rows: Service method (batch_size) yielding batches of rows.
+    :param fields: Names of the exported columns.
+    :param export_format: 'ndjson' or 'csv'.
+    :param filename: Name of the downloaded file, without extension.
+    :return: The StreamingResponse.
+    """
+    return StreamingResponse(
+        iter_export(iter_rows(EXPORT_BATCH_SIZE), fields, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"'
+        },
+    )
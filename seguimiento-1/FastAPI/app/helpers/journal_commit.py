@@ -0,0 +1,27 @@
+"""
+This module makes write requests durable when the journal is enabled.
+
+The dependency runs after the route handler and, for write methods, waits
+until the journal has fsynced every change appended so far. Requests
+finishing at the same time share one fsync (group commit), and a client
+only receives the response once its changes are on disk.
+"""
+
+from fastapi import Request
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def journal_commit(journal):
+    """
+    Builds the dependency that waits for the journal after write requests.
+
+    :param journal: The Journal of the in-memory services.
+    :return: The dependency function.
+    """
+    def wait_for_journal(request: Request):
+        try:
+            yield
+        finally:
+            if request.method not in SAFE_METHODS:
+                journal.wait_durable()
+    return wait_for_journal
@@ -0,0 +1,161 @@
+"""
+This module records request metrics and renders them in the Prometheus
+text exposition format.
+
+MetricsMiddleware is a pure ASGI middleware. For every HTTP request it
+records the latency, the request and response body sizes and the status
+code, labelled by HTTP method and route template (for example
+'/books/book/{book_id}') so that ids do not create new series. It also
+keeps a gauge of the requests in flight.
+
+Recording runs on the event loop and only touches plain Python counters,
+so it needs no locks; /metrics must also be served from the event loop
+(an 'async def' route) to read a consistent snapshot.
+"""
+
+from bisect import bisect_left
+from time import perf_counter
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+UNMATCHED_ROUTE = "<unmatched>"
+
+class Histogram:
+    """
+    Fixed-bucket histogram; `counts[i]` counts observations <= bounds[i].
+    """
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+class RouteMetrics:
+    """
+    Metrics of one (method, route template) pair.
+    """
+
+    __slots__ = ("latency", "request_size", "response_size", "statuses")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.request_size = Histogram(SIZE_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+
+class MetricsRegistry:
+    """
+    Holds the metrics of every route and renders them for Prometheus.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.in_flight = {}
+
+    def observe(self, method, route, status, seconds, request_size, response_size):
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+        metrics.latency.observe(seconds)
+        metrics.request_size.observe(request_size)
+        metrics.response_size.observe(response_size)
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, attribute, description in (
+                ("http_request_duration_seconds", "latency", "Request latency."),
+                ("http_request_size_bytes", "request_size", "Request body size."),
+                ("http_response_size_bytes", "response_size", "Response body size.")):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), metrics in self.routes.items():
+                render_histogram(lines, name, labels(method=method, route=route),
+                                 getattr(metrics, attribute))
+        lines.append("# HELP http_responses_total Responses by status code.")
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route), metrics in self.routes.items():
+            for status, count in metrics.statuses.items():
+                lines.append(f"http_responses_total"
+                             f"{{{labels(method=method, route=route, status=status)}}} {count}")
+        lines.append("# HELP http_requests_in_flight Requests being served.")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for method, count in self.in_flight.items():
+            lines.append(f"http_requests_in_flight{{{labels(method=method)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+def render_histogram(lines, name, label_text, histogram):
+    """
+    Appends the cumulative buckets, sum and count of a histogram.
+    """
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{label_text},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{label_text}}} {histogram.total}")
+    lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+
+def labels(**values):
+    """
+    Formats Prometheus labels, escaping backslashes, quotes and newlines.
+    """
+    return ",".join(f'{key}="{escape_label(value)}"' for key, value in values.items())
+
+def escape_label(value):
+    """
+    Escapes a label value as required by the Prometheus text format.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records the metrics of every HTTP request.
+    """
+
+    def __init__(self, app, registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        registry = self.registry
+        method = scope["method"]
+        registry.in_flight[method] = registry.in_flight.get(method, 0) + 1
+        sizes = [0, 0]
+        status = [500]
+
+        async def receive_counting():
+            message = await receive()
+            sizes[0] += len(message.get("body", b""))
+            return message
+
+        async def send_counting(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            else:
+                sizes[1] += len(message.get("body", b""))
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive_counting, send_counting)
+        finally:
+            elapsed = perf_counter() - started
+            registry.in_flight[method] -= 1
+            route = scope.get("route")
+            registry.observe(method, route.path if route else UNMATCHED_ROUTE,
+                             status[0], elapsed, sizes[0], sizes[1])
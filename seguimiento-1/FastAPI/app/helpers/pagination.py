@@ -0,0 +1,105 @@
+"""
+This module implements keyset (cursor) pagination for the list endpoints.
+
+Pages are ordered by a key: the record id, or the publication date and id
+of the books. The cursor handed to the client is an opaque, URL-safe
+encoding of the key of the last record of the page, and the next page
+starts right after it. The cursor of the next page is returned in the
+'X-Next-Cursor' HTTP header; the header is absent on the last page.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date
+from helpers.errors import bad_request
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(key):
+    """
+    Encodes the key of the last record of a page as an opaque cursor.
+
+    :param key: JSON-serializable dict with the keyset values.
+    :return: The cursor string.
+    """
+    raw = json.dumps(key, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    :param cursor: The cursor string sent by the client.
+    :return: The dict with the keyset values.
+    :raises HTTPException: If the cursor is malformed, a 400 (Bad Request)
+        exception is raised.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, ValueError) as error:
+        raise invalid_cursor() from error
+    if not isinstance(key, dict):
+        raise invalid_cursor()
+    return key
+
+def invalid_cursor():
+    """
+    Builds the 400 (Bad Request) exception raised for malformed cursors.
+    """
+    return bad_request("Invalid cursor")
+
+def paginate_by_id(fetch_page, cursor, limit, response):
+    """
+    Fetches one page of records ordered by id.
+
+    :param fetch_page: Callable (after_id, limit) returning records by id.
+    :param cursor: Cursor of the previous page, or None for the first page.
+    :param limit: Maximum number of records in the page.
+    :param response: Response whose headers receive the next cursor.
+    :return: The records of the page.
+    """
+    after_id = None
+    if cursor:
+        after_id = decode_cursor(cursor).get("id")
+        if not isinstance(after_id, int):
+            raise invalid_cursor()
+    # Se pide un registro extra para saber si hay una página siguiente
+    records = fetch_page(after_id, limit + 1)
+    if len(records) > limit:
+        records = records[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"id": records[-1].id})
+    return records
+
+def paginate_by_date(fetch_page, cursor, limit, response):
+    """
+    Fetches one page of books ordered by publication date and id.
+
+    :param fetch_page: Callable (after, limit) returning books by date,
+        where `after` is the (publication_date, id) of the last book of the
+        previous page or None.
+    :param cursor: Cursor of the previous page, or None for the first page.
+    :param limit: Maximum number of books in the page.
+    :param response: Response whose headers receive the next cursor.
+    :return: The books of the page.
+    """
+    after = None
+    if cursor:
+        key = decode_cursor(cursor)
+        after_id = key.get("id")
+        if not isinstance(after_id, int) or not isinstance(key.get("date"), str):
+            raise invalid_cursor()
+        try:
+            after = (date.fromisoformat(key["date"]), after_id)
+        except ValueError as error:
+            raise invalid_cursor() from error
+    records = fetch_page(after, limit + 1)
+    if len(records) > limit:
+        records = records[:limit]
+        last = records[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            {"date": last.publication_date.isoformat(), "id": last.id})
+    return records
@@ -0,0 +1,56 @@
+"""
+This module implements the fast JSON response path of the routes.
+
+Returning pydantic models from a route makes FastAPI run jsonable_encoder
+over every object before encoding the result. The routes instead
+serialize their models straight to JSON bytes with pydantic-core through
+a TypeAdapter and return the bytes in a plain Response.
+"""
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+from models.author import Author
+from models.book import Book
+
+class BookBatch(TypedDict):
+    """
+    Result of a batch lookup of books: the books found, in the requested
+    order, and the ids not found.
+    """
+    books: list[Book]
+    missing: list[int]
+
+class AuthorBatch(TypedDict):
+    """
+    Result of a batch lookup of authors: the authors found, in the
+    requested order, and the ids not found.
+    """
+    authors: list[Author]
+    missing: list[int]
+
+BOOK_ADAPTER = TypeAdapter(Book | None)
+BOOK_LIST_ADAPTER = TypeAdapter(list[Book])
+BOOK_BATCH_ADAPTER = TypeAdapter(BookBatch)
+AUTHOR_ADAPTER = TypeAdapter(Author | None)
+AUTHOR_LIST_ADAPTER = TypeAdapter(list[Author])
+AUTHOR_BATCH_ADAPTER = TypeAdapter(AuthorBatch)
+
+def json_response(adapter, content, response=None):
+    """
+    Encodes `content` with pydantic-core and wraps it in a Response.
+
+    :param adapter: TypeAdapter matching the type of `content`.
+    :param content: The models to return.
+    :param response: Response injected into the route, whose headers
+        (e.g. the pagination cursor) are copied to the new response.
+    :return: The JSON Response.
+    """
+    headers = None
+    if response is not None:
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name not in ("content-length", "content-type")
+        }
+    return Response(adapter.dump_json(content), media_type="application/json",
+                    headers=headers)
@@ -0,0 +1,70 @@
+"""
+This module implements optimistic concurrency control for the item routes.
+
+Every book and author carries a version that starts at 1 and grows by one
+on each update; creating again a deleted id continues from the version it
+had, so a version is never issued twice for the same id. The routes return
+it as the 'ETag' header, and PUT and DELETE accept an 'If-Match' header
+with the ETag the client last read: the write is applied only if the
+stored version still matches, as a single compare-and-swap, and a 412
+(Precondition Failed) is returned otherwise.
+"""
+
+from fastapi import HTTPException, status
+
+ETAG_HEADER = "ETag"
+
+def entity_tag(version):
+    """
+    Formats a version as a strong ETag.
+
+    :param version: The version of the record.
+    :return: The quoted ETag value.
+    """
+    return f'"{version}"'
+
+def parse_if_match(value):
+    """
+    Parses an 'If-Match' header into the versions it accepts.
+
+    :param value: The header value, or None if absent.
+    :return: None if the header is absent or '*' (unconditional write),
+        otherwise the set of versions listed. Tags that are not versions
+        issued by entity_tag are ignored, so they never match.
+    """
+    if value is None or value.strip() == "*":
+        return None
+    versions = set()
+    for tag in value.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            # If-Match usa comparación fuerte: una ETag débil nunca coincide
+            continue
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.add(int(tag[1:-1]))
+    return versions
+
+def set_entity_tag(response, record):
+    """
+    Sets the ETag header of `response` from the version of `record`.
+
+    :param response: Response injected into the route.
+    :param record: The book or author returned, or None.
+    """
+    if record is not None:
+        response.headers[ETAG_HEADER] = entity_tag(record.version)
+
+def precondition_failed():
+    """
+    Builds the 412 (Precondition Failed) returned when 'If-Match' is stale.
+
+    :return: The HTTPException to raise.
+    """
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail={
+            "status": False,
+            "status_code": status.HTTP_412_PRECONDITION_FAILED,
+            "message": "The resource was modified or deleted since it was read",
+        },
+    )
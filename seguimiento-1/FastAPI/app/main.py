@@ -8,25 +8,39 @@ lifecycle, and includes routes.
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from helpers.api_key_auth import get_api_key
-from starlette.responses import RedirectResponse
-from database import database as connection
+from helpers.db_connection import get_database_connection
+from helpers.journal_commit import journal_commit
+from helpers.metrics import MetricsMiddleware, MetricsRegistry
+from starlette.responses import PlainTextResponse, RedirectResponse
+from database import database as connection, initialize_database, pool_statistics
 from routes.author_route import author_router
 from routes.book_route import book_router
+from routes.change_route import change_router
+from routes.stats_route import stats_router
+from services.instances import STORAGE_BACKEND, journal
 
 @asynccontextmanager
 async def manage_lifespan(_app: FastAPI):
     """
     Manage the lifespan of the FastAPI application.
 
-    Ensures the database connection is opened and closed properly.
+    Creates the tables when the database storage backend is in use and
+    closes every pooled connection on shutdown. Requests check out their
+    own connection through get_database_connection. With the memory
+    backend, the journal (if enabled) is flushed and closed on shutdown.
     """
-    if connection.is_closed():
-        connection.connect()
+    if STORAGE_BACKEND != "database":
+        try:
+            yield
+        finally:
+            if journal is not None:
+                journal.close()
+        return
+    initialize_database()
     try:
         yield
     finally:
-        if not connection.is_closed():
-            connection.close()
+        connection.close_all()
 
 app = FastAPI(
     title="Microservicio de libros",
@@ -39,6 +53,9 @@ app = FastAPI(
     lifespan=manage_lifespan
 )
 
+metrics_registry = MetricsRegistry()
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
 @app.get("/")
 async def read_root():
     """
@@ -48,12 +65,60 @@ async def read_root():
     """
     return RedirectResponse(url="/docs")
 
+router_dependencies = [Depends(get_api_key)]
+if STORAGE_BACKEND == "database":
+    router_dependencies.append(Depends(get_database_connection))
+if journal is not None:
+    router_dependencies.append(Depends(journal_commit(journal)))
+
+@app.get("/database/pool", dependencies=[Depends(get_api_key)])
+def get_pool_statistics():
+    """
+    Reports the usage of the MySQL connection pool.
+
+    Returns:
+        dict: Pool limits and the number of in-use and idle connections.
+    """
+    return pool_statistics()
+
+@app.get("/journal", dependencies=[Depends(get_api_key)])
+def get_journal_statistics():
+    """
+    Reports the state of the journal of the in-memory services.
+
+    Returns:
+        dict: Current segment, appended and fsynced changes and the time of
+            the last snapshot, or None if the journal is disabled.
+    """
+    return None if journal is None else journal.statistics()
+
+@app.get("/metrics", dependencies=[Depends(get_api_key)])
+async def get_metrics():
+    """
+    Exposes the request metrics in the Prometheus text format.
+
+    Served from the event loop, where the metrics are recorded, so the
+    snapshot is consistent.
+    """
+    return PlainTextResponse(metrics_registry.render(),
+                             media_type="text/plain; version=0.0.4")
+
 app.include_router(author_router,
                    prefix="/authors",
                    tags=["Authors"],
-                   dependencies=[Depends(get_api_key)])
+                   dependencies=router_dependencies)
 
 app.include_router(book_router,
                    prefix="/books",
                    tags=["Books"],
-                   dependencies=[Depends(get_api_key)])
\ No newline at end of file
+                   dependencies=router_dependencies)
+
+app.include_router(stats_router,
+                   prefix="/stats",
+                   tags=["Stats"],
+                   dependencies=router_dependencies)
+
+app.include_router(change_router,
+                   prefix="/changes",
+                   tags=["Changes"],
+                   dependencies=[Depends(get_api_key)])
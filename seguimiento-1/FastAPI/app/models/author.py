@@ -5,19 +5,23 @@ The Author model includes the fields:
 - id: Unique identifier for the author
 - name: Name of the author
 - nationality: Nationality of the author
+- version: Revision number, increased on every update
 """
 
 from pydantic import BaseModel
+from models.ids import RecordId
 
 class Author(BaseModel):
     """
     Author model representing the details of an author.
 
     Attributes:
-    - id: int, unique identifier for the author
+    - id: int, unique identifier for the author (signed 64-bit)
     - name: str, the name of the author
     - nationality: str, the nationality of the author
+    - version: int, revision number assigned by the server (ignored on input)
     """
-    id: int
+    id: RecordId
     name: str
     nationality: str
+    version: int = 1
@@ -6,22 +6,26 @@ The Book model includes the fields:
 - title: Title of the book
 - author_id: Foreign key referencing the Author model
 - publication_date: Date when the book was published
+- version: Revision number, increased on every update
 """
 
 from datetime import date  # estándar
 from pydantic import BaseModel  # terceros
+from models.ids import RecordId  # locales
 
 class Book(BaseModel):
     """
     Book model representing the details of a book.
 
     Attributes:
-    - id: int, unique identifier for the book
+    - id: int, unique identifier for the book (signed 64-bit)
     - title: str, title of the book
-    - author_id: int, foreign key linking to the author of the book
+    - author_id: int, foreign key linking to the author of the book (signed 64-bit)
     - publication_date: date, the date the book was published
+    - version: int, revision number assigned by the server (ignored on input)
     """
-    id: int
+    id: RecordId
     title: str
-    author_id: int  # Foreign Key
+    author_id: RecordId  # Foreign Key
     publication_date: date
+    version: int = 1
@@ -0,0 +1,15 @@
+"""
+This module defines the type of the record identifiers of the models.
+
+Identifiers are signed 64-bit integers, the range of the `array("q")`
+columns of the in-memory columnar store, so an id out of range is
+rejected when the record is validated instead of failing the write.
+"""
+
+from typing import Annotated
+from pydantic import Field
+
+MIN_ID = -2**63
+MAX_ID = 2**63 - 1
+
+RecordId = Annotated[int, Field(ge=MIN_ID, le=MAX_ID)]
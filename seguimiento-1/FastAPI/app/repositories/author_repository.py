@@ -0,0 +1,272 @@
+"""
+Peewee-backed repository for authors.
+
+AuthorRepository exposes the same methods as AuthorService but stores the
+authors in the AuthorModel table. Deleting an author also deletes their
+books (BookModel.author_id is ON DELETE CASCADE as well). Every write adds
+to the authors per nationality it changed (a delete also subtracts the
+books from the book counts) and then bumps the revision counter shards of
+the ids it wrote, in both tables when books are deleted, in the same
+transaction. No row is locked to read it: updates and deletes are a
+compare-and-swap on the version read, run again if it changed. A delete
+keeps the versions of the author and their books as tombstones.
+"""
+
+from collections import Counter
+from peewee import DoesNotExist, IntegrityError
+from models.author import Author
+from database import AuthorModel, database
+from helpers.versioning import precondition_failed
+from repositories.batch import select_by_ids
+from repositories.errors import StaleRead, conflict_error, retry_stale
+from repositories.group_counts import GroupCounter
+from repositories.revisions import RevisionTracker
+from repositories.tombstones import Tombstones
+from services.change_log import CREATE, DELETE, UPDATE
+
+AUTHOR_COLUMNS = (
+    AuthorModel.id,
+    AuthorModel.name,
+    AuthorModel.nationality,
+    AuthorModel.version,
+)
+
+def to_author(row):
+    """
+    Builds an Author from an AuthorModel row returned by `.dicts()`.
+    """
+    return Author(**row)
+
+class AuthorRepository:
+    """
+    Author storage backed by the `authors` table.
+    """
+
+    def __init__(self, book_repository, change_log=None):
+        self.revisions = RevisionTracker(AuthorModel)
+        # Versión de los autores borrados, para que un id recreado no vuelva a la 1
+        self.tombstones = Tombstones(AuthorModel)
+        # Conteo de /stats, actualizado en la transacción de cada escritura
+        self.authors_per_nationality = GroupCounter("authors_per_nationality")
+        # Borrar un autor borra en cascada sus libros: cambia su colección y sus conteos
+        self.book_repository = book_repository
+        # Registro de cambios de este proceso (los demás workers llevan el suyo)
+        self.change_log = change_log
+
+    def create_author(self, author):
+        try:
+            with database.atomic():
+                AuthorModel.insert(
+                    id=author.id,
+                    name=author.name,
+                    nationality=author.nationality,
+                    version=1,
+                ).execute()
+                version = self.tombstones.resume([author.id]).get(author.id, 1)
+                self.authors_per_nationality.add({author.nationality: 1})
+                self.revisions.bump([author.id])
+        except IntegrityError as error:
+            raise conflict_error(error) from error
+        if author.version != version:
+            author = author.model_copy(update={"version": version})
+        self._log(CREATE, author.id, author)
+        return author
+
+    def create_authors(self, authors):
+        """
+        Inserts the authors with one multi-row INSERT inside a transaction.
+        """
+        rows = [{**author.model_dump(), "version": 1} for author in authors]
+        try:
+            with database.atomic():
+                AuthorModel.insert_many(rows).execute()
+                versions = self.tombstones.resume([author.id for author in authors])
+                self.authors_per_nationality.add(
+                    Counter(author.nationality for author in authors))
+                self.revisions.bump([author.id for author in authors])
+        except IntegrityError as error:
+            raise conflict_error(error) from error
+        for author in authors:
+            self._log(CREATE, author.id,
+                      author.model_copy(update={"version": versions.get(author.id, 1)}))
+        return len(rows)
+
+    def get_all_authors(self, nationality=None):
+        query = AuthorModel.select(*AUTHOR_COLUMNS)
+        if nationality is not None:
+            query = query.where(AuthorModel.nationality == nationality)
+        return [to_author(row) for row in query.order_by(AuthorModel.id).dicts()]
+
+    def get_authors_page(self, after_id, limit, nationality=None):
+        """
+        Returns a page of authors by id, only those of `nationality` when
+        given (served by the index on the nationality column).
+        """
+        query = AuthorModel.select(*AUTHOR_COLUMNS)
+        if nationality is not None:
+            query = query.where(AuthorModel.nationality == nationality)
+        if after_id is not None:
+            query = query.where(AuthorModel.id > after_id)
+        query = query.order_by(AuthorModel.id).limit(limit)
+        return [to_author(row) for row in query.dicts()]
+
+    def get_authors_by_ids(self, author_ids):
+        """
+        Returns the authors of `author_ids` in the same order, and the ids
+        not found, reading them with chunked `WHERE id IN (...)` queries.
+        """
+        rows = select_by_ids(AuthorModel.select(*AUTHOR_COLUMNS), AuthorModel.id, author_ids)
+        authors = [to_author(rows[author_id]) for author_id in author_ids if author_id in rows]
+        return authors, [author_id for author_id in author_ids if author_id not in rows]
+
+    def suggest_authors(self, prefix, limit):
+        """
+        Returns up to `limit` authors whose name starts with `prefix`
+        (`name LIKE 'prefix%'`, served by the index on the name column),
+        in name order.
+        """
+        query = (AuthorModel.select(*AUTHOR_COLUMNS)
+                 .where(AuthorModel.name.startswith(" ".join(prefix.split())))
+                 .order_by(AuthorModel.name, AuthorModel.id)
+                 .limit(limit))
+        return [to_author(row) for row in query.dicts()]
+
+    def count_authors_by_nationality(self):
+        """
+        Returns the number of authors of each nationality, read from the
+        group_counts table.
+        """
+        return self.authors_per_nationality.counts()
+
+    def recount_statistics(self):
+        """
+        Counts the authors per nationality again with a GROUP BY and replaces
+        the stored counts, blocking the author writes meanwhile.
+        """
+        return {"authors_per_nationality": self.authors_per_nationality.recount()}
+
+    def iter_author_rows(self, batch_size):
+        """
+        Yields every author as a tuple, in id order, in batches of `batch_size`.
+
+        Each batch is a keyset query on its own pooled connection, so a long
+        export neither holds a connection nor buffers the whole table.
+        """
+        after_id = None
+        while True:
+            query = AuthorModel.select(*AUTHOR_COLUMNS)
+            if after_id is not None:
+                query = query.where(AuthorModel.id > after_id)
+            with database.connection_context():
+                rows = list(query.order_by(AuthorModel.id).limit(batch_size).tuples().iterator())
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+
+    def get_authors_revision(self):
+        return self.revisions.revision()
+
+    def get_authors_last_modified(self):
+        """
+        Returns the time of the last write to the table, the latest time of
+        its revision counter shards, for the Last-Modified of every response.
+        """
+        return self.revisions.last_modified()
+
+    def get_author_by_id(self, author_id):
+        try:
+            row = (AuthorModel.select(*AUTHOR_COLUMNS)
+                   .where(AuthorModel.id == author_id)
+                   .dicts()
+                   .get())
+        except DoesNotExist:
+            return None
+        return to_author(row)
+
+    def update_author(self, author_id, author_data, expected_versions=None):
+        """
+        Updates the author, only if its version is in `expected_versions`
+        when given, as a compare-and-swap on the version read first
+        (`UPDATE ... WHERE id = ? AND version = ?`).
+        """
+        def write():
+            with database.atomic():
+                previous = self._read_author(author_id)
+                if previous is None:
+                    return None
+                nationality, version = previous
+                if expected_versions is not None and version not in expected_versions:
+                    return None
+                query = AuthorModel.update(name=author_data.name,
+                                           nationality=author_data.nationality,
+                                           version=version + 1)
+                if not query.where((AuthorModel.id == author_id)
+                                   & (AuthorModel.version == version)).execute():
+                    raise StaleRead()
+                self.authors_per_nationality.move(nationality, author_data.nationality)
+                self.revisions.bump([author_id])
+                return version + 1
+
+        version = retry_stale(write)
+        if version is None:
+            if expected_versions is not None:
+                raise precondition_failed()
+            return None
+        author = Author(id=author_id,
+                        name=author_data.name,
+                        nationality=author_data.nationality,
+                        version=version)
+        self._log(UPDATE, author_id, author)
+        return author
+
+    def delete_author(self, author_id, expected_versions=None):
+        """
+        Deletes the author and their books. The books are deleted first with
+        a compare-and-swap on the versions read, so that the counts subtract
+        exactly the books deleted, and then the author with a compare-and-swap
+        on its version; the ON DELETE CASCADE only backs them up.
+        """
+        def write():
+            with database.atomic():
+                previous = self._read_author(author_id)
+                if previous is None:
+                    return None
+                nationality, version = previous
+                if expected_versions is not None and version not in expected_versions:
+                    return None
+                book_ids = self.book_repository.delete_books_of_author(author_id)
+                if not (AuthorModel.delete()
+                        .where((AuthorModel.id == author_id) & (AuthorModel.version == version))
+                        .execute()):
+                    raise StaleRead()
+                self.tombstones.bury({author_id: version})
+                self.authors_per_nationality.add({nationality: -1})
+                self.revisions.bump([author_id])
+                return book_ids
+
+        book_ids = retry_stale(write)
+        if book_ids is not None:
+            self._log(DELETE, author_id)
+            if self.change_log is not None:
+                for book_id in book_ids:
+                    self.change_log.append("book", DELETE, book_id)
+        elif expected_versions is not None:
+            raise precondition_failed()
+
+    @staticmethod
+    def _read_author(author_id):
+        """
+        Reads the fields of the author the counts and the compare-and-swap need.
+
+        :return: Tuple (nationality, version), or None.
+        """
+        return (AuthorModel
+                .select(AuthorModel.nationality, AuthorModel.version)
+                .where(AuthorModel.id == author_id)
+                .tuples()
+                .first())
+
+    def _log(self, operation, author_id, author=None):
+        if self.change_log is not None:
+            self.change_log.append("author", operation, author_id, author)
@@ -0,0 +1,23 @@
+"""
+Batch lookups by id shared by the peewee repositories.
+"""
+
+# Ids por sentencia: acota el tamaño del IN y el número de parámetros
+ID_CHUNK_SIZE = 500
+
+def select_by_ids(query, id_field, ids):
+    """
+    Runs `query` for the rows whose id is in `ids`, with one
+    `WHERE id IN (...)` statement per ID_CHUNK_SIZE ids.
+
+    :param query: Select query of the columns to read, returning dicts.
+    :param id_field: Primary key field of the model.
+    :param ids: The ids to look up.
+    :return: Dict id -> row of the ids found.
+    """
+    rows = {}
+    for first in range(0, len(ids), ID_CHUNK_SIZE):
+        chunk = ids[first:first + ID_CHUNK_SIZE]
+        for row in query.where(id_field.in_(chunk)).dicts():
+            rows[row[id_field.name]] = row
+    return rows
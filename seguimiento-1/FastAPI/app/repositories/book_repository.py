@@ -0,0 +1,409 @@
+"""
+Peewee-backed repository for books.
+
+BookRepository exposes the same methods as BookService but stores the
+books in the BookModel table, so every uvicorn worker shares the data.
+Every write adds to the books per author and per year of the groups it
+changed and then bumps the revision counter shards of the ids it wrote,
+in the same transaction. No row is locked to read it: updates and deletes
+read the book (its author and date leave their groups) and then apply a
+compare-and-swap on the version read, run again if another write changed
+the book in between. Conditional updates and deletes check the version
+read against the client's. A delete keeps the version of the book as a
+tombstone, and a book created again with its id continues from it. Searches
+use the FULLTEXT index of the titles in MySQL, ranked by its relevance.
+"""
+
+from collections import Counter
+from functools import reduce
+import operator
+from peewee import DoesNotExist, IntegrityError, MySQLDatabase, Tuple, chunked
+from playhouse.mysql_ext import Match
+from models.book import Book
+from database import BookModel, database
+from helpers.versioning import precondition_failed
+from repositories.batch import ID_CHUNK_SIZE, select_by_ids
+from repositories.errors import StaleRead, conflict_error, retry_stale
+from repositories.group_counts import GroupCounter
+from repositories.revisions import RevisionTracker
+from repositories.tombstones import Tombstones
+from services.change_log import CREATE, DELETE, UPDATE
+from services.search_index import tokenize
+
+BOOK_COLUMNS = (
+    BookModel.id,
+    BookModel.title,
+    BookModel.author_id,
+    BookModel.publication_date,
+    BookModel.version,
+)
+
+# innodb_ft_min_token_size: el índice FULLTEXT no guarda palabras más cortas
+FULLTEXT_MIN_TOKEN = 3
+# Stopwords de InnoDB que tokenize() conserva: el índice FULLTEXT tampoco las guarda
+FULLTEXT_STOPWORDS = frozenset("""
+about are as be com how i is it that this was what when where who will und www
+""".split())
+
+def to_book(row):
+    """
+    Builds a Book from a BookModel row returned by `.dicts()`.
+    """
+    return Book(**row)
+
+class BookRepository:
+    """
+    Book storage backed by the `books` table.
+    """
+
+    def __init__(self, change_log=None):
+        self.revisions = RevisionTracker(BookModel)
+        # Versión de los libros borrados, para que un id recreado no vuelva a la 1
+        self.tombstones = Tombstones(BookModel)
+        # Conteos de /stats, actualizados en la transacción de cada escritura
+        self.books_per_author = GroupCounter("books_per_author", int)
+        self.books_per_year = GroupCounter("books_per_year", int)
+        # Registro de cambios de este proceso (los demás workers llevan el suyo)
+        self.change_log = change_log
+
+    def create_book(self, book):
+        try:
+            with database.atomic():
+                BookModel.insert(
+                    id=book.id,
+                    title=book.title,
+                    author_id=book.author_id,
+                    publication_date=book.publication_date,
+                    version=1,
+                ).execute()
+                version = self.tombstones.resume([book.id]).get(book.id, 1)
+                self._count([book], 1)
+                self.revisions.bump([book.id])
+        except IntegrityError as error:
+            raise conflict_error(error) from error
+        if book.version != version:
+            book = book.model_copy(update={"version": version})
+        self._log(CREATE, book.id, book)
+        return book
+
+    def create_books(self, books):
+        """
+        Inserts the books with one multi-row INSERT inside a transaction.
+        """
+        rows = [{**book.model_dump(), "version": 1} for book in books]
+        try:
+            with database.atomic():
+                BookModel.insert_many(rows).execute()
+                versions = self.tombstones.resume([book.id for book in books])
+                self._count(books, 1)
+                self.revisions.bump([book.id for book in books])
+        except IntegrityError as error:
+            raise conflict_error(error) from error
+        for book in books:
+            self._log(CREATE, book.id,
+                      book.model_copy(update={"version": versions.get(book.id, 1)}))
+        return len(rows)
+
+    def get_all_books(self):
+        query = BookModel.select(*BOOK_COLUMNS).order_by(BookModel.id)
+        return [to_book(row) for row in query.dicts()]
+
+    def get_books_page(self, after_id, limit):
+        query = BookModel.select(*BOOK_COLUMNS)
+        if after_id is not None:
+            query = query.where(BookModel.id > after_id)
+        query = query.order_by(BookModel.id).limit(limit)
+        return [to_book(row) for row in query.dicts()]
+
+    def get_books_by_date(self, published_from, published_to, descending, after, limit):
+        """
+        Returns up to `limit` books published between two dates, ordered by
+        publication date and id (latest first if `descending`), after the
+        (publication_date, id) of `after` when given.
+
+        Served by the index on publication_date, whose entries InnoDB keeps
+        in (publication_date, id) order.
+        """
+        query = BookModel.select(*BOOK_COLUMNS)
+        if published_from is not None:
+            query = query.where(BookModel.publication_date >= published_from)
+        if published_to is not None:
+            query = query.where(BookModel.publication_date <= published_to)
+        if after is not None:
+            after_date, after_id = after
+            if descending:
+                query = query.where((BookModel.publication_date < after_date) | (
+                    (BookModel.publication_date == after_date) & (BookModel.id < after_id)))
+            else:
+                query = query.where((BookModel.publication_date > after_date) | (
+                    (BookModel.publication_date == after_date) & (BookModel.id > after_id)))
+        if descending:
+            query = query.order_by(BookModel.publication_date.desc(), BookModel.id.desc())
+        else:
+            query = query.order_by(BookModel.publication_date, BookModel.id)
+        return [to_book(row) for row in query.limit(limit).dicts()]
+
+    def count_books_by_author(self, author_id=None):
+        """
+        Returns the number of books of each author (only of `author_id` when
+        given), read from the group_counts table.
+        """
+        if author_id is not None:
+            return {author_id: self.books_per_author.get(author_id)}
+        return self.books_per_author.counts()
+
+    def count_books_by_year(self):
+        """
+        Returns the number of books published each year, read from the
+        group_counts table.
+        """
+        return self.books_per_year.counts()
+
+    def recount_statistics(self):
+        """
+        Counts the books per author and per year again with a GROUP BY and
+        replaces the stored counts, blocking the book writes meanwhile.
+        """
+        return {
+            "books_per_author": self.books_per_author.recount(),
+            "books_per_year": self.books_per_year.recount(),
+        }
+
+    def iter_book_rows(self, batch_size):
+        """
+        Yields every book as a tuple, in id order, in batches of `batch_size`.
+
+        Each batch is a keyset query on its own pooled connection, so a long
+        export neither holds a connection nor buffers the whole table.
+        """
+        after_id = None
+        while True:
+            query = BookModel.select(*BOOK_COLUMNS)
+            if after_id is not None:
+                query = query.where(BookModel.id > after_id)
+            with database.connection_context():
+                rows = list(query.order_by(BookModel.id).limit(batch_size).tuples().iterator())
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+
+    def get_books_revision(self):
+        return self.revisions.revision()
+
+    def get_books_last_modified(self):
+        """
+        Returns the time of the last write to the table, the latest time of
+        its revision counter shards, for the Last-Modified of every response.
+        """
+        return self.revisions.last_modified()
+
+    def get_book_by_id(self, book_id):
+        try:
+            row = (BookModel.select(*BOOK_COLUMNS)
+                   .where(BookModel.id == book_id)
+                   .dicts()
+                   .get())
+        except DoesNotExist:
+            return None
+        return to_book(row)
+
+    def get_books_by_ids(self, book_ids):
+        """
+        Returns the books of `book_ids` in the same order, and the ids not
+        found, reading them with chunked `WHERE id IN (...)` queries.
+        """
+        rows = select_by_ids(BookModel.select(*BOOK_COLUMNS), BookModel.id, book_ids)
+        missing = [book_id for book_id in book_ids if book_id not in rows]
+        return [to_book(rows[book_id]) for book_id in book_ids if book_id in rows], missing
+
+    def search_books(self, query, limit):
+        """
+        Returns up to `limit` books whose title contains every term of
+        `query`, best first.
+
+        In MySQL the terms are looked up in the FULLTEXT index of the title
+        (`MATCH (title) AGAINST ('+term ...' IN BOOLEAN MODE)`) and the
+        books are ranked by its relevance, then by id. The index skips
+        words shorter than FULLTEXT_MIN_TOKEN and its own stopwords: those
+        terms, and every term in other databases, are matched with
+        `title LIKE '%term%'`, and without indexed terms the books come in
+        id order. The case- and accent-insensitive collation of the column
+        does the folding.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        words = set()
+        if isinstance(BookModel._meta.database, MySQLDatabase):  # pylint: disable=protected-access
+            words = {term for term in terms
+                     if len(term) >= FULLTEXT_MIN_TOKEN and term not in FULLTEXT_STOPWORDS}
+        conditions = [BookModel.title.contains(term) for term in sorted(terms - words)]
+        order = [BookModel.id]
+        if words:
+            relevance = Match(BookModel.title, " ".join(f"+{word}" for word in sorted(words)),
+                              "IN BOOLEAN MODE")
+            conditions.append(relevance)
+            order.insert(0, relevance.desc())
+        rows = (BookModel.select(*BOOK_COLUMNS)
+                .where(reduce(operator.and_, conditions))
+                .order_by(*order)
+                .limit(limit)
+                .dicts())
+        return [to_book(row) for row in rows]
+
+    def suggest_books(self, prefix, limit):
+        """
+        Returns up to `limit` books whose title starts with `prefix`
+        (`title LIKE 'prefix%'`, served by the index on the title column),
+        in title order.
+        """
+        rows = (BookModel.select(*BOOK_COLUMNS)
+                .where(BookModel.title.startswith(" ".join(prefix.split())))
+                .order_by(BookModel.title, BookModel.id)
+                .limit(limit)
+                .dicts())
+        return [to_book(row) for row in rows]
+
+    def get_books_by_author(self, author_id):
+        query = (BookModel.select(*BOOK_COLUMNS)
+                 .where(BookModel.author_id == author_id)
+                 .order_by(BookModel.id))
+        return [to_book(row) for row in query.dicts()]
+
+    def update_book(self, book_id, book_data, expected_versions=None):
+        """
+        Updates the book, only if its version is in `expected_versions` when
+        given. The book is read first for the groups it leaves in the counts;
+        the update is a compare-and-swap on the version read
+        (`UPDATE ... WHERE id = ? AND version = ?`), run again if the book
+        changed in between.
+        """
+        def write():
+            with database.atomic():
+                previous = self._read_book(book_id)
+                if previous is None:
+                    return None
+                author_id, publication_date, version = previous
+                if expected_versions is not None and version not in expected_versions:
+                    return None
+                query = BookModel.update(title=book_data.title,
+                                         author_id=book_data.author_id,
+                                         publication_date=book_data.publication_date,
+                                         version=version + 1)
+                if not query.where((BookModel.id == book_id)
+                                   & (BookModel.version == version)).execute():
+                    raise StaleRead()
+                self.books_per_author.move(author_id, book_data.author_id)
+                self.books_per_year.move(publication_date.year,
+                                         book_data.publication_date.year)
+                self.revisions.bump([book_id])
+                return version + 1
+
+        try:
+            version = retry_stale(write)
+        except IntegrityError as error:
+            raise conflict_error(error) from error
+        if version is None:
+            if expected_versions is not None:
+                raise precondition_failed()
+            return None
+        book = Book(id=book_id,
+                    title=book_data.title,
+                    author_id=book_data.author_id,
+                    publication_date=book_data.publication_date,
+                    version=version)
+        self._log(UPDATE, book_id, book)
+        return book
+
+    def delete_book(self, book_id, expected_versions=None):
+        """
+        Deletes the book, only if its version is in `expected_versions` when
+        given, as a compare-and-swap on the version read first
+        (`DELETE ... WHERE id = ? AND version = ?`).
+        """
+        def write():
+            with database.atomic():
+                previous = self._read_book(book_id)
+                if previous is None:
+                    return False
+                author_id, publication_date, version = previous
+                if expected_versions is not None and version not in expected_versions:
+                    return False
+                if not (BookModel.delete()
+                        .where((BookModel.id == book_id) & (BookModel.version == version))
+                        .execute()):
+                    raise StaleRead()
+                self.tombstones.bury({book_id: version})
+                self.books_per_author.add({author_id: -1})
+                self.books_per_year.add({publication_date.year: -1})
+                self.revisions.bump([book_id])
+                return True
+
+        if retry_stale(write):
+            self._log(DELETE, book_id)
+        elif expected_versions is not None:
+            raise precondition_failed()
+
+    def delete_books_by_author(self, author_id):
+        book_ids = retry_stale(lambda: self._delete_books_of_author(author_id))
+        for book_id in book_ids:
+            self._log(DELETE, book_id)
+
+    def delete_books_of_author(self, author_id):
+        """
+        Deletes the books of an author inside the caller's transaction, as a
+        compare-and-swap on the (id, version) pairs read first, and subtracts
+        them from the counts.
+
+        :return: The ids of the deleted books, in id order.
+        :raises StaleRead: If a book of the author changed since it was read.
+        """
+        rows = list(BookModel.select(BookModel.id, BookModel.version, BookModel.publication_date)
+                    .where(BookModel.author_id == author_id)
+                    .order_by(BookModel.id)
+                    .tuples())
+        deleted = 0
+        for batch in chunked(rows, ID_CHUNK_SIZE):
+            pairs = [(book_id, version) for book_id, version, _ in batch]
+            deleted += (BookModel.delete()
+                        .where(Tuple(BookModel.id, BookModel.version).in_(pairs))
+                        .execute())
+        # Un libro cambiado o añadido tras la lectura: se vuelve a leer todo
+        if deleted != len(rows) or BookModel.delete().where(
+                BookModel.author_id == author_id).execute():
+            raise StaleRead()
+        self.tombstones.bury({book_id: version for book_id, version, _ in rows})
+        self.books_per_author.add({author_id: -len(rows)})
+        self.books_per_year.add({year: -books for year, books in
+                                 Counter(published.year for _, _, published in rows).items()})
+        book_ids = [book_id for book_id, _, _ in rows]
+        self.revisions.bump(book_ids)
+        return book_ids
+
+    def _delete_books_of_author(self, author_id):
+        with database.atomic():
+            return self.delete_books_of_author(author_id)
+
+    def _count(self, books, change):
+        self.books_per_author.add({author_id: books * change for author_id, books in
+                                   Counter(book.author_id for book in books).items()})
+        self.books_per_year.add({year: books * change for year, books in
+                                 Counter(book.publication_date.year for book in books).items()})
+
+    @staticmethod
+    def _read_book(book_id):
+        """
+        Reads the fields of the book the counts and the compare-and-swap need.
+
+        :return: Tuple (author_id, publication_date, version), or None.
+        """
+        return (BookModel
+                .select(BookModel.author_id, BookModel.publication_date, BookModel.version)
+                .where(BookModel.id == book_id)
+                .tuples()
+                .first())
+
+    def _log(self, operation, book_id, book=None):
+        if self.change_log is not None:
+            self.change_log.append("book", operation, book_id, book)
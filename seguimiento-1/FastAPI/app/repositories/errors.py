@@ -0,0 +1,45 @@
+"""
+Error helpers shared by the peewee repositories.
+"""
+
+from fastapi import HTTPException, status
+
+def conflict_error(error):
+    """
+    Converts a database integrity error into a 409 (Conflict) HTTPException.
+
+    :param error: The IntegrityError raised by the database.
+    :return: The HTTPException to raise.
+    """
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "status": False,
+            "status_code": status.HTTP_409_CONFLICT,
+            "message": str(error),
+        },
+    )
+
+# Intentos de una escritura optimista antes de rendirse ante escrituras concurrentes
+MAX_WRITE_ATTEMPTS = 10
+
+class StaleRead(Exception):
+    """
+    Raised inside a write transaction when a row changed after it was read,
+    to roll the transaction back and run it again.
+    """
+
+def retry_stale(write):
+    """
+    Runs the transaction `write` until it completes without StaleRead.
+
+    :param write: Function that runs one attempt in its own transaction.
+    :return: What `write` returns.
+    :raises HTTPException: 409 (Conflict) after MAX_WRITE_ATTEMPTS attempts.
+    """
+    for _ in range(MAX_WRITE_ATTEMPTS):
+        try:
+            return write()
+        except StaleRead:
+            continue
+    raise conflict_error("the record kept changing during the write, try again")
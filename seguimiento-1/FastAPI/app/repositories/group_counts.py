@@ -0,0 +1,105 @@
+"""
+Group counts of the /stats endpoints for the peewee repositories.
+
+Each statistic (books per author, books per year, authors per
+nationality) is stored in the `group_counts` table (GroupCountModel), one
+row per group. The repositories add to the rows of the groups a write
+changes in the same transaction as the write, with one
+`INSERT ... ON DUPLICATE KEY UPDATE total = total + ?` per statistic and
+no lock besides those rows, so reading a count is a primary key or prefix
+lookup instead of a GROUP BY over the whole table.
+A recount reads the counted table with a shared lock (MySQL), so the
+writes to the rows it counts wait for it instead of being lost.
+"""
+
+from peewee import EXCLUDED, MySQLDatabase, chunked, fn
+from database import GroupCountModel, database, group_count_queries
+from repositories.batch import ID_CHUNK_SIZE
+
+def upsert_totals(query):
+    """
+    Makes an insert of group rows add its totals to the rows that already
+    exist (`ON DUPLICATE KEY UPDATE` in MySQL, `ON CONFLICT` elsewhere).
+    """
+    total = GroupCountModel.total
+    if isinstance(database, MySQLDatabase):
+        return query.on_conflict(update={total: total + fn.VALUES(total)})
+    return query.on_conflict(conflict_target=[GroupCountModel.statistic,
+                                              GroupCountModel.group_key],
+                             update={total: total + EXCLUDED.total})
+
+class GroupCounter:
+    """
+    Reads and changes the counts of one statistic.
+    """
+
+    def __init__(self, statistic, parse=str):
+        self.statistic = statistic
+        # Conversión de la clave guardada como texto al tipo del grupo
+        self.parse = parse
+
+    def add(self, changes):
+        """
+        Adds to the count of each group its change. Call it inside the
+        transaction of the write.
+
+        :param changes: Dict group -> number of rows added (negative if removed).
+        """
+        rows = [{"statistic": self.statistic, "group_key": group, "total": change}
+                for group, change in sorted((str(group), change)
+                                            for group, change in changes.items() if change)]
+        # Filas en orden de clave: dos escrituras nunca se bloquean en orden inverso
+        for batch in chunked(rows, ID_CHUNK_SIZE):
+            upsert_totals(GroupCountModel.insert_many(batch)).execute()
+
+    def move(self, old_group, new_group):
+        """
+        Moves one row from `old_group` to `new_group`, if they differ.
+        """
+        if old_group != new_group:
+            self.add({old_group: -1, new_group: 1})
+
+    def get(self, group):
+        total = (GroupCountModel
+                 .select(GroupCountModel.total)
+                 .where((GroupCountModel.statistic == self.statistic)
+                        & (GroupCountModel.group_key == str(group)))
+                 .scalar())
+        return max(total or 0, 0)
+
+    def counts(self):
+        """
+        Returns the count of every group with rows.
+        """
+        query = (GroupCountModel
+                 .select(GroupCountModel.group_key, GroupCountModel.total)
+                 .where((GroupCountModel.statistic == self.statistic)
+                        & (GroupCountModel.total > 0)))
+        return {self.parse(group): total for group, total in query.tuples()}
+
+    def recount(self):
+        """
+        Counts the groups again with a GROUP BY over the counted table and
+        replaces the stored counts, dropping the groups left at 0.
+
+        :return: Dict with the number of groups and of groups whose count
+            differed from the recount.
+        """
+        with database.atomic():
+            query = group_count_queries()[self.statistic]
+            if database.for_update:
+                # Lectura con bloqueo compartido: las escrituras de las filas contadas esperan
+                query = query.for_update("FOR SHARE")
+            counts = {str(group): total for group, total in query.tuples()}
+            stored = {str(group): total for group, total in self.counts().items()}
+            corrected = sum(1 for group in counts.keys() | stored.keys()
+                            if counts.get(group) != stored.get(group))
+            (GroupCountModel
+             .delete()
+             .where(GroupCountModel.statistic == self.statistic)
+             .execute())
+            rows = [{"statistic": self.statistic, "group_key": group, "total": total}
+                    for group, total in counts.items()]
+            for batch in chunked(rows, ID_CHUNK_SIZE):
+                GroupCountModel.insert_many(batch).execute()
+        return {"groups": len(counts), "corrected": corrected}
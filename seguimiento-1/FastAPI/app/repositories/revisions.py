@@ -0,0 +1,62 @@
+"""
+Collection revisions for the peewee repositories.
+
+The revision of a table is kept in REVISION_SHARDS rows of the `revisions`
+table (RevisionModel). A write increases, together with the time of the
+write, the counters of the shards of the ids it changed (id %
+REVISION_SHARDS), in the same transaction as the insert, update or delete.
+Writers of ids in different shards never wait for each other, and the
+revision read by a list request (the sum of the counters, a primary key
+range of REVISION_SHARDS rows shared by every worker) changes on every
+committed write, including a delete followed by an insert of the same id.
+"""
+
+import time
+from peewee import fn
+from database import REVISION_SHARDS, RevisionModel, revision_names
+
+class RevisionTracker:
+    """
+    Reads and increases the sharded revision counter of a table.
+    """
+
+    def __init__(self, model):
+        self.names = revision_names(model._meta.table_name)  # pylint: disable=protected-access
+
+    def revision(self):
+        """
+        Returns the current revision of the table and the time it changed.
+
+        :return: Tuple (revision, last_modified).
+        """
+        revision, modified_at = (RevisionModel
+                                 .select(fn.SUM(RevisionModel.revision),
+                                         fn.MAX(RevisionModel.modified_at))
+                                 .where(RevisionModel.name.in_(self.names))
+                                 .tuples()
+                                 .get())
+        return str(int(revision or 0)), modified_at
+
+    def last_modified(self):
+        """
+        Returns the time of the last write to the table, or None.
+        """
+        return (RevisionModel
+                .select(fn.MAX(RevisionModel.modified_at))
+                .where(RevisionModel.name.in_(self.names))
+                .scalar())
+
+    def bump(self, ids):
+        """
+        Increases the revision of the shards of `ids`. Call it inside the
+        transaction of the write, as its last statement.
+
+        :param ids: The ids written.
+        """
+        # Un solo UPDATE: bloquea los shards en el orden de la clave primaria
+        names = sorted({self.names[record_id % REVISION_SHARDS] for record_id in ids})
+        if names:
+            (RevisionModel
+             .update(revision=RevisionModel.revision + 1, modified_at=time.time())
+             .where(RevisionModel.name.in_(names))
+             .execute())
@@ -0,0 +1,56 @@
+"""
+Versions of the deleted records for the peewee repositories.
+
+A delete stores the version each record had in the `tombstones` table
+(TombstoneModel), in the same transaction. Inserting a record with the id
+of a deleted one gives it the next version instead of 1, so versions never
+go back: an ETag read before the delete does not match the new record, for
+If-Match or If-None-Match.
+"""
+
+from peewee import chunked
+from database import TombstoneModel
+from repositories.batch import ID_CHUNK_SIZE
+
+class Tombstones:
+    """
+    Keeps the last version of the deleted records of one table.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.entity = model._meta.table_name  # pylint: disable=protected-access
+
+    def bury(self, versions):
+        """
+        Stores the version of each deleted record. Call it inside the
+        transaction of the delete.
+
+        :param versions: Dict id -> version of the deleted record.
+        """
+        rows = [{"entity": self.entity, "record_id": record_id, "version": version}
+                for record_id, version in sorted(versions.items())]
+        for batch in chunked(rows, ID_CHUNK_SIZE):
+            TombstoneModel.replace_many(batch).execute()
+
+    def resume(self, ids):
+        """
+        Gives the records just inserted with `ids` that were deleted before
+        the version after the one they had. Call it inside the transaction
+        of the insert, after it: the insert waits for a delete of the same id
+        to commit, so its tombstone is already visible.
+
+        :param ids: The ids inserted.
+        :return: Dict id -> new version, only for the ids deleted before.
+        """
+        versions = {}
+        for batch in chunked(sorted(ids), ID_CHUNK_SIZE):
+            query = (TombstoneModel
+                     .select(TombstoneModel.record_id, TombstoneModel.version)
+                     .where((TombstoneModel.entity == self.entity)
+                            & TombstoneModel.record_id.in_(batch)))
+            versions.update((record_id, version + 1) for record_id, version in query.tuples())
+        # Pocos ids vuelven a crearse: una actualización por id
+        for record_id, version in versions.items():
+            self.model.update(version=version).where(self.model.id == record_id).execute()
+        return versions
@@ -4,73 +4,222 @@ Routes module for managing CRUD operations for the Author entity.
 This module provides routes to create, read, update, and delete authors.
 """
 
-from fastapi import APIRouter, Body
+from functools import partial
+from fastapi import APIRouter, Body, Header, Query, Request, Response
+from helpers.batch import parse_ids
+from helpers.bulk_import import BULK_CHUNK_SIZE, MAX_BULK_CHUNK_SIZE, bulk_create
+from helpers.conditional import check_collection, check_item
+from helpers.export import export_response
+from helpers.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, paginate_by_id
+from helpers.responses import (AUTHOR_ADAPTER, AUTHOR_BATCH_ADAPTER, AUTHOR_LIST_ADAPTER,
+                               BOOK_LIST_ADAPTER, json_response)
+from helpers.versioning import parse_if_match, set_entity_tag
 from models.author import Author
-from services.author_service import AuthorService
+from services.instances import author_service, book_service
 
 
 author_router = APIRouter()
-author_service = AuthorService()
+
+AUTHOR_EXPORT_FIELDS = ("id", "name", "nationality", "version")
+DEFAULT_SUGGEST_LIMIT = 10
 
 @author_router.post("/author")
-def create_author(author: Author):
+def create_author(author: Author, response: Response):
     """
     Creates a new author and adds it to the system.
 
+    The version of the author is returned in the 'ETag' header.
+
     Args:
         author (Author): The author data to create.
 
     Returns:
         Author: The created author.
     """
-    return author_service.create_author(author)
+    created = author_service.create_author(author)
+    set_entity_tag(response, created)
+    return created
+
+@author_router.post("/bulk")
+async def create_authors_bulk(request: Request,
+                              chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1,
+                                                      le=MAX_BULK_CHUNK_SIZE)):
+    """
+    Creates many authors from a JSON array or an NDJSON body.
+
+    Args:
+        request (Request): Request whose body holds the authors.
+        chunk_size (int): Number of authors written per batch.
+
+    Returns:
+        dict: Counts of received, created and failed rows, and the errors.
+    """
+    return await bulk_create(request, Author, author_service.create_authors, chunk_size)
 
 @author_router.get("/author")
-def get_authors():
+def get_authors(response: Response,
+                limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+                cursor: str | None = None,
+                fetch_all: bool = Query(False, alias="all"),
+                nationality: str | None = None,
+                ids: str | None = None,
+                if_none_match: str | None = Header(None),
+                if_modified_since: str | None = Header(None)):
+    """
+    Retrieves one page of authors ordered by ID, optionally only those of
+    one nationality.
+
+    With 'ids', the authors with those IDs are looked up in a single pass
+    instead, and returned with the IDs that were not found.
+
+    The cursor of the next page is returned in the 'X-Next-Cursor' header.
+    The 'ETag' and 'Last-Modified' headers reflect the revision of the whole
+    collection; if the client's copy is current, an empty 304 is returned.
+
+    Args:
+        limit (int): Maximum number of authors in the page.
+        cursor (str): Cursor of the next page returned by a previous call.
+        fetch_all (bool): Return every author in one response instead ('all').
+        nationality (str): Return only the authors of this exact nationality.
+        ids (str): Comma-separated IDs of the authors to look up (at most 1000).
+        if_none_match (str): ETag of the client's copy ('If-None-Match').
+        if_modified_since (str): Date of the client's copy ('If-Modified-Since').
+
+    Returns:
+        List[Author]: The authors of the page, or, with 'ids', a dict with
+            the authors found in the requested order ('authors') and the IDs
+            not found ('missing').
+    """
+    not_modified = check_collection(response, author_service.get_authors_revision(),
+                                    if_none_match, if_modified_since)
+    if not_modified:
+        return not_modified
+    if ids is not None:
+        authors, missing = author_service.get_authors_by_ids(parse_ids(ids))
+        return json_response(AUTHOR_BATCH_ADAPTER, {"authors": authors, "missing": missing},
+                             response)
+    if fetch_all:
+        return json_response(AUTHOR_LIST_ADAPTER,
+                             author_service.get_all_authors(nationality), response)
+    authors = paginate_by_id(partial(author_service.get_authors_page, nationality=nationality),
+                             cursor, limit, response)
+    return json_response(AUTHOR_LIST_ADAPTER, authors, response)
+
+@author_router.get("/export")
+def export_authors(export_format: str = Query("ndjson", alias="format",
+                                              pattern="^(ndjson|csv)$")):
+    """
+    Streams every author as NDJSON or CSV.
+
+    Args:
+        export_format (str): 'ndjson' (default) or 'csv' ('format').
+
+    Returns:
+        StreamingResponse: The authors ordered by ID.
+    """
+    return export_response(author_service.iter_author_rows, AUTHOR_EXPORT_FIELDS,
+                           export_format, "authors")
+
+@author_router.get("/suggest")
+def suggest_authors(prefix: str = Query(..., min_length=1, max_length=100),
+                    limit: int = Query(DEFAULT_SUGGEST_LIMIT, ge=1, le=MAX_PAGE_LIMIT)):
+    """
+    Suggests the authors whose name starts with a prefix, for type-ahead.
+
+    Matching ignores case and accents.
+
+    Args:
+        prefix (str): The beginning of the name.
+        limit (int): Maximum number of authors returned.
+
+    Returns:
+        List[Author]: The matching authors, in name order.
+    """
+    return json_response(AUTHOR_LIST_ADAPTER, author_service.suggest_authors(prefix, limit))
+
+@author_router.get("/cache")
+def get_author_cache_statistics():
     """
-    Retrieves all authors in the system.
+    Reports the usage of the author cache.
 
     Returns:
-        List[Author]: A list of all authors.
+        dict: Cache size and limits, and hit, miss, eviction and expiration counts.
     """
-    return author_service.get_all_authors()
+    return author_service.cache_statistics()
 
 @author_router.get("/author/{author_id}")
-def get_author(author_id: int):
+def get_author(author_id: int, response: Response,
+               if_none_match: str | None = Header(None),
+               if_modified_since: str | None = Header(None)):
     """
     Retrieves an author by their ID.
 
+    The version of the author is returned in the 'ETag' header; if the client's
+    copy is current, an empty 304 is returned.
+
     Args:
         author_id (int): The ID of the author to retrieve.
+        if_none_match (str): ETag of the client's copy ('If-None-Match').
+        if_modified_since (str): Date of the client's copy ('If-Modified-Since').
 
     Returns:
         Author: The author with the given ID, or None if not found.
     """
-    return author_service.get_author_by_id(author_id)
+    last_modified = author_service.get_authors_last_modified()
+    author = author_service.get_author_by_id(author_id)
+    not_modified = check_item(response, author, last_modified,
+                              if_none_match, if_modified_since)
+    if not_modified:
+        return not_modified
+    return json_response(AUTHOR_ADAPTER, author, response)
+
+@author_router.get("/author/{author_id}/books")
+def get_author_books(author_id: int):
+    """
+    Retrieves all books written by an author.
+
+    Args:
+        author_id (int): The ID of the author whose books are retrieved.
+
+    Returns:
+        List[Book]: The books of the author, ordered by ID.
+    """
+    return json_response(BOOK_LIST_ADAPTER, book_service.get_books_by_author(author_id))
 
 @author_router.put("/author/{author_id}")
-def update_author(author_id: int, author: Author):
+def update_author(author_id: int, author: Author, response: Response,
+                  if_match: str | None = Header(None)):
     """
     Updates an existing author with new data.
 
+    With an 'If-Match' header the update is applied only if the author still
+    has the version of that ETag; otherwise a 412 is returned.
+
     Args:
         author_id (int): The ID of the author to update.
         author (Author): The updated author data.
+        if_match (str): ETag of the version the client read ('If-Match').
 
     Returns:
-        Author: The updated author.
+        Author: The updated author, with its new version in the 'ETag' header.
     """
-    return author_service.update_author(author_id, author)
+    updated = author_service.update_author(author_id, author, parse_if_match(if_match))
+    set_entity_tag(response, updated)
+    return updated
 
 @author_router.delete("/author/{author_id}")
-def delete_author(author_id: int):
+def delete_author(author_id: int, if_match: str | None = Header(None)):
     """
-    Deletes an author from the system by their ID.
+    Deletes an author from the system by their ID, along with their books.
+
+    With an 'If-Match' header the author is deleted only if it still has the
+    version of that ETag; otherwise a 412 is returned.
 
     Args:
         author_id (int): The ID of the author to delete.
+        if_match (str): ETag of the version the client read ('If-Match').
 
     Returns:
         None: The author is deleted if found.
     """
-    return author_service.delete_author(author_id)
+    return author_service.delete_author(author_id, parse_if_match(if_match))
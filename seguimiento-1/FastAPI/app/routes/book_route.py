@@ -4,72 +4,246 @@ Routes module for managing CRUD operations for the Book entity.
 This module provides routes to create, read, update, and delete books.
 """
 
-from fastapi import APIRouter
+from datetime import date
+from functools import partial
+from fastapi import APIRouter, Header, Query, Request, Response
+from helpers.batch import parse_ids
+from helpers.bulk_import import BULK_CHUNK_SIZE, MAX_BULK_CHUNK_SIZE, bulk_create
+from helpers.conditional import check_collection, check_item
+from helpers.export import export_response
+from helpers.pagination import (DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, paginate_by_date,
+                                paginate_by_id)
+from helpers.responses import (BOOK_ADAPTER, BOOK_BATCH_ADAPTER, BOOK_LIST_ADAPTER,
+                               json_response)
+from helpers.versioning import parse_if_match, set_entity_tag
 from models.book import Book
-from services.book_service import BookService
+from services.instances import book_service
 
 book_router = APIRouter()
-book_service = BookService()
+
+BOOK_EXPORT_FIELDS = ("id", "title", "author_id", "publication_date", "version")
+DEFAULT_SEARCH_LIMIT = 20
+DEFAULT_SUGGEST_LIMIT = 10
 
 @book_router.post("/book")
-def create_book(book: Book):
+def create_book(book: Book, response: Response):
     """
     Creates a new book and adds it to the system.
 
+    The version of the book is returned in the 'ETag' header.
+
     Args:
         book (Book): The book data to create.
 
     Returns:
         Book: The created book.
     """
-    return book_service.create_book(book)
+    created = book_service.create_book(book)
+    set_entity_tag(response, created)
+    return created
+
+@book_router.post("/bulk")
+async def create_books_bulk(request: Request,
+                            chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1,
+                                                    le=MAX_BULK_CHUNK_SIZE)):
+    """
+    Creates many books from a JSON array or an NDJSON body.
+
+    Args:
+        request (Request): Request whose body holds the books.
+        chunk_size (int): Number of books written per batch.
+
+    Returns:
+        dict: Counts of received, created and failed rows, and the errors.
+    """
+    return await bulk_create(request, Book, book_service.create_books, chunk_size)
 
 @book_router.get("/book")
-def get_books():
+def get_books(response: Response,
+              limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+              cursor: str | None = None,
+              fetch_all: bool = Query(False, alias="all"),
+              published_from: date | None = None,
+              published_to: date | None = None,
+              order: str | None = Query(None, pattern="^(asc|desc)$"),
+              ids: str | None = None,
+              if_none_match: str | None = Header(None),
+              if_modified_since: str | None = Header(None)):
+    """
+    Retrieves one page of books ordered by ID, or by publication date.
+
+    With 'published_from', 'published_to' or 'order', only the books
+    published in that range (both dates included) are listed, ordered by
+    publication date and ID, oldest first unless 'order' is 'desc';
+    'order=desc' alone lists the latest books.
+
+    With 'ids', the books with those IDs are looked up in a single pass
+    instead, and returned with the IDs that were not found.
+
+    The cursor of the next page is returned in the 'X-Next-Cursor' header.
+    The 'ETag' and 'Last-Modified' headers reflect the revision of the whole
+    collection; if the client's copy is current, an empty 304 is returned.
+
+    Args:
+        limit (int): Maximum number of books in the page.
+        cursor (str): Cursor of the next page returned by a previous call.
+        fetch_all (bool): Return every book in one response instead ('all').
+        published_from (date): Only books published on or after this date.
+        published_to (date): Only books published on or before this date.
+        order (str): 'asc' or 'desc' by publication date.
+        ids (str): Comma-separated IDs of the books to look up (at most 1000).
+        if_none_match (str): ETag of the client's copy ('If-None-Match').
+        if_modified_since (str): Date of the client's copy ('If-Modified-Since').
+
+    Returns:
+        List[Book]: The books of the page, or, with 'ids', a dict with the
+            books found in the requested order ('books') and the IDs not
+            found ('missing').
+    """
+    not_modified = check_collection(response, book_service.get_books_revision(),
+                                    if_none_match, if_modified_since)
+    if not_modified:
+        return not_modified
+    if ids is not None:
+        books, missing = book_service.get_books_by_ids(parse_ids(ids))
+        return json_response(BOOK_BATCH_ADAPTER, {"books": books, "missing": missing},
+                             response)
+    if published_from or published_to or order:
+        fetch_page = partial(book_service.get_books_by_date, published_from, published_to,
+                             order == "desc")
+        if fetch_all:
+            return json_response(BOOK_LIST_ADAPTER, fetch_page(None, None), response)
+        books = paginate_by_date(fetch_page, cursor, limit, response)
+        return json_response(BOOK_LIST_ADAPTER, books, response)
+    if fetch_all:
+        return json_response(BOOK_LIST_ADAPTER, book_service.get_all_books(), response)
+    books = paginate_by_id(book_service.get_books_page, cursor, limit, response)
+    return json_response(BOOK_LIST_ADAPTER, books, response)
+
+@book_router.get("/export")
+def export_books(export_format: str = Query("ndjson", alias="format",
+                                            pattern="^(ndjson|csv)$")):
     """
-    Retrieves all books in the system.
+    Streams every book as NDJSON or CSV.
+
+    Args:
+        export_format (str): 'ndjson' (default) or 'csv' ('format').
 
     Returns:
-        List[Book]: A list of all books.
+        StreamingResponse: The books ordered by ID.
     """
-    return book_service.get_all_books()
+    return export_response(book_service.iter_book_rows, BOOK_EXPORT_FIELDS,
+                           export_format, "books")
+
+@book_router.get("/search")
+def search_books(q: str = Query(..., min_length=1, max_length=200),
+                 limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_PAGE_LIMIT)):
+    """
+    Searches the books by the words of their title.
+
+    Matching ignores case and accents and common words such as 'de' or
+    'the'. A book matches if its title contains every word of the query,
+    and the matches are ranked by relevance: BM25 with the in-memory
+    backend, and the relevance of MySQL's FULLTEXT index, then the ID,
+    with the database backend. Words of one or two letters are not in that
+    index; a query made only of them is ordered by ID.
+
+    Args:
+        q (str): The words to search for.
+        limit (int): Maximum number of books returned.
+
+    Returns:
+        List[Book]: The matching books, best first.
+    """
+    return json_response(BOOK_LIST_ADAPTER, book_service.search_books(q, limit))
+
+@book_router.get("/suggest")
+def suggest_books(prefix: str = Query(..., min_length=1, max_length=200),
+                  limit: int = Query(DEFAULT_SUGGEST_LIMIT, ge=1, le=MAX_PAGE_LIMIT)):
+    """
+    Suggests the books whose title starts with a prefix, for type-ahead.
+
+    Matching ignores case and accents.
+
+    Args:
+        prefix (str): The beginning of the title.
+        limit (int): Maximum number of books returned.
+
+    Returns:
+        List[Book]: The matching books, in title order.
+    """
+    return json_response(BOOK_LIST_ADAPTER, book_service.suggest_books(prefix, limit))
+
+@book_router.get("/cache")
+def get_book_cache_statistics():
+    """
+    Reports the usage of the book cache.
+
+    Returns:
+        dict: Cache size and limits, and hit, miss, eviction and expiration counts.
+    """
+    return book_service.cache_statistics()
 
 @book_router.get("/book/{book_id}")
-def get_book(book_id: int):
+def get_book(book_id: int, response: Response,
+             if_none_match: str | None = Header(None),
+             if_modified_since: str | None = Header(None)):
     """
     Retrieves a book by its ID.
 
+    The version of the book is returned in the 'ETag' header; if the client's
+    copy is current, an empty 304 is returned.
+
     Args:
         book_id (int): The ID of the book to retrieve.
+        if_none_match (str): ETag of the client's copy ('If-None-Match').
+        if_modified_since (str): Date of the client's copy ('If-Modified-Since').
 
     Returns:
         Book: The book with the given ID, or None if not found.
     """
-    return book_service.get_book_by_id(book_id)
+    last_modified = book_service.get_books_last_modified()
+    book = book_service.get_book_by_id(book_id)
+    not_modified = check_item(response, book, last_modified,
+                              if_none_match, if_modified_since)
+    if not_modified:
+        return not_modified
+    return json_response(BOOK_ADAPTER, book, response)
 
 @book_router.put("/book/{book_id}")
-def update_book(book_id: int, book: Book):
+def update_book(book_id: int, book: Book, response: Response,
+                if_match: str | None = Header(None)):
     """
     Updates an existing book with new data.
 
+    With an 'If-Match' header the update is applied only if the book still
+    has the version of that ETag; otherwise a 412 is returned.
+
     Args:
         book_id (int): The ID of the book to update.
         book (Book): The updated book data.
+        if_match (str): ETag of the version the client read ('If-Match').
 
     Returns:
-        Book: The updated book.
+        Book: The updated book, with its new version in the 'ETag' header.
     """
-    return book_service.update_book(book_id, book)
+    updated = book_service.update_book(book_id, book, parse_if_match(if_match))
+    set_entity_tag(response, updated)
+    return updated
 
 @book_router.delete("/book/{book_id}")
-def delete_book(book_id: int):
+def delete_book(book_id: int, if_match: str | None = Header(None)):
     """
     Deletes a book from the system by its ID.
 
+    With an 'If-Match' header the book is deleted only if it still has the
+    version of that ETag; otherwise a 412 is returned.
+
     Args:
         book_id (int): The ID of the book to delete.
+        if_match (str): ETag of the version the client read ('If-Match').
 
     Returns:
         None: The book is deleted if found.
     """
-    return book_service.delete_book(book_id)
+    return book_service.delete_book(book_id, parse_if_match(if_match))
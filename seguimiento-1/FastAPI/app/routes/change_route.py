@@ -0,0 +1,79 @@
+"""
+Routes module for the incremental change feed.
+
+This module lets clients synchronize by fetching only the books and
+authors created, updated or deleted since the last change they applied,
+or by subscribing to a Server-Sent Events stream of the changes.
+"""
+
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from helpers.event_stream import (EVENT_KEEP_ALIVE_SECONDS, EVENT_STREAM_HEADERS,
+                                  EVENT_STREAM_MEDIA_TYPE, stream_changes)
+from helpers.pagination import DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from services.instances import change_broker, change_log
+
+change_router = APIRouter()
+
+@change_router.get("")
+def get_changes(since: int,
+                limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT)):
+    """
+    Retrieves the changes made after a sequence number, oldest first.
+
+    Each change has its sequence number ('seq'), the entity ('book' or
+    'author'), the operation ('create', 'update' or 'delete'), the record
+    id and, except for deletes, the record after the change ('data').
+    When 'resync_required' is true the changes after 'since' are no longer
+    retained: the client must reload the full lists and continue from the
+    returned 'last_seq'.
+
+    Args:
+        since (int): Sequence number of the last change already applied.
+        limit (int): Maximum number of changes returned.
+
+    Returns:
+        dict: The changes, the last sequence number of the log and the
+            resync flag.
+    """
+    changes, last_seq, resync_required = change_log.since(since, limit)
+    return {
+        "changes": changes,
+        "last_seq": last_seq,
+        "has_more": bool(changes) and changes[-1]["seq"] < last_seq,
+        "resync_required": resync_required,
+    }
+
+@change_router.get("/stream")
+async def stream_change_events(last_event_id: str | None = Header(None)):
+    """
+    Streams the changes as Server-Sent Events.
+
+    The stream starts with a 'ready' event holding the current sequence
+    number, followed by a 'change' event per change (same fields as
+    GET /changes). A client that reconnects with 'Last-Event-ID' first
+    receives the changes it missed. A 'resync' event ends the stream when
+    the client fell too far behind.
+
+    Args:
+        last_event_id (str): Id of the last event received ('Last-Event-ID').
+
+    Returns:
+        StreamingResponse: The 'text/event-stream' response.
+    """
+    return StreamingResponse(
+        stream_changes(change_broker, change_log, last_event_id, EVENT_KEEP_ALIVE_SECONDS),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers=EVENT_STREAM_HEADERS,
+    )
+
+@change_router.get("/log")
+def get_change_log_statistics():
+    """
+    Reports the size and position of the change log and the stream subscribers.
+
+    Returns:
+        dict: Retention limit, retained changes, last sequence number and
+            the number of subscribers.
+    """
+    return {**change_log.statistics(), **change_broker.statistics()}
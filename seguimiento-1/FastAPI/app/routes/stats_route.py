@@ -0,0 +1,63 @@
+"""
+Routes module for the aggregate statistics of the catalog.
+
+This module reports the number of books per author and per publication
+year and the number of authors per nationality. Every write keeps the
+counts up to date (in the services with the memory backend, in the
+group_counts table within the write's transaction with the database
+backend), so a read does not scan the catalog; a recount verifies and
+repairs them.
+"""
+
+from fastapi import APIRouter
+from services.instances import author_service, book_service
+
+stats_router = APIRouter()
+
+@stats_router.get("/books/by-author")
+def count_books_by_author(author_id: int | None = None):
+    """
+    Reports the number of books of each author.
+
+    Args:
+        author_id (int): Report only this author (0 books if it has none).
+
+    Returns:
+        dict: Author ID -> number of books, for the authors with books.
+    """
+    return book_service.count_books_by_author(author_id)
+
+@stats_router.get("/books/by-year")
+def count_books_by_year():
+    """
+    Reports the number of books published each year.
+
+    Returns:
+        dict: Year -> number of books published that year.
+    """
+    return book_service.count_books_by_year()
+
+@stats_router.get("/authors/by-nationality")
+def count_authors_by_nationality():
+    """
+    Reports the number of authors of each nationality.
+
+    Returns:
+        dict: Nationality -> number of authors.
+    """
+    return author_service.count_authors_by_nationality()
+
+@stats_router.post("/recount")
+def recount_statistics():
+    """
+    Recounts every statistic from the stored books and authors.
+
+    Meant for administrators verifying the incremental counts: each count
+    is replaced by the recount. With the memory backend the writes go on
+    while it counts; the database backend blocks them meanwhile.
+
+    Returns:
+        dict: For each statistic, the number of groups and of groups whose
+            count was corrected (0 when the counts were right).
+    """
+    return {**book_service.recount_statistics(), **author_service.recount_statistics()}
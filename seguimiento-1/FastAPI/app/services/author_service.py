@@ -1,28 +1,242 @@
+from collections import Counter
 from peewee import DoesNotExist, IntegrityError
 from fastapi import Body, HTTPException
 from models.author import Author
 from database import AuthorModel
+from helpers.versioning import precondition_failed
+from repositories.errors import conflict_error
+from services.change_log import CREATE, DELETE, UPDATE
+from services.memory_store import MemoryStore
+from services.prefix_index import PrefixIndex
+from services.sorted_keys import SortedKeys
+from services.string_dictionary import StringDictionary
+from services.tally import Tally
 
 class AuthorService:
-    def __init__(self):
-        self.authors = []
+    def __init__(self, book_service, change_log=None):
+        # Almacén indexado por id: búsqueda, actualización y borrado en O(1)
+        # conservando el orden de inserción para el listado.
+        self.authors = MemoryStore()
+        # Servicio de libros para replicar el ON DELETE CASCADE de BookModel
+        self.book_service = book_service
+        # Los escritores se serializan con el cerrojo del almacén
+        self.lock = self.authors.lock
+        # Registro de cambios opcional, escrito dentro del cerrojo para conservar el orden
+        self.change_log = change_log
+        # Codificación por diccionario de la nacionalidad: pocos valores
+        # distintos, compartidos por todos los autores que los usan
+        self.nationalities = StringDictionary()
+        # Índice secundario código de nacionalidad -> ids ordenados. Cada
+        # nacionalidad es un SortedKeys: altas y bajas solo copian una
+        # sublista y los lectores lo recorren sin bloqueo.
+        self.authors_by_nationality = {}
+        # Nombres normalizados y ordenados para las sugerencias por prefijo
+        self.name_index = PrefixIndex()
+        # Conteo de /stats actualizado en cada escritura
+        self.authors_per_nationality = Tally()
+        # Última versión de cada id borrado: al volver a crearlo la versión
+        # sigue creciendo y una ETag anterior al borrado ya no coincide
+        self.deleted_versions = {}
 
     def create_author(self, author):
-        self.authors.append(author)
-        return author
+        with self.lock:
+            self._check_new([author])
+            return self._store(author)
+
+    def create_authors(self, authors):
+        with self.lock:
+            # Como el INSERT de la base de datos: un id existente rechaza el lote entero
+            self._check_new(authors)
+            # Índices en bloque: una sola inserción por nacionalidad y en el índice de nombres
+            self._index_many([self._store(author, indexed=False) for author in authors])
+        return len(authors)
+
+    def get_all_authors(self, nationality=None):
+        if nationality is None:
+            return list(self.authors.values())
+        return self.get_authors_page(None, None, nationality)
+
+    def get_authors_page(self, after_id, limit, nationality=None):
+        if nationality is None:
+            return self.authors.page(after_id, limit)
+        code = self.nationalities.lookup(nationality)
+        if code is None:
+            return []
+        author_ids = self.authors_by_nationality.get(code)
+        if author_ids is None:
+            return []
+        # Un autor cambiado durante la lectura puede seguir en el índice leído
+        return self.authors.page(after_id, limit, author_ids.ascending(after_id),
+                                 lambda author: author.nationality == nationality)
+
+    def suggest_authors(self, prefix, limit):
+        authors = (self.authors.get(author_id)
+                   for author_id in self.name_index.suggest(prefix, limit))
+        return [author for author in authors if author is not None]
+
+    def count_authors_by_nationality(self):
+        return self.authors_per_nationality.snapshot()
 
-    def get_all_authors(self):
-        return self.authors
+    def recount_statistics(self):
+        # Bajo el cerrojo solo la instantánea: el recuento no frena las escrituras
+        with self.lock:
+            nationalities = self.authors.rows_snapshot(("nationality",))
+            changes = self.authors_per_nationality.track()
+        counts = dict(Counter(nationalities))
+        with self.lock:
+            return {"authors_per_nationality": self.authors_per_nationality.replace(
+                counts, changes)}
+
+    def iter_author_rows(self, batch_size):
+        for batch in self.authors.iter_batches(batch_size):
+            yield [(author.id, author.name, author.nationality, author.version)
+                   for author in batch]
+
+    def get_authors_revision(self):
+        return self.authors.revision()
+
+    def get_authors_last_modified(self):
+        return self.authors.last_modified()
 
     def get_author_by_id(self, author_id):
-        return next((a for a in self.authors if a.id == author_id), None)
+        return self.authors.get(author_id)
 
-    def update_author(self, author_id, author_data):
-        author = self.get_author_by_id(author_id)
-        if author:
-            author.name = author_data.name
-            author.nationality = author_data.nationality
+    def get_authors_by_ids(self, author_ids):
+        authors = self.authors.get_many(author_ids)
+        missing = [author_id for author_id, author in zip(author_ids, authors) if author is None]
+        return [author for author in authors if author is not None], missing
+
+    def update_author(self, author_id, author_data, expected_versions=None):
+        with self.lock:
+            author = self.get_author_by_id(author_id)
+            # Compare-and-swap: la versión leída por el cliente debe seguir vigente
+            if expected_versions is not None and (
+                    author is None or author.version not in expected_versions):
+                raise precondition_failed()
+            if author:
+                # Copia en escritura: el objeto compartido nunca se modifica
+                updated = author.model_copy(update={
+                    "name": author_data.name,
+                    "nationality": self.nationalities.intern(author_data.nationality),
+                    "version": author.version + 1,
+                })
+                self.authors.put(updated)
+                # Cada índice solo se toca si cambia el campo que ordena
+                if author.nationality != updated.nationality:
+                    self._unindex(author, text=False)
+                    self._index(updated, text=False)
+                self.name_index.replace(author_id, author.name, updated.name)
+                author = updated
+                self._log(UPDATE, author_id, author)
         return author
 
-    def delete_author(self, author_id):
-        self.authors = [a for a in self.authors if a.id != author_id]
+    def delete_author(self, author_id, expected_versions=None):
+        # Orden fijo de cerrojos (autores y luego libros) para evitar interbloqueos
+        with self.lock:
+            if expected_versions is not None:
+                author = self.authors.get(author_id)
+                if author is None or author.version not in expected_versions:
+                    raise precondition_failed()
+            author = self.authors.pop(author_id)
+            if author:
+                self._unindex(author)
+                self.deleted_versions[author_id] = author.version
+                self._log(DELETE, author_id)
+            self.book_service.delete_books_by_author(author_id)
+
+    def restore_authors(self, authors):
+        # Recuperación desde disco: sin registro de cambios ni nuevas versiones
+        with self.lock:
+            interned = [self._intern(author) for author in authors]
+            latest = {author.id: author for author in interned}
+            if self.deleted_versions:
+                for author_id in latest:
+                    self.deleted_versions.pop(author_id, None)
+            previous = self.authors.get_many(list(latest))
+            self.authors.load(interned)
+            for author in previous:
+                if author:
+                    self._unindex(author)
+            self._index_many(latest.values())
+
+    def restore_author(self, author):
+        with self.lock:
+            self.deleted_versions.pop(author.id, None)
+            previous = self.authors.get(author.id)
+            author = self._intern(author)
+            self.authors.put(author)
+            if previous:
+                self._unindex(previous)
+            self._index(author)
+
+    def remove_author(self, author_id):
+        with self.lock:
+            author = self.authors.pop(author_id)
+            if author:
+                self._unindex(author)
+                self.deleted_versions[author_id] = author.version
+
+    def _log(self, operation, author_id, author=None):
+        if self.change_log is not None:
+            self.change_log.append("author", operation, author_id, author)
+
+    def _check_new(self, authors):
+        author_ids = set()
+        for author in authors:
+            if author.id in author_ids or author.id in self.authors:
+                raise conflict_error(f"An author with id {author.id} already exists")
+            author_ids.add(author.id)
+
+    def _store(self, author, indexed=True):
+        # Un id borrado antes sigue con la versión siguiente a la última que tuvo
+        version = self.deleted_versions.pop(author.id, 0) + 1
+        update = {}
+        if author.version != version:
+            update["version"] = version
+        nationality = self.nationalities.intern(author.nationality)
+        if author.nationality is not nationality:
+            update["nationality"] = nationality
+        if update:
+            author = author.model_copy(update=update)
+        self.authors.put(author)
+        if indexed:
+            self._index(author)
+        self._log(CREATE, author.id, author)
+        return author
+
+    def _intern(self, author):
+        nationality = self.nationalities.intern(author.nationality)
+        if author.nationality is nationality:
+            return author
+        return author.model_copy(update={"nationality": nationality})
+
+    def _index(self, author, text=True):
+        code = self.nationalities.encode(author.nationality)
+        author_ids = self.authors_by_nationality.get(code)
+        if author_ids is None:
+            author_ids = self.authors_by_nationality[code] = SortedKeys()
+        author_ids.add(author.id)
+        self.authors_per_nationality.increment(author.nationality)
+        if text:
+            self.name_index.add(author.id, author.name)
+
+    def _index_many(self, authors):
+        added = {}
+        for author in authors:
+            added.setdefault(self.nationalities.encode(author.nationality), []).append(author.id)
+            self.authors_per_nationality.increment(author.nationality)
+        for code, author_ids in added.items():
+            self.authors_by_nationality.setdefault(code, SortedKeys()).add_many(author_ids)
+        self.name_index.add_many((author.id, author.name) for author in authors)
+
+    def _unindex(self, author, text=True):
+        if text:
+            self.name_index.remove(author.id, author.name)
+        self.authors_per_nationality.decrement(author.nationality)
+        code = self.nationalities.lookup(author.nationality)
+        author_ids = self.authors_by_nationality.get(code)
+        if author_ids is None:
+            return
+        author_ids.remove(author.id)
+        if not author_ids:
+            del self.authors_by_nationality[code]
@@ -1,29 +1,269 @@
+from collections import Counter
 from peewee import DoesNotExist, IntegrityError
 from fastapi import Body, HTTPException
 from models.book import Book
 from database import BookModel
+from helpers.versioning import precondition_failed
+from repositories.errors import conflict_error
+from services.change_log import CREATE, DELETE, UPDATE
+from services.date_index import DateIndex
+from services.memory_store import MemoryStore
+from services.prefix_index import PrefixIndex
+from services.search_index import SearchIndex
+from services.tally import Tally
+
+BOOK_ROW_FIELDS = tuple(Book.model_fields)
 
 class BookService:
-    def __init__(self):
-        self.books = []
+    def __init__(self, change_log=None, store=None):
+        # Almacén indexado por id: búsqueda, actualización y borrado en O(1)
+        # conservando el orden de inserción para el listado. Se puede pasar
+        # otro con la misma interfaz, como el columnar (ColumnarBookStore).
+        self.books = store if store is not None else MemoryStore()
+        # Índice secundario author_id -> ids de sus libros. Los conjuntos son
+        # inmutables y se reemplazan en cada escritura, así los lectores pueden
+        # recorrerlos sin bloqueo.
+        self.books_by_author = {}
+        # Índice ordenado (fecha de publicación, id) para los rangos de fechas
+        self.books_by_date = DateIndex()
+        # Índice invertido de los títulos para la búsqueda de texto completo
+        self.search_index = SearchIndex()
+        # Títulos normalizados y ordenados para las sugerencias por prefijo
+        self.title_index = PrefixIndex()
+        # Conteos de /stats actualizados en cada escritura
+        self.books_per_author = Tally()
+        self.books_per_year = Tally()
+        # Los escritores se serializan con el cerrojo del almacén
+        self.lock = self.books.lock
+        # Registro de cambios opcional, escrito dentro del cerrojo para conservar el orden
+        self.change_log = change_log
+        # Última versión de cada id borrado: al volver a crearlo la versión
+        # sigue creciendo y una ETag anterior al borrado ya no coincide
+        self.deleted_versions = {}
 
     def create_book(self, book):
-        self.books.append(book)
+        with self.lock:
+            self._check_new([book])
+            book = self._store(book)
+            self._index(book)
         return book
 
+    def create_books(self, books):
+        with self.lock:
+            # Como el INSERT de la base de datos: un id existente rechaza el lote entero
+            self._check_new(books)
+            stored = []
+            try:
+                for book in books:
+                    stored.append(self._store(book))
+            finally:
+                # Un solo reemplazo del conjunto de cada autor por lote; si un
+                # libro falla, los ya guardados quedan indexados igualmente
+                self._index_many(stored)
+        return len(books)
+
     def get_all_books(self):
-        return self.books
+        return list(self.books.values())
+
+    def get_books_page(self, after_id, limit):
+        return self.books.page(after_id, limit)
+
+    def iter_book_rows(self, batch_size):
+        return self.books.iter_rows(batch_size, BOOK_ROW_FIELDS)
+
+    def get_books_by_date(self, published_from, published_to, descending, after, limit):
+        book_ids = self.books_by_date.page(published_from, published_to, descending,
+                                           after, limit)
+        books = (self.books.get(book_id) for book_id in book_ids)
+        return [book for book in books if book is not None]
+
+    def count_books_by_author(self, author_id=None):
+        if author_id is None:
+            return self.books_per_author.snapshot()
+        return {author_id: self.books_per_author.get(author_id)}
+
+    def count_books_by_year(self):
+        return self.books_per_year.snapshot()
+
+    def recount_statistics(self):
+        # Bajo el cerrojo solo la instantánea: el recuento no frena las escrituras
+        with self.lock:
+            rows = self.books.rows_snapshot(("author_id", "publication_date"))
+            changes = self.books_per_author.track(), self.books_per_year.track()
+        by_author, by_year = Counter(), Counter()
+        for author_id, published in rows:
+            by_author[author_id] += 1
+            by_year[published.year] += 1
+        with self.lock:
+            return {
+                "books_per_author": self.books_per_author.replace(dict(by_author), changes[0]),
+                "books_per_year": self.books_per_year.replace(dict(by_year), changes[1]),
+            }
+
+    def get_books_revision(self):
+        return self.books.revision()
+
+    def get_books_last_modified(self):
+        return self.books.last_modified()
 
     def get_book_by_id(self, book_id):
-        return next((b for b in self.books if b.id == book_id), None)
-
-    def update_book(self, book_id, book_data):
-        book = self.get_book_by_id(book_id)
-        if book:
-            book.title = book_data.title
-            book.author_id = book_data.author_id
-            book.publication_date = book_data.publication_date
+        return self.books.get(book_id)
+
+    def get_books_by_ids(self, book_ids):
+        books = self.books.get_many(book_ids)
+        missing = [book_id for book_id, book in zip(book_ids, books) if book is None]
+        return [book for book in books if book is not None], missing
+
+    def search_books(self, query, limit):
+        hits = self.search_index.search(query, limit)
+        books = (self.books.get(book_id) for book_id, _ in hits)
+        return [book for book in books if book is not None]
+
+    def suggest_books(self, prefix, limit):
+        books = (self.books.get(book_id) for book_id in self.title_index.suggest(prefix, limit))
+        return [book for book in books if book is not None]
+
+    def get_books_by_author(self, author_id):
+        book_ids = self.books_by_author.get(author_id, ())
+        books = (self.books.get(book_id) for book_id in sorted(book_ids))
+        return [book for book in books if book is not None]
+
+    def update_book(self, book_id, book_data, expected_versions=None):
+        with self.lock:
+            book = self.get_book_by_id(book_id)
+            # Compare-and-swap: la versión leída por el cliente debe seguir vigente
+            if expected_versions is not None and (
+                    book is None or book.version not in expected_versions):
+                raise precondition_failed()
+            if book:
+                # Copia en escritura: el objeto compartido nunca se modifica
+                updated = book.model_copy(update={
+                    "title": book_data.title,
+                    "author_id": book_data.author_id,
+                    "publication_date": book_data.publication_date,
+                    "version": book.version + 1,
+                })
+                self.books.put(updated)
+                # Cada índice solo se toca si cambia el campo que ordena
+                if (book.author_id, book.publication_date) != (
+                        updated.author_id, updated.publication_date):
+                    self._unindex(book, text=False)
+                    self._index(updated, text=False)
+                self.search_index.replace(book_id, book.title, updated.title)
+                self.title_index.replace(book_id, book.title, updated.title)
+                book = updated
+                self._log(UPDATE, book_id, book)
         return book
 
-    def delete_book(self, book_id):
-        self.books = [b for b in self.books if b.id != book_id]
+    def delete_book(self, book_id, expected_versions=None):
+        with self.lock:
+            if expected_versions is not None:
+                book = self.books.get(book_id)
+                if book is None or book.version not in expected_versions:
+                    raise precondition_failed()
+            book = self.books.pop(book_id)
+            if book:
+                self._unindex(book)
+                self.deleted_versions[book_id] = book.version
+                self._log(DELETE, book_id)
+
+    def delete_books_by_author(self, author_id):
+        # Borrado en cascada: solo recorre los libros del autor
+        with self.lock:
+            for book_id in sorted(self.books_by_author.pop(author_id, ())):
+                book = self.books.pop(book_id)
+                if book:
+                    self._unindex(book)
+                    self.deleted_versions[book_id] = book.version
+                self._log(DELETE, book_id)
+
+    def restore_books(self, books):
+        # Recuperación desde disco: sin registro de cambios ni nuevas versiones
+        with self.lock:
+            latest = {book.id: book for book in books}
+            if self.deleted_versions:
+                for book_id in latest:
+                    self.deleted_versions.pop(book_id, None)
+            previous = self.books.get_many(list(latest))
+            self.books.load(books)
+            for book in previous:
+                if book:
+                    self._unindex(book)
+            self._index_many(latest.values())
+
+    def restore_book(self, book):
+        with self.lock:
+            self.deleted_versions.pop(book.id, None)
+            previous = self.books.get(book.id)
+            self.books.put(book)
+            if previous:
+                self._unindex(previous)
+            self._index(book)
+
+    def remove_book(self, book_id):
+        with self.lock:
+            book = self.books.pop(book_id)
+            if book:
+                self._unindex(book)
+                self.deleted_versions[book_id] = book.version
+
+    def _log(self, operation, book_id, book=None):
+        if self.change_log is not None:
+            self.change_log.append("book", operation, book_id, book)
+
+    def _check_new(self, books):
+        book_ids = set()
+        for book in books:
+            if book.id in book_ids or book.id in self.books:
+                raise conflict_error(f"A book with id {book.id} already exists")
+            book_ids.add(book.id)
+
+    def _store(self, book):
+        # Un id borrado antes sigue con la versión siguiente a la última que tuvo
+        version = self.deleted_versions.get(book.id, 0) + 1
+        if book.version != version:
+            book = book.model_copy(update={"version": version})
+        # Los índices solo se tocan si el almacén aceptó el libro
+        self.books.put(book)
+        if version > 1:
+            del self.deleted_versions[book.id]
+        self._log(CREATE, book.id, book)
+        return book
+
+    def _index(self, book, text=True):
+        book_ids = self.books_by_author.get(book.author_id, frozenset())
+        self.books_by_author[book.author_id] = book_ids | {book.id}
+        self.books_by_date.add(book)
+        self.books_per_author.increment(book.author_id)
+        self.books_per_year.increment(book.publication_date.year)
+        if text:
+            self.search_index.add(book.id, book.title)
+            self.title_index.add(book.id, book.title)
+
+    def _index_many(self, books):
+        added = {}
+        for book in books:
+            added.setdefault(book.author_id, set()).add(book.id)
+            self.books_per_year.increment(book.publication_date.year)
+            self.search_index.add(book.id, book.title)
+        self.title_index.add_many((book.id, book.title) for book in books)
+        self.books_by_date.add_many(books)
+        for author_id, book_ids in added.items():
+            current = self.books_by_author.get(author_id, frozenset())
+            self.books_by_author[author_id] = current | book_ids
+            self.books_per_author.increment(author_id, len(book_ids))
+
+    def _unindex(self, book, text=True):
+        if text:
+            self.search_index.remove(book.id, book.title)
+            self.title_index.remove(book.id, book.title)
+        self.books_by_date.remove(book)
+        self.books_per_author.decrement(book.author_id)
+        self.books_per_year.decrement(book.publication_date.year)
+        book_ids = self.books_by_author.get(book.author_id)
+        if book_ids is not None:
+            book_ids = book_ids - {book.id}
+            if book_ids:
+                self.books_by_author[book.author_id] = book_ids
+            else:
+                del self.books_by_author[book.author_id]
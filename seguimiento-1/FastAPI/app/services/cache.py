@@ -0,0 +1,97 @@
+"""
+Bounded read-through cache with LRU eviction and an optional TTL.
+
+Used in front of the book and author services so repeated GETs of the same
+id do not reach the storage backend. Writes invalidate the affected
+entries; an invalidation counter prevents a load that raced with a write
+from caching the value it read before the write.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Thread-safe LRU cache whose entries optionally expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_size, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl or None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.invalidations = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value of `key`, loading and caching it on a miss.
+
+        None values are not cached, so a later create is seen immediately.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+            invalidations = self.invalidations
+        value = loader(key)
+        if value is not None:
+            self._store(key, value, invalidations)
+        return value
+
+    def invalidate(self, key):
+        with self.lock:
+            self.invalidations += 1
+            self.entries.pop(key, None)
+
+    def invalidate_many(self, keys):
+        with self.lock:
+            self.invalidations += 1
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """
+        Drops every cached value for which `predicate(value)` is true.
+        """
+        with self.lock:
+            self.invalidations += 1
+            for key in [k for k, (value, _) in self.entries.items() if predicate(value)]:
+                del self.entries[key]
+
+    def statistics(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _store(self, key, value, invalidations):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            # Una escritura invalidó la caché mientras se cargaba el valor
+            if invalidations != self.invalidations:
+                return
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
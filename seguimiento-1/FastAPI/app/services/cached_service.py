@@ -0,0 +1,100 @@
+"""
+Read-through caching layer for the book and author services.
+
+The wrappers serve get-by-id from an LRUCache and invalidate the cached
+entries on every write. Any other method is delegated unchanged to the
+wrapped service or repository.
+"""
+
+class CachedBookService:
+    """
+    Book service (or repository) with a read-through cache of books by id.
+    """
+
+    def __init__(self, service, cache):
+        self.service = service
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.service, name)
+
+    def get_book_by_id(self, book_id):
+        return self.cache.get_or_load(book_id, self.service.get_book_by_id)
+
+    def create_book(self, book):
+        try:
+            return self.service.create_book(book)
+        finally:
+            self.cache.invalidate(book.id)
+
+    def create_books(self, books):
+        try:
+            return self.service.create_books(books)
+        finally:
+            self.cache.invalidate_many([book.id for book in books])
+
+    def update_book(self, book_id, book_data, expected_versions=None):
+        try:
+            return self.service.update_book(book_id, book_data, expected_versions)
+        finally:
+            self.cache.invalidate(book_id)
+
+    def delete_book(self, book_id, expected_versions=None):
+        try:
+            return self.service.delete_book(book_id, expected_versions)
+        finally:
+            self.cache.invalidate(book_id)
+
+    def invalidate_author(self, author_id):
+        """
+        Drops the cached books of an author after a cascading delete.
+        """
+        self.cache.invalidate_where(lambda book: book.author_id == author_id)
+
+    def cache_statistics(self):
+        return self.cache.statistics()
+
+class CachedAuthorService:
+    """
+    Author service (or repository) with a read-through cache of authors by id.
+    """
+
+    def __init__(self, service, cache, book_service):
+        self.service = service
+        self.cache = cache
+        # Servicio de libros cacheado, para invalidar los libros borrados en cascada
+        self.book_service = book_service
+
+    def __getattr__(self, name):
+        return getattr(self.service, name)
+
+    def get_author_by_id(self, author_id):
+        return self.cache.get_or_load(author_id, self.service.get_author_by_id)
+
+    def create_author(self, author):
+        try:
+            return self.service.create_author(author)
+        finally:
+            self.cache.invalidate(author.id)
+
+    def create_authors(self, authors):
+        try:
+            return self.service.create_authors(authors)
+        finally:
+            self.cache.invalidate_many([author.id for author in authors])
+
+    def update_author(self, author_id, author_data, expected_versions=None):
+        try:
+            return self.service.update_author(author_id, author_data, expected_versions)
+        finally:
+            self.cache.invalidate(author_id)
+
+    def delete_author(self, author_id, expected_versions=None):
+        try:
+            return self.service.delete_author(author_id, expected_versions)
+        finally:
+            self.cache.invalidate(author_id)
+            self.book_service.invalidate_author(author_id)
+
+    def cache_statistics(self):
+        return self.cache.statistics()
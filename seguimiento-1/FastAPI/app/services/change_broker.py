@@ -0,0 +1,117 @@
+"""
+Asyncio fan-out of the change log to the event stream subscribers.
+
+The change log calls the broker from the writer's thread; the broker only
+schedules the publication on the event loop, so writers never wait for
+subscribers. On the loop each change is encoded once and pushed to every
+subscription.
+
+Each subscription holds at most `max_pending` undelivered changes, keyed
+by record: a newer change to a record replaces the pending one, since it
+carries the record's latest state. A subscriber that falls so far behind
+that more than `max_pending` distinct records are pending is marked as
+overflowed and dropped; its stream tells the client to resync.
+"""
+
+import asyncio
+from collections import OrderedDict
+
+class Subscription:
+    """
+    Bounded, coalescing queue of encoded changes for one subscriber.
+
+    Only used from the event loop.
+    """
+
+    def __init__(self, max_pending):
+        self.pending = OrderedDict()
+        self.max_pending = max_pending
+        self.ready = asyncio.Event()
+        self.overflowed = False
+
+    def push(self, key, seq, payload):
+        if self.overflowed:
+            return
+        if key in self.pending:
+            # Coalescencia: solo importa el último estado del registro
+            del self.pending[key]
+        elif len(self.pending) >= self.max_pending:
+            self.overflowed = True
+            self.pending.clear()
+            self.ready.set()
+            return
+        self.pending[key] = (seq, payload)
+        self.ready.set()
+
+    async def get(self, timeout):
+        """
+        Waits up to `timeout` seconds and takes every pending change.
+
+        :return: List of (seq, payload) in sequence order; empty on timeout
+            or overflow.
+        """
+        if not self.pending and not self.overflowed:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self.ready.clear()
+        changes = list(self.pending.values())
+        self.pending.clear()
+        return changes
+
+class ChangeBroker:
+    """
+    Publishes every change of a ChangeLog to the active subscriptions.
+    """
+
+    def __init__(self, change_log, max_pending, encode):
+        self.change_log = change_log
+        self.max_pending = max_pending
+        self.encode = encode
+        self.subscriptions = set()
+        self.loop = None
+        change_log.add_listener(self._on_change)
+
+    def subscribe(self):
+        """
+        Creates a subscription; must be called from the event loop.
+
+        The subscription is registered while the change log is locked, so
+        every change after the returned sequence number reaches it.
+
+        :return: Tuple (subscription, last_seq of the change log).
+        """
+        subscription = Subscription(self.max_pending)
+        with self.change_log.lock:
+            self.loop = asyncio.get_running_loop()
+            self.subscriptions.add(subscription)
+            return subscription, self.change_log.last_seq
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+
+    def statistics(self):
+        return {
+            "subscribers": len(self.subscriptions),
+            "max_pending": self.max_pending,
+        }
+
+    def _on_change(self, entry):
+        # Hilo del escritor: solo se agenda la publicación en el bucle
+        loop = self.loop
+        if loop is None or not self.subscriptions:
+            return
+        try:
+            loop.call_soon_threadsafe(self._publish, entry)
+        except RuntimeError:
+            # El bucle ya se cerró (apagado del proceso)
+            self.loop = None
+
+    def _publish(self, entry):
+        if not self.subscriptions:
+            return
+        payload = self.encode(entry)
+        key = (entry["entity"], entry["id"])
+        for subscription in self.subscriptions:
+            subscription.push(key, entry["seq"], payload)
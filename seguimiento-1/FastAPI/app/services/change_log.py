@@ -0,0 +1,96 @@
+"""
+Bounded, sequence-numbered log of the writes applied to books and authors.
+
+The services and repositories append one change per created, updated or
+deleted record. Only the most recent `max_entries` changes are retained;
+a client asking for changes older than the retained window must resync
+from the full lists. Listeners registered with add_listener are called
+with every new change, in order, from the thread that made the write.
+
+Sequence numbers start at the time the process started, in microseconds,
+so a sequence number issued before a restart is always older than the
+retained window of the new process instead of silently matching one of
+its changes.
+"""
+
+from collections import deque
+from itertools import islice
+import threading
+import time
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+
+class ChangeLog:
+    """
+    Ring buffer of changes with monotonically increasing sequence numbers.
+    """
+
+    def __init__(self, max_entries):
+        self.entries = deque(maxlen=max_entries)
+        self.lock = threading.Lock()
+        self.first_seq = time.time_ns() // 1000
+        self.last_seq = self.first_seq
+        self.listeners = []
+
+    def add_listener(self, listener):
+        """
+        Registers a callable invoked with each change as it is appended.
+
+        The listener runs while the log is locked, so it must return quickly
+        (for example, by handing the change to an event loop).
+        """
+        self.listeners.append(listener)
+
+    def append(self, entity, operation, record_id, record=None):
+        """
+        Records a change and returns its sequence number.
+
+        :param entity: 'book' or 'author'.
+        :param operation: CREATE, UPDATE or DELETE.
+        :param record_id: Id of the changed record.
+        :param record: The record after the change (None for deletes).
+        :return: The sequence number of the change.
+        """
+        with self.lock:
+            self.last_seq += 1
+            entry = {
+                "seq": self.last_seq,
+                "entity": entity,
+                "operation": operation,
+                "id": record_id,
+                "data": record,
+            }
+            self.entries.append(entry)
+            for listener in self.listeners:
+                listener(entry)
+            return self.last_seq
+
+    def since(self, seq, limit):
+        """
+        Returns the changes after `seq`, oldest first.
+
+        :param seq: Last sequence number the client has applied.
+        :param limit: Maximum number of changes to return.
+        :return: Tuple (changes, last_seq, resync_required). resync_required
+            is True when changes after `seq` were already discarded (or
+            `seq` was not issued by this log); changes is empty then.
+        """
+        with self.lock:
+            last_seq = self.last_seq
+            oldest = self.entries[0]["seq"] if self.entries else last_seq + 1
+            if seq > last_seq or seq < oldest - 1:
+                return [], last_seq, True
+            # Los números de secuencia son consecutivos: la posición se calcula
+            start = seq + 1 - oldest
+            changes = list(islice(self.entries, start, start + limit))
+        return changes, last_seq, False
+
+    def statistics(self):
+        with self.lock:
+            return {
+                "max_entries": self.entries.maxlen,
+                "size": len(self.entries),
+                "last_seq": self.last_seq,
+            }
@@ -0,0 +1,284 @@
+"""
+Columnar, array-backed book store for large in-memory catalogs.
+
+A drop-in alternative to MemoryStore for BookService (BOOK_STORE=columnar)
+that keeps no Book objects. Every version of a book is a row appended to
+typed columns:
+- ids, author_ids and versions: `array("q")`
+- publication_dates: `array("i")` of day ordinals
+- titles: one UTF-8 `bytearray`, sliced with `array("q")` end offsets
+
+The id index is a pair of parallel sorted arrays (ids and rows). Lookups
+are a bisect; appending a greater id (the usual case) is amortized O(1).
+Updates point the index at the new row and deletes mark it with -1. The
+superseded rows are reclaimed in bulk once they outnumber the live ones.
+
+Book objects are only built for the records a read returns, a page at a
+time through a TypeAdapter, and the export and snapshot paths read the
+columns as tuples without building them at all.
+
+Writers are serialized with `lock`. Readers take no lock and rely on these
+invariants:
+- rows are append-only, and a row is complete before the index points at it
+- inserting an id in the middle of the index, or compacting, builds new
+  arrays that are swapped in with a single assignment
+- in-place index writes replace one element and never shift positions
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from itertools import accumulate, islice
+from operator import itemgetter
+from pydantic import TypeAdapter
+from models.book import Book
+from services.memory_store import RevisionedStore
+
+BOOK_LIST = TypeAdapter(list[Book])
+
+class BookColumns:
+    """
+    The columns of the rows and the id index that points into them.
+    """
+
+    __slots__ = ("ids", "author_ids", "dates", "versions", "title_ends", "titles", "index")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.author_ids = array("q")
+        self.dates = array("i")
+        self.versions = array("q")
+        # Fin de cada título en `titles`; el inicio es el fin de la fila anterior
+        self.title_ends = array("q", [0])
+        self.titles = bytearray()
+        # (ids ordenados, fila de cada id o -1 si está borrado)
+        self.index = (array("q"), array("q"))
+
+    def append(self, book):
+        """
+        Appends a row with the values of `book` and returns its number.
+
+        Every value is converted before any column grows, so a value that
+        does not fit (an id of 2**63 or more, say) raises and leaves the
+        columns untouched.
+        """
+        title = book.title.encode()
+        book_id, author_id, version = array("q", (book.id, book.author_id, book.version))
+        ordinal = book.publication_date.toordinal()
+        self.titles += title
+        self.title_ends.append(len(self.titles))
+        self.author_ids.append(author_id)
+        self.dates.append(ordinal)
+        self.versions.append(version)
+        # El id va al final: la fila está completa cuando el índice la ve
+        self.ids.append(book_id)
+        return len(self.ids) - 1
+
+    def record(self, row):
+        """
+        Returns the values of `row` as a dict keyed by Book field.
+        """
+        ends = self.title_ends
+        return {
+            "id": self.ids[row],
+            "title": self.titles[ends[row]:ends[row + 1]].decode(),
+            "author_id": self.author_ids[row],
+            "publication_date": date.fromordinal(self.dates[row]),
+            "version": self.versions[row],
+        }
+
+    def books(self, rows):
+        """
+        Materializes `rows` as a list of Book.
+        """
+        # La validación por lotes de pydantic-core es más rápida que model_construct
+        return BOOK_LIST.validate_python([self.record(row) for row in rows])
+
+    def row_of(self, book_id):
+        """
+        Returns the row of the live book with `book_id`, or -1.
+        """
+        index_ids, index_rows = self.index
+        position = bisect_left(index_ids, book_id)
+        if position < len(index_ids) and index_ids[position] == book_id:
+            return index_rows[position]
+        return -1
+
+    def live_rows(self, after_id=None):
+        """
+        Yields the rows of the live books with an id greater than
+        `after_id`, in id order.
+        """
+        index_ids, index_rows = self.index
+        start = 0 if after_id is None else bisect_right(index_ids, after_id)
+        for position in range(start, len(index_ids)):
+            row = index_rows[position]
+            if row >= 0:
+                yield row
+
+class ColumnarBookStore(RevisionedStore):
+    """
+    Book store with the interface of MemoryStore, backed by typed columns.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.columns = BookColumns()
+        self.live = 0
+
+    def __len__(self):
+        return self.live
+
+    def __contains__(self, book_id):
+        return self.columns.row_of(book_id) >= 0
+
+    def __getitem__(self, book_id):
+        book = self.get(book_id)
+        if book is None:
+            raise KeyError(book_id)
+        return book
+
+    def get(self, book_id):
+        columns = self.columns
+        row = columns.row_of(book_id)
+        return Book.model_validate(columns.record(row)) if row >= 0 else None
+
+    def get_many(self, book_ids):
+        """
+        Returns the book of each id of `book_ids`, in the same order, with
+        None for the ids not stored. The books are built in one batch.
+        """
+        columns = self.columns
+        rows = [columns.row_of(book_id) for book_id in book_ids]
+        books = iter(columns.books([row for row in rows if row >= 0]))
+        return [next(books) if row >= 0 else None for row in rows]
+
+    def values(self):
+        """
+        Returns a list with every book, in id order.
+        """
+        columns = self.columns
+        return columns.books(columns.live_rows())
+
+    def put(self, book):
+        with self.lock:
+            columns = self.columns
+            row = columns.append(book)
+            index_ids, index_rows = columns.index
+            if not index_ids or book.id > index_ids[-1]:
+                # Primero la fila: un lector que ya ve el id encuentra su fila
+                index_rows.append(row)
+                index_ids.append(book.id)
+                self.live += 1
+            else:
+                position = bisect_left(index_ids, book.id)
+                if position < len(index_ids) and index_ids[position] == book.id:
+                    if index_rows[position] < 0:
+                        self.live += 1
+                    index_rows[position] = row
+                else:
+                    # Inserción intermedia: arrays nuevos, los lectores conservan los viejos
+                    index_ids = array("q", index_ids)
+                    index_rows = array("q", index_rows)
+                    index_ids.insert(position, book.id)
+                    index_rows.insert(position, row)
+                    columns.index = (index_ids, index_rows)
+                    self.live += 1
+            self._touch()
+            self._compact_if_sparse()
+        return book
+
+    def pop(self, book_id):
+        with self.lock:
+            columns = self.columns
+            index_ids, index_rows = columns.index
+            position = bisect_left(index_ids, book_id)
+            if position == len(index_ids) or index_ids[position] != book_id:
+                return None
+            row = index_rows[position]
+            if row < 0:
+                return None
+            book = Book.model_validate(columns.record(row))
+            index_rows[position] = -1
+            self.live -= 1
+            self._touch()
+            self._compact_if_sparse()
+        return book
+
+    def load(self, books):
+        """
+        Bulk-inserts books (e.g. read from a snapshot), replacing those with
+        the same id, and rebuilds the index once.
+        """
+        with self.lock:
+            columns = self.columns
+            index_ids, index_rows = columns.index
+            rows = {book_id: row for book_id, row in zip(index_ids, index_rows) if row >= 0}
+            for book in books:
+                rows[book.id] = columns.append(book)
+            ordered = sorted(rows)
+            columns.index = (array("q", ordered), array("q", map(rows.__getitem__, ordered)))
+            self.live = len(ordered)
+            self._touch()
+            self._compact_if_sparse()
+
+    def page(self, after_id=None, limit=None):
+        """
+        Returns up to `limit` books with an id greater than `after_id`,
+        ordered by id.
+        """
+        columns = self.columns
+        return columns.books(islice(columns.live_rows(after_id), limit))
+
+    def iter_rows(self, batch_size, fields):
+        """
+        Yields the books in id order as tuples of `fields`, in lists of up to
+        `batch_size`, read straight from the columns.
+        """
+        values = itemgetter(*fields)
+        after_id = None
+        while True:
+            columns = self.columns
+            rows = list(islice(columns.live_rows(after_id), batch_size))
+            if not rows:
+                return
+            yield [values(columns.record(row)) for row in rows]
+            after_id = columns.ids[rows[-1]]
+
+    def rows_snapshot(self, fields):
+        """
+        Returns an iterator of tuples of `fields` over the books as they are
+        now. Call it holding `lock` for a state consistent with other stores;
+        the iterator itself can be consumed without the lock.
+        """
+        columns = self.columns
+        # Las filas no cambian: basta con copiar el índice
+        rows = array("q", columns.index[1])
+        values = itemgetter(*fields)
+        return (values(columns.record(row)) for row in rows if row >= 0)
+
+    def statistics(self):
+        columns = self.columns
+        return {
+            "live": self.live,
+            "rows": len(columns.ids),
+            "title_bytes": len(columns.titles),
+        }
+
+    def _compact_if_sparse(self):
+        columns = self.columns
+        if len(columns.ids) <= 2 * self.live + 1024:
+            return
+        # Columnas nuevas con solo las filas vigentes, en orden de id
+        rows = list(columns.live_rows())
+        ends = columns.title_ends
+        titles = [columns.titles[ends[row]:ends[row + 1]] for row in rows]
+        compacted = BookColumns()
+        compacted.ids = array("q", map(columns.ids.__getitem__, rows))
+        compacted.author_ids = array("q", map(columns.author_ids.__getitem__, rows))
+        compacted.dates = array("i", map(columns.dates.__getitem__, rows))
+        compacted.versions = array("q", map(columns.versions.__getitem__, rows))
+        compacted.title_ends = array("q", accumulate(map(len, titles), initial=0))
+        compacted.titles = bytearray().join(titles)
+        compacted.index = (array("q", compacted.ids), array("q", range(len(rows))))
+        self.columns = compacted
@@ -0,0 +1,78 @@
+"""
+Ordered index of the books by publication date.
+
+Each book is one integer key, its publication date (as a proleptic
+Gregorian ordinal) in the high bits and its id in the low 64 bits, so the
+keys sort by (publication_date, id) and a single int per book is all the
+index stores. The keys are kept in a SortedKeys container: a date range,
+in either direction and continued after a (date, id) cursor, is one
+bisect and a walk over the books it returns, O(log n + k).
+
+The index is maintained by BookService under its write lock. Readers take
+no lock (see services/sorted_keys.py).
+"""
+
+from datetime import date
+from services.sorted_keys import SortedKeys
+
+ID_BITS = 64
+# Desplazamiento que lleva los ids con signo (BIGINT) a enteros no negativos
+ID_OFFSET = 1 << (ID_BITS - 1)
+ID_MASK = (1 << ID_BITS) - 1
+
+def date_key(published, book_id):
+    return published.toordinal() << ID_BITS | (book_id + ID_OFFSET)
+
+def key_id(key):
+    return (key & ID_MASK) - ID_OFFSET
+
+class DateIndex:
+    """
+    Sorted (publication_date, id) index of the books.
+    """
+
+    def __init__(self):
+        self.keys = SortedKeys()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, book):
+        self.keys.add(date_key(book.publication_date, book.id))
+
+    def add_many(self, books):
+        self.keys.add_many(date_key(book.publication_date, book.id) for book in books)
+
+    def remove(self, book):
+        self.keys.remove(date_key(book.publication_date, book.id))
+
+    def page(self, published_from=None, published_to=None, descending=False,
+             after=None, limit=None):
+        """
+        Returns the ids of the books published between two dates.
+
+        :param published_from: First date of the range, or None for no bound.
+        :param published_to: Last date of the range, or None for no bound.
+        :param descending: Latest first instead of oldest first.
+        :param after: (publication_date, id) of the last book already
+            returned, to continue after it, or None.
+        :param limit: Maximum number of ids, or None for all of them.
+        :return: The ids, ordered by publication date and id.
+        """
+        low = date_key(published_from or date.min, -ID_OFFSET)
+        high = date_key(published_to or date.max, ID_OFFSET - 1)
+        if after is not None:
+            if descending:
+                high = min(high, date_key(*after) - 1)
+            else:
+                low = max(low, date_key(*after) + 1)
+        keys = self.keys.descending(high) if descending else self.keys.ascending(low)
+        ids = []
+        for key in keys:
+            if len(ids) == limit or (key < low if descending else key > high):
+                break
+            ids.append(key_id(key))
+        return ids
+
+    def statistics(self):
+        return self.keys.statistics()
@@ -0,0 +1,86 @@
+"""
+Shared service instances for the FastAPI application.
+
+The storage backend is chosen with the STORAGE_BACKEND environment
+variable:
+- memory: per-process dictionaries (default)
+- database: BookModel/AuthorModel tables, shared by every worker
+
+Both routers use the same book storage so that author deletions can
+cascade to the books of that author. Both services are wrapped in a
+read-through cache of CACHE_MAX_SIZE entries per entity (0 disables it)
+whose entries expire after CACHE_TTL_SECONDS (0 keeps them until evicted
+or invalidated). The cache is per process and a write only invalidates
+the cache of the worker that made it, so with the database backend the
+cache is only enabled with a positive CACHE_TTL_SECONDS, which bounds how
+long the other workers may serve a stale record.
+
+Every write is also appended to a change log that retains the last
+CHANGE_LOG_SIZE changes for the /changes feed, and published to the
+/changes/stream subscribers through the change broker. The log is kept
+per process, so with several workers each one reports its own writes.
+
+With the memory backend, BOOK_STORE chooses how the books are held:
+- objects: a dictionary of Book models (default)
+- columnar: typed arrays with the titles packed in one buffer, several
+  times smaller for large catalogs at the cost of building the Book
+  models each read returns
+
+Also with the memory backend, setting JOURNAL_DIR makes the services durable:
+every change is journaled to that directory, snapshots are taken every
+JOURNAL_SNAPSHOT_SECONDS and the data is recovered on startup.
+"""
+
+import os
+from dotenv import load_dotenv
+from helpers.event_stream import EVENT_QUEUE_SIZE, encode_change
+from services.book_service import BookService
+from services.author_service import AuthorService
+from repositories.book_repository import BookRepository
+from repositories.author_repository import AuthorRepository
+from services.cache import LRUCache
+from services.change_broker import ChangeBroker
+from services.change_log import ChangeLog
+from services.columnar_store import ColumnarBookStore
+from services.journal import Journal
+from services.cached_service import CachedAuthorService, CachedBookService
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory").strip().lower()
+BOOK_STORE = os.getenv("BOOK_STORE", "objects").strip().lower()
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "0"))
+CHANGE_LOG_SIZE = int(os.getenv("CHANGE_LOG_SIZE", "10000"))
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "").strip()
+JOURNAL_SNAPSHOT_SECONDS = float(os.getenv("JOURNAL_SNAPSHOT_SECONDS", "300"))
+
+change_log = ChangeLog(CHANGE_LOG_SIZE)
+change_broker = ChangeBroker(change_log, EVENT_QUEUE_SIZE, encode_change)
+journal = None
+
+if STORAGE_BACKEND == "database":
+    book_store = BookRepository(change_log)
+    author_store = AuthorRepository(book_store, change_log)
+elif STORAGE_BACKEND == "memory":
+    if BOOK_STORE == "columnar":
+        book_store = BookService(change_log, ColumnarBookStore())
+    elif BOOK_STORE == "objects":
+        book_store = BookService(change_log)
+    else:
+        raise ValueError(f"Unknown BOOK_STORE: {BOOK_STORE!r}")
+    author_store = AuthorService(book_store, change_log)
+    if JOURNAL_DIR:
+        journal = Journal(JOURNAL_DIR, JOURNAL_SNAPSHOT_SECONDS)
+        journal.open(book_store, author_store, change_log)
+else:
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND!r}")
+
+if STORAGE_BACKEND == "database" and CACHE_TTL_SECONDS <= 0:
+    # Sin caducidad, las escrituras de otros workers nunca llegarían a esta caché
+    CACHE_MAX_SIZE = 0
+
+book_service = CachedBookService(book_store, LRUCache(CACHE_MAX_SIZE, CACHE_TTL_SECONDS))
+author_service = CachedAuthorService(author_store,
+                                     LRUCache(CACHE_MAX_SIZE, CACHE_TTL_SECONDS),
+                                     book_service)
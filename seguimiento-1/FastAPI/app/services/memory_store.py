@@ -0,0 +1,209 @@
+"""
+Id-keyed in-memory record store used by the in-memory services.
+
+Records live in a dictionary, so lookups, updates and deletes by id are
+O(1) and iteration keeps insertion order. A sorted list of ids supports
+keyset pagination; deleted ids are left in it as tombstones and removed in
+bulk once they outnumber the live records, keeping deletes O(1) amortized.
+
+Writers are serialized with `lock` and records are never mutated in place:
+an update stores a new record, so a reader that already holds the old one
+keeps a consistent copy. Readers do not take the lock. Single-key reads are
+atomic dictionary lookups, full listings come from an immutable tuple that
+the first reader after a write copies from the dictionary (outside the
+lock) and publishes for the next readers, and pages walk the sorted ids
+tolerating concurrent inserts.
+
+Every write also advances a revision counter and records its time, which
+the routes use as the validators of conditional GETs.
+
+The lock, the revision and the batched iteration live in RevisionedStore,
+which the columnar book store (services/columnar_store.py) shares.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+from operator import attrgetter
+import secrets
+import threading
+import time
+
+class RevisionedStore:
+    """
+    Write lock, revision and batched iteration shared by the record stores.
+    """
+
+    def __init__(self):
+        # Reentrant so services can group several writes in one critical section
+        self.lock = threading.RLock()
+        # Prefijo aleatorio: las revisiones de otro proceso o arranque no coinciden
+        self._epoch = secrets.token_hex(4)
+        # (revisión, instante de la última escritura), se reemplaza de una vez
+        self._revision = (0, time.time())
+
+    def revision(self):
+        """
+        Returns the revision of the store and the time of its last write.
+        """
+        counter, last_modified = self._revision
+        return f"{self._epoch}-{counter}", last_modified
+
+    def last_modified(self):
+        return self._revision[1]
+
+    def _touch(self):
+        self._revision = (self._revision[0] + 1, time.time())
+
+    def page(self, after_id=None, limit=None):
+        """
+        Returns up to `limit` records with an id greater than `after_id`,
+        ordered by id. Implemented by the subclasses.
+        """
+        raise NotImplementedError
+
+    def iter_batches(self, batch_size):
+        """
+        Yields the records in id order, in lists of up to `batch_size`.
+        """
+        after_id = None
+        while True:
+            batch = self.page(after_id, batch_size)
+            if not batch:
+                return
+            yield batch
+            after_id = batch[-1].id
+
+class MemoryStore(RevisionedStore):
+    """
+    Dictionary of records keyed by id with an ordered view of the ids.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = {}
+        self.sorted_ids = []
+        # (revisión de la que se copió, tupla de los registros)
+        self._snapshot = (0, ())
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, record_id):
+        return record_id in self.records
+
+    def __getitem__(self, record_id):
+        return self.records[record_id]
+
+    def get(self, record_id):
+        return self.records.get(record_id)
+
+    def get_many(self, record_ids):
+        """
+        Returns the record of each id of `record_ids`, in the same order,
+        with None for the ids not stored.
+        """
+        records = self.records
+        return [records.get(record_id) for record_id in record_ids]
+
+    def values(self):
+        """
+        Returns an immutable snapshot of the records in insertion order.
+        """
+        counter, snapshot = self._snapshot
+        revision = self._revision[0]
+        if counter != revision:
+            snapshot = self._copy_values()
+            # Marcada con la revisión leída antes de copiar: nunca parece más nueva
+            self._snapshot = (revision, snapshot)
+        return snapshot
+
+    def put(self, record):
+        with self.lock:
+            if record.id not in self.records:
+                self._add_id(record.id)
+            self.records[record.id] = record
+            self._touch()
+        return record
+
+    def pop(self, record_id):
+        with self.lock:
+            record = self.records.pop(record_id, None)
+            if record is not None:
+                self._touch()
+                if len(self.sorted_ids) > 2 * len(self.records) + 64:
+                    # Lista nueva: los lectores en curso conservan la anterior
+                    self.sorted_ids = [i for i in self.sorted_ids if i in self.records]
+        return record
+
+    def load(self, records):
+        """
+        Bulk-inserts records (e.g. read from a snapshot), replacing those
+        with the same id, and rebuilds the sorted ids once.
+        """
+        with self.lock:
+            for record in records:
+                self.records[record.id] = record
+            self.sorted_ids = sorted(self.records)
+            self._touch()
+
+    def page(self, after_id=None, limit=None, ids=None, where=None):
+        """
+        Returns up to `limit` records with an id greater than `after_id`,
+        ordered by id. `ids` restricts the walk to the ascending ids of a
+        secondary index, starting from `after_id`, and `where` skips the
+        records it rejects.
+        """
+        if ids is None:
+            sorted_ids = self.sorted_ids
+            start = 0 if after_id is None else bisect_right(sorted_ids, after_id)
+            # Tramos de `limit` ids desde `start`, copiados en C a medida que se recorren
+            step = limit or len(sorted_ids) or 1
+            ids = chain.from_iterable(sorted_ids[position:position + step]
+                                      for position in range(start, len(sorted_ids), step))
+        last_id = after_id
+        page = []
+        for record_id in ids:
+            # Una inserción concurrente desplaza la lista: se omiten repetidos
+            if last_id is not None and record_id <= last_id:
+                continue
+            record = self.records.get(record_id)
+            if record is not None and (where is None or where(record)):
+                last_id = record_id
+                page.append(record)
+                if limit is not None and len(page) >= limit:
+                    break
+        return page
+
+    def iter_rows(self, batch_size, fields):
+        """
+        Yields the records in id order as tuples of `fields`, in lists of up
+        to `batch_size`.
+        """
+        values = attrgetter(*fields)
+        for batch in self.iter_batches(batch_size):
+            yield [values(record) for record in batch]
+
+    def rows_snapshot(self, fields):
+        """
+        Returns an iterator of tuples of `fields` over the records as they
+        are now. Call it holding `lock` for a state consistent with other
+        stores; the iterator itself can be consumed without the lock.
+        """
+        return map(attrgetter(*fields), self.values())
+
+    def _copy_values(self):
+        try:
+            return tuple(self.records.values())
+        except RuntimeError:
+            # Un alta o baja a mitad de la copia: se repite con las escrituras detenidas
+            with self.lock:
+                return tuple(self.records.values())
+
+    def _add_id(self, record_id):
+        ids = self.sorted_ids
+        if not ids or record_id > ids[-1]:
+            ids.append(record_id)
+            return
+        position = bisect_left(ids, record_id)
+        if position == len(ids) or ids[position] != record_id:
+            insort(ids, record_id, lo=position)
@@ -0,0 +1,78 @@
+"""
+Sorted prefix index for type-ahead suggestions.
+
+Each entry is the normalized text (casefolded, accent-folded, single
+spaces) followed by a NUL and the record id, so the entries of one text
+sort together and every entry is unique. The entries are kept in a
+SortedKeys container: a suggestion finds the first entry not below the
+prefix and walks forward until an entry without the prefix, so it reads
+about `limit` entries whatever the size of the index.
+
+The index is maintained by the services under their write lock. Readers
+take no lock (see services/sorted_keys.py).
+"""
+
+from services.search_index import fold
+from services.sorted_keys import SortedKeys
+
+SEPARATOR = "\0"
+
+def normalize(text):
+    """
+    Casefolds `text`, removes its accents and collapses its whitespace.
+    """
+    return " ".join(map(fold, text.casefold().split()))
+
+def entry_key(normalized, item_id):
+    return f"{normalized}{SEPARATOR}{item_id}"
+
+class PrefixIndex:
+    """
+    Sorted index of normalized texts, queried by prefix.
+    """
+
+    def __init__(self):
+        self.entries = SortedKeys()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, item_id, text):
+        """
+        Indexes `text` under `item_id`.
+        """
+        self.entries.add(entry_key(normalize(text), item_id))
+
+    def add_many(self, items):
+        """
+        Indexes many (item_id, text) pairs at once.
+        """
+        self.entries.add_many(entry_key(normalize(text), item_id) for item_id, text in items)
+
+    def remove(self, item_id, text):
+        """
+        Removes the entry of `item_id` indexed under `text`, if any.
+        """
+        self.entries.remove(entry_key(normalize(text), item_id))
+
+    def replace(self, item_id, old_text, new_text):
+        old, new = normalize(old_text), normalize(new_text)
+        if old != new:
+            self.entries.remove(entry_key(old, item_id))
+            self.entries.add(entry_key(new, item_id))
+
+    def suggest(self, prefix, limit):
+        """
+        Returns the ids of the first `limit` texts, in normalized order,
+        that start with `prefix`.
+        """
+        prefix = normalize(prefix)
+        ids = []
+        for key in self.entries.ascending(prefix):
+            if not key.startswith(prefix) or len(ids) == limit:
+                break
+            ids.append(int(key.rpartition(SEPARATOR)[2]))
+        return ids
+
+    def statistics(self):
+        return self.entries.statistics()
@@ -0,0 +1,322 @@
+"""
+Inverted index over the book titles for full-text search.
+
+Titles are tokenized into case- and accent-folded words ("Cien Años" and
+"cien anos" give the same terms) and common Spanish and English
+stopwords are dropped. The posting list of each term is split into
+impact buckets: the sorted book ids of each combination of term frequency
+and title length. Those two values are all BM25 needs besides the
+collection statistics, so every book in a bucket has the same score for
+the term. A bucket is one `array("q")` while it has at most LARGE_BUCKET
+ids, and a SortedKeys of `array("q")` sublists beyond that.
+
+A query returns the books that contain every query term, ranked by BM25.
+The candidates come from the term with the fewest books, bucket by
+bucket from the best score down, and each one is looked up by binary
+search in the buckets of the other terms that have its title length.
+Within a bucket the ids ascend (ties go to the lowest id), so the search
+stops as soon as no remaining candidate can enter the top `limit`: a
+single-word query reads about `limit` ids whatever the size of its list.
+When the first candidates of a bucket do not fill the top, the rest of the
+bucket is intersected with the other terms' buckets as sets, in C.
+
+The index is maintained by BookService under its write lock. Readers take
+no lock. Adding a book with a greater id than any in a small bucket
+appends to it in place; any other change builds a new array of at most
+LARGE_BUCKET ids and swaps it in with a single assignment. A large bucket
+copies only the sublist the id falls in, so an index write costs
+O(LARGE_BUCKET) however many books share the term. Readers copy the
+bucket dictionary of a term before walking it.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+import heapq
+from itertools import islice
+import math
+import re
+import unicodedata
+from services.sorted_keys import SUBLIST_SIZE, SortedKeys
+
+# Parámetros habituales de BM25: saturación de la frecuencia y peso de la longitud
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_STAT = 0xFFFF
+# Candidatos de un cubo comprobados uno a uno antes de cruzar el resto por conjuntos
+PROBED_CANDIDATES = 256
+# Ids de un cubo a partir de los que se guarda en sublistas
+LARGE_BUCKET = 2 * SUBLIST_SIZE
+TOKEN = re.compile(r"[^\W_]+")
+STOPWORDS = frozenset("""
+a al con de del e el en la las lo los o para por se sin su sus u un una y
+an and at by for from in of on or the to with
+""".split())
+
+@lru_cache(maxsize=65536)
+def fold(word):
+    """
+    Removes the accents of a lowercase word ("años" -> "anos").
+    """
+    if word.isascii():
+        return word
+    decomposed = unicodedata.normalize("NFKD", word)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def tokenize(text):
+    """
+    Splits a text into folded search terms, without stopwords.
+
+    :param text: Title or query.
+    :return: The terms, in order and with repetitions.
+    """
+    terms = map(fold, TOKEN.findall(text.casefold()))
+    return [term for term in terms if term not in STOPWORDS]
+
+def term_stats(terms):
+    """
+    Returns, for each distinct term, its frequency and the number of terms
+    packed in one integer (frequency << 16 | length).
+    """
+    length = min(len(terms), MAX_TERM_STAT)
+    # Una sola pasada: cada aparición suma 1 a la frecuencia de los bits altos
+    stats = {}
+    for term in terms:
+        stats[term] = stats.get(term, length) + (1 << 16)
+    if len(terms) > MAX_TERM_STAT:
+        # Solo un texto de más de MAX_TERM_STAT términos desborda la frecuencia
+        return {term: min(packed >> 16, MAX_TERM_STAT) << 16 | length
+                for term, packed in stats.items()}
+    return stats
+
+def contains(ids, doc_id):
+    """
+    Tells whether the ids of a bucket contain `doc_id`.
+    """
+    if ids.__class__ is SortedKeys:
+        # Bisección de las primeras claves y luego de una sola sublista
+        sublists, firsts = ids.state
+        index = bisect_right(firsts, doc_id) - 1
+        if index < 0:
+            return False
+        ids = sublists[index]
+    position = bisect_left(ids, doc_id)
+    return position < len(ids) and ids[position] == doc_id
+
+class SearchIndex:
+    """
+    Term -> impact-bucketed sorted posting lists, with BM25 ranking.
+    """
+
+    def __init__(self):
+        # término -> {frecuencia << 16 | longitud del título: ids ordenados}
+        self.postings = {}
+        self.documents = 0
+        self.total_length = 0
+
+    def add(self, doc_id, text):
+        """
+        Indexes the terms of `text` under `doc_id`.
+        """
+        terms = tokenize(text)
+        self.documents += 1
+        self.total_length += len(terms)
+        for term, stats in term_stats(terms).items():
+            self._add_posting(term, stats, doc_id)
+
+    def remove(self, doc_id, text):
+        """
+        Removes `doc_id` from the posting lists of the terms of `text`, the
+        text it was indexed with. Does nothing if it is not indexed.
+        """
+        terms = tokenize(text)
+        removed = False
+        for term, stats in term_stats(terms).items():
+            removed = self._remove_posting(term, stats, doc_id) or removed
+        # Un documento que no llegó a indexarse no descuenta de los totales
+        if removed or not terms:
+            self.documents -= 1
+            self.total_length -= len(terms)
+
+    def replace(self, doc_id, old_text, new_text):
+        """
+        Reindexes `doc_id` from `old_text` to `new_text`, touching only the
+        terms whose frequency or title length changed.
+        """
+        old_terms, new_terms = tokenize(old_text), tokenize(new_text)
+        old_stats, new_stats = term_stats(old_terms), term_stats(new_terms)
+        for term, stats in old_stats.items():
+            if new_stats.get(term) != stats:
+                self._remove_posting(term, stats, doc_id)
+        for term, stats in new_stats.items():
+            if old_stats.get(term) != stats:
+                self._add_posting(term, stats, doc_id)
+        self.total_length += len(new_terms) - len(old_terms)
+
+    def search(self, query, limit):
+        """
+        Returns the best `limit` documents that contain every term of
+        `query`.
+
+        :return: List of (doc_id, score) tuples, best first.
+        """
+        terms = []
+        for term in set(tokenize(query)):
+            buckets = self.postings.get(term)
+            if buckets is None:
+                return []
+            # Copia atómica: los escritores pueden añadir o quitar cubos
+            buckets = list(buckets.items())
+            terms.append((sum(len(ids) for _, ids in buckets), buckets))
+        if not terms:
+            return []
+        documents = max(self.documents, 1)
+        average_length = self.total_length / documents or 1.0
+        # El término con menos documentos da los candidatos
+        terms.sort(key=lambda term: term[0])
+        others = []
+        best_rest = 0.0
+        for frequency, buckets in terms[1:]:
+            weight = self._idf(frequency, documents)
+            by_length = {}
+            for stats, ids in buckets:
+                by_length.setdefault(stats & MAX_TERM_STAT, []).append(
+                    (ids, weight * self._saturation(stats, average_length)))
+            best_rest += max(score for entries in by_length.values() for _, score in entries)
+            others.append(by_length)
+        frequency, buckets = terms[0]
+        weight = self._idf(frequency, documents)
+        scored = sorted(((weight * self._saturation(stats, average_length), stats, ids)
+                         for stats, ids in buckets), reverse=True)
+        hits = []
+        for base, stats, ids in scored:
+            bound = base + best_rest
+            if len(hits) == limit and hits[0][0] > bound:
+                break
+            length = stats & MAX_TERM_STAT
+            size = len(ids)
+            probed = min(size, PROBED_CANDIDATES) if others else size
+            walk = iter(ids)
+            for doc_id in islice(walk, probed):
+                # Ids ascendentes: ningún candidato posterior del cubo puede entrar ya
+                if len(hits) == limit and hits[0] >= (bound, -doc_id):
+                    break
+                score = self._match(doc_id, base, others, length)
+                if score is not None:
+                    self._offer(hits, limit, (score, -doc_id))
+            else:
+                # Intersección poco densa: el resto del cubo se cruza con conjuntos en C
+                if probed < size:
+                    for doc_id, score in self._intersect(walk, base, others, length):
+                        self._offer(hits, limit, (score, -doc_id))
+        return [(-negated_id, score) for score, negated_id in sorted(hits, reverse=True)]
+
+    def _add_posting(self, term, stats, doc_id):
+        buckets = self.postings.get(term)
+        if buckets is None:
+            self.postings[term] = {stats: array("q", [doc_id])}
+            return
+        ids = buckets.get(stats)
+        if ids is None:
+            buckets[stats] = array("q", [doc_id])
+        elif ids.__class__ is SortedKeys:
+            ids.add(doc_id)
+        elif len(ids) >= LARGE_BUCKET:
+            # Cubo grande: en sublistas, las escrituras ya no copian el cubo entero
+            large = SortedKeys("q")
+            large.add_many(ids)
+            large.add(doc_id)
+            buckets[stats] = large
+        elif doc_id > ids[-1]:
+            ids.append(doc_id)
+        else:
+            position = bisect_left(ids, doc_id)
+            buckets[stats] = ids[:position] + array("q", [doc_id]) + ids[position:]
+
+    def _remove_posting(self, term, stats, doc_id):
+        buckets = self.postings.get(term)
+        ids = None if buckets is None else buckets.get(stats)
+        if ids is None:
+            return False
+        if ids.__class__ is SortedKeys:
+            if not ids.remove(doc_id):
+                return False
+            if ids:
+                return True
+        else:
+            position = bisect_left(ids, doc_id)
+            if position == len(ids) or ids[position] != doc_id:
+                return False
+            if len(ids) > 1:
+                buckets[stats] = ids[:position] + ids[position + 1:]
+                return True
+        # El cubo se queda vacío
+        if len(buckets) > 1:
+            del buckets[stats]
+        else:
+            del self.postings[term]
+        return True
+
+    def statistics(self):
+        buckets = [ids for term in list(self.postings.values()) for ids in list(term.values())]
+        return {
+            "documents": self.documents,
+            "terms": len(self.postings),
+            "buckets": len(buckets),
+            "large_buckets": sum(ids.__class__ is SortedKeys for ids in buckets),
+            "postings": sum(map(len, buckets)),
+        }
+
+    @staticmethod
+    def _match(doc_id, base, others, length):
+        """
+        Returns the score of `doc_id` if it is in every other term, else None.
+        """
+        score = base
+        for by_length in others:
+            for ids, term_score in by_length.get(length, ()):
+                if contains(ids, doc_id):
+                    score += term_score
+                    break
+            else:
+                return None
+        return score
+
+    @staticmethod
+    def _intersect(candidates, base, others, length):
+        """
+        Returns the (doc_id, score) pairs of the candidates found in every
+        other term, intersecting whole buckets at once.
+        """
+        scores = dict.fromkeys(candidates, base)
+        for by_length in others:
+            matched = {}
+            for ids, term_score in by_length.get(length, ()):
+                if len(scores) * PROBED_CANDIDATES < len(ids):
+                    # Quedan pocos candidatos: la bisección evita recorrer el cubo
+                    found = [doc_id for doc_id in scores if contains(ids, doc_id)]
+                else:
+                    found = scores.keys() & ids
+                for doc_id in found:
+                    matched[doc_id] = scores[doc_id] + term_score
+            scores = matched
+            if not scores:
+                break
+        return scores.items()
+
+    @staticmethod
+    def _offer(hits, limit, hit):
+        if len(hits) < limit:
+            heapq.heappush(hits, hit)
+        else:
+            heapq.heappushpop(hits, hit)
+
+    @staticmethod
+    def _idf(document_frequency, documents):
+        return math.log(1 + (documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    @staticmethod
+    def _saturation(stats, average_length):
+        frequency, length = stats >> 16, stats & MAX_TERM_STAT
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+        return frequency * (BM25_K1 + 1) / (frequency + norm)
@@ -0,0 +1,168 @@
+"""
+Sorted container of unique keys for the ordered secondary indexes.
+
+The keys are kept sorted in sublists of about SUBLIST_SIZE keys, with the
+first key of each sublist in a separate list. Finding a key is a bisect
+over those firsts and a bisect in one sublist, and a range is read by
+walking forward or backward from there, so a range query costs
+O(log n + k). Inserts and deletes touch a single sublist instead of
+shifting one array of millions of keys. Integer keys can be kept in
+typed `array` sublists (SortedKeys("q")), eight bytes per key.
+
+The container is written under the write lock of the service that owns
+it. Readers take no lock. A key greater than every other is appended to
+the last sublist in place (readers bound their walks by the length they
+read first). Any other write builds a new sublist and stores it in its
+slot. Splitting or dropping a sublist, or lowering the first key, replaces
+the (sublists, firsts) pair with a single assignment.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+
+SUBLIST_SIZE = 256
+
+class SortedKeys:
+    """
+    Sublist-partitioned sorted list of comparable keys.
+    """
+
+    def __init__(self, typecode=None):
+        # (sublistas ordenadas, primera clave de cada una)
+        self.state = ([], [])
+        self.size = 0
+        # Sublistas de tipo `array` con este código, o listas si es None
+        self.typecode = typecode
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """
+        Iterates over every key in ascending order, over the sublists as
+        they were when the iteration started.
+        """
+        return chain.from_iterable(self.state[0])
+
+    def add(self, key):
+        sublists, firsts = self.state
+        if not sublists:
+            self.state = ([self._sublist([key])], [key])
+            self.size += 1
+            return
+        last = sublists[-1]
+        if key > last[-1] and len(last) < 2 * SUBLIST_SIZE:
+            # Clave mayor que todas (altas con ids crecientes): sin copia
+            last.append(key)
+            self.size += 1
+            return
+        index = max(bisect_right(firsts, key) - 1, 0)
+        sublist = sublists[index][:]
+        insort(sublist, key)
+        if len(sublist) > 2 * SUBLIST_SIZE:
+            half = len(sublist) // 2
+            self.state = (
+                sublists[:index] + [sublist[:half], sublist[half:]] + sublists[index + 1:],
+                firsts[:index] + [sublist[0], sublist[half]] + firsts[index + 1:],
+            )
+        elif key < firsts[index]:
+            self.state = (sublists[:index] + [sublist] + sublists[index + 1:],
+                          firsts[:index] + [key] + firsts[index + 1:])
+        else:
+            sublists[index] = sublist
+        self.size += 1
+
+    def add_many(self, keys):
+        """
+        Adds many keys at once, merging them into the sublists they fall in
+        and swapping the whole state once.
+        """
+        keys = sorted(keys)
+        if not keys:
+            return
+        sublists, firsts = self.state
+        added = {}
+        for key in keys:
+            index = max(bisect_right(firsts, key) - 1, 0)
+            added.setdefault(index, []).append(key)
+        merged = []
+        for index, sublist in enumerate(sublists or [[]]):
+            if index not in added:
+                merged.append(sublist)
+                continue
+            # Dos tramos ordenados: la ordenación los mezcla en tiempo lineal
+            entries = sorted(chain(sublist, added[index]))
+            if len(entries) > 2 * SUBLIST_SIZE:
+                merged.extend(self._sublist(entries[first:first + SUBLIST_SIZE])
+                              for first in range(0, len(entries), SUBLIST_SIZE))
+            else:
+                merged.append(self._sublist(entries))
+        self.state = (merged, [sublist[0] for sublist in merged])
+        self.size += len(keys)
+
+    def remove(self, key):
+        """
+        Removes `key`, if present.
+
+        :return: True if it was present.
+        """
+        sublists, firsts = self.state
+        if not sublists:
+            return False
+        index = max(bisect_right(firsts, key) - 1, 0)
+        sublist = sublists[index]
+        position = bisect_left(sublist, key)
+        if position == len(sublist) or sublist[position] != key:
+            return False
+        if len(sublist) == 1:
+            self.state = (sublists[:index] + sublists[index + 1:],
+                          firsts[:index] + firsts[index + 1:])
+        else:
+            # La primera clave antigua sigue siendo una cota inferior válida
+            sublist = sublist[:]
+            del sublist[position]
+            sublists[index] = sublist
+        self.size -= 1
+        return True
+
+    def ascending(self, low=None):
+        """
+        Yields the keys greater than or equal to `low` (every key if None),
+        in ascending order.
+        """
+        sublists, firsts = self.state
+        start = 0 if low is None else max(bisect_right(firsts, low) - 1, 0)
+        last = None
+        for index in range(start, len(sublists)):
+            sublist = sublists[index]
+            position = 0 if low is None else bisect_left(sublist, low)
+            for position in range(position, len(sublist)):
+                key = sublist[position]
+                # Una partición concurrente puede repetir claves ya leídas
+                if last is None or key > last:
+                    last = key
+                    yield key
+
+    def descending(self, high=None):
+        """
+        Yields the keys less than or equal to `high` (every key if None),
+        in descending order.
+        """
+        sublists, firsts = self.state
+        start = len(sublists) - 1 if high is None else bisect_right(firsts, high) - 1
+        last = None
+        for index in range(min(start, len(sublists) - 1), -1, -1):
+            sublist = sublists[index]
+            position = len(sublist) if high is None else bisect_right(sublist, high)
+            for position in range(position - 1, -1, -1):
+                key = sublist[position]
+                if last is None or key < last:
+                    last = key
+                    yield key
+
+    def statistics(self):
+        return {"entries": self.size, "sublists": len(self.state[0])}
+
+    def _sublist(self, keys):
+        return keys if self.typecode is None else array(self.typecode, keys)
@@ -0,0 +1,53 @@
+"""
+Dictionary encoding for low-cardinality string fields.
+
+A StringDictionary assigns a small integer code to each distinct value the
+first time it is seen and keeps the code-to-string table. The services
+store the table's string instead of the one each request parsed, so every
+record with the same value shares a single string object, and index the
+records by code, so filtering by the field is a lookup instead of a scan
+of string comparisons.
+
+Codes are never reused nor released: the field is expected to have a few
+hundred distinct values. Writers encode under the lock of their service;
+readers only look codes up and need no lock.
+"""
+
+class StringDictionary:
+    """
+    Two-way mapping between the distinct values of a field and their codes.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.strings = []
+
+    def __len__(self):
+        return len(self.strings)
+
+    def encode(self, value):
+        """
+        Returns the code of `value`, assigning the next one if it is new.
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            # La tabla se amplía antes de publicar el código a los lectores
+            self.strings.append(value)
+            self.codes[value] = code
+        return code
+
+    def lookup(self, value):
+        """
+        Returns the code of `value`, or None if it has never been encoded.
+        """
+        return self.codes.get(value)
+
+    def decode(self, code):
+        return self.strings[code]
+
+    def intern(self, value):
+        """
+        Returns the shared string equal to `value`, encoding it if needed.
+        """
+        return self.strings[self.encode(value)]
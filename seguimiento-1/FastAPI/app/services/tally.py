@@ -0,0 +1,86 @@
+"""
+Incrementally maintained group counts for the /stats endpoints.
+
+A Tally counts the records of each group (books per author, authors per
+nationality...). The services update it in the same write, under their
+lock, that adds or removes the record, so reading a count never scans
+the records. A full recount replaces the counts and reports how many
+groups were off, to verify the incremental counts.
+
+Writers change the counts in place under the lock of their service.
+Readers take no lock: a single lookup or the copy of the whole dict
+made by `snapshot` runs without releasing the GIL. A recount counts a
+snapshot of the records without the lock; the changes made by the writes
+in the meantime are recorded by `track` and applied to the recount before
+`replace` swaps it in, under the lock again.
+"""
+
+class Tally:
+    """
+    Group -> number of records, kept up to date on every write.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        # Cambios de cada recuento en curso desde su instantánea
+        self.tracked = []
+
+    def __len__(self):
+        return len(self.counts)
+
+    def increment(self, group, amount=1):
+        self.counts[group] = self.counts.get(group, 0) + amount
+        for changes in self.tracked:
+            changes[group] = changes.get(group, 0) + amount
+
+    def decrement(self, group):
+        count = self.counts.get(group, 0) - 1
+        if count > 0:
+            self.counts[group] = count
+        else:
+            # Un grupo vacío desaparece, como en un GROUP BY
+            self.counts.pop(group, None)
+        for changes in self.tracked:
+            changes[group] = changes.get(group, 0) - 1
+
+    def get(self, group):
+        return self.counts.get(group, 0)
+
+    def snapshot(self):
+        """
+        Returns a copy of the counts, consistent even with concurrent writes.
+        """
+        return dict(self.counts)
+
+    def track(self):
+        """
+        Starts recording the changes of the following writes, for a recount
+        of the records as they are now. Call it under the writers' lock.
+
+        :return: The dict group -> change to pass to `replace`.
+        """
+        changes = {}
+        self.tracked.append(changes)
+        return changes
+
+    def replace(self, counts, changes):
+        """
+        Replaces the counts with a recount, after applying to it the changes
+        recorded since its snapshot. Call it under the writers' lock.
+
+        :param counts: Dict group -> number of records of the snapshot.
+        :param changes: The dict returned by `track` with that snapshot.
+        :return: Dict with the number of groups and of groups whose count
+            differed from the recount.
+        """
+        self.tracked = [tracked for tracked in self.tracked if tracked is not changes]
+        for group, change in changes.items():
+            count = counts.get(group, 0) + change
+            if count > 0:
+                counts[group] = count
+            else:
+                counts.pop(group, None)
+        corrected = sum(1 for group in counts.keys() | self.counts.keys()
+                        if counts.get(group) != self.counts.get(group))
+        self.counts = counts
+        return {"groups": len(counts), "corrected": corrected}
@@ -0,0 +1,77 @@
+"""
+Benchmark of the batch lookup GET /books/book?ids=... against one request per id.
+
+Seeds `--scale` books in-process (the dataset of benchmarks/load.py) and
+renders `--lists` reading lists of `--size` random book ids two ways,
+through httpx's ASGI transport:
+- single: one GET /books/book/{book_id} per id, one after the other
+- batch: one GET /books/book?ids=... per list
+
+Reports the latency percentiles of a whole reading list for each way.
+The storage backend is the one configured (STORAGE_BACKEND, BOOK_STORE).
+
+Usage (from the FastAPI directory):
+    python benchmarks/batch_get.py --scale 100k --size 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import httpx
+
+from load import APP_DIR, SCALES, seed_in_process
+from title_search import percentiles
+
+async def run(args):
+    books = SCALES.get(args.scale.lower()) or int(args.scale)
+    authors = max(1, books // 10)
+    headers = {"x-api-key": args.api_key} if args.api_key else {}
+    sys.path.insert(0, str(APP_DIR))
+    from main import app  # pylint: disable=import-outside-toplevel
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                               base_url="http://benchmark", headers=headers, timeout=60)
+    generator = random.Random(args.seed)
+    timings = {"single": [], "batch": []}
+    async with client, app.router.lifespan_context(app):
+        seed_in_process(books, authors)
+        for _ in range(args.lists):
+            book_ids = generator.sample(range(1, books + 1), args.size)
+            started = time.perf_counter()
+            for book_id in book_ids:
+                (await client.get(f"/books/book/{book_id}")).raise_for_status()
+            timings["single"].append(time.perf_counter() - started)
+            started = time.perf_counter()
+            response = await client.get("/books/book",
+                                        params={"ids": ",".join(map(str, book_ids))})
+            response.raise_for_status()
+            assert [book["id"] for book in response.json()["books"]] == book_ids
+            timings["batch"].append(time.perf_counter() - started)
+    single, batch = percentiles(timings["single"]), percentiles(timings["batch"])
+    return {
+        "storage_backend": os.getenv("STORAGE_BACKEND", "memory"),
+        "book_store": os.getenv("BOOK_STORE", "objects"),
+        "books": books,
+        "ids_per_list": args.size,
+        "single": single,
+        "batch": batch,
+        "p50_speedup": round(single["p50_ms"] / batch["p50_ms"], 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", default="100k",
+                        help="Number of books: 1k, 100k, 1m or an integer.")
+    parser.add_argument("--size", type=int, default=50, help="Ids per reading list.")
+    parser.add_argument("--lists", type=int, default=200)
+    parser.add_argument("--api-key", default=os.getenv("API_KEY"))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark of the columnar book store against the list-of-models store.
+
+For each BOOK_STORE (objects and columnar) a fresh process seeds an
+in-memory BookService with `--books` books in bulk batches and reports:
+- memory: resident set size (RSS) growth per book, for the whole service
+  (store plus author index)
+- page: books/s walking the catalog in keyset pages of `--page-size`
+  serialized to JSON, as GET /books/book returns them
+- full_list: seconds to build and serialize the whole list (all=true)
+- lookup: random GET-by-id reads per second
+- export: rows/s of the tuple rows read by the NDJSON/CSV export
+
+Usage (from the FastAPI directory):
+    python benchmarks/columnar_store.py --books 1000000
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from helpers.export import EXPORT_BATCH_SIZE
+from helpers.responses import BOOK_LIST_ADAPTER
+from models.book import Book
+from services.book_service import BookService
+from services.columnar_store import ColumnarBookStore
+
+STORES = ("objects", "columnar")
+SEED_BATCH_SIZE = 1000
+LOOKUPS = 200_000
+
+def current_rss_mb():
+    """
+    Returns the current resident set size of the process in MiB.
+    """
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def build_service(store):
+    return BookService(store=ColumnarBookStore() if store == "columnar" else None)
+
+def seed(service, books):
+    """
+    Fills the service with `books` synthetic books, in bulk batches so the
+    temporary lists stay small.
+    """
+    start = date(1900, 1, 1)
+    for first in range(1, books + 1, SEED_BATCH_SIZE):
+        service.create_books([
+            Book(id=i, title=f"Libro número {i}", author_id=i % 5000 + 1,
+                 publication_date=start + timedelta(days=i % 40000))
+            for i in range(first, min(first + SEED_BATCH_SIZE, books + 1))
+        ])
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+def walk_pages(service, page_size):
+    """
+    Reads and serializes every page, returning the number of books.
+    """
+    count = 0
+    after_id = None
+    while True:
+        page = service.get_books_page(after_id, page_size)
+        if not page:
+            return count
+        BOOK_LIST_ADAPTER.dump_json(page)
+        count += len(page)
+        after_id = page[-1].id
+
+def lookup(service, books):
+    ids = random.Random(7).choices(range(1, books + 1), k=LOOKUPS)
+    for book_id in ids:
+        service.get_book_by_id(book_id)
+    return len(ids)
+
+def export(service):
+    return sum(len(batch) for batch in service.iter_book_rows(EXPORT_BATCH_SIZE))
+
+def measure(store, books, page_size):
+    """
+    Runs every measurement for one store in the current process.
+    """
+    gc.collect()
+    baseline = current_rss_mb()
+    service = build_service(store)
+    _, seconds = timed(lambda: seed(service, books))
+    gc.collect()
+    growth = current_rss_mb() - baseline
+    report = {
+        "seed_seconds": round(seconds, 2),
+        "memory": {
+            "rss_growth_mb": round(growth, 1),
+            "bytes_per_book": round(growth * 2**20 / books),
+        },
+    }
+    count, seconds = timed(lambda: walk_pages(service, page_size))
+    report["page"] = {"books_per_second": round(count / seconds)}
+    _, seconds = timed(lambda: BOOK_LIST_ADAPTER.dump_json(service.get_all_books()))
+    report["full_list"] = {"seconds": round(seconds, 2)}
+    count, seconds = timed(lambda: lookup(service, books))
+    report["lookup"] = {"reads_per_second": round(count / seconds)}
+    count, seconds = timed(lambda: export(service))
+    report["export"] = {"rows_per_second": round(count / seconds)}
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--store", choices=STORES,
+                        help="Measure only this store, in this process.")
+    args = parser.parse_args()
+
+    if args.store:
+        print(json.dumps(measure(args.store, args.books, args.page_size)))
+        return
+    # Un proceso por almacén: la RSS de uno no se mezcla con la del otro
+    report = {"books": args.books, "page_size": args.page_size}
+    for store in STORES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--books", str(args.books),
+             "--page-size", str(args.page_size), "--store", store],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        report[store] = json.loads(output)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark of the publication date index behind GET /books/book?published_from=...
+
+Builds a DateIndex over `--books` books with publication dates spread
+uniformly over `--years` years, in bulk batches the way a bulk import
+does, and reports:
+- build: books indexed per second and resident set size (RSS) growth
+- ranges: latency percentiles of `--queries` pages of `--limit` books,
+  oldest first and latest first, for random ranges and for the page
+  after a random cursor
+- scan: the time of the same page answered by a scan of every book
+  comparing publication_date, as it would be without the index
+- updates: single-book date changes per second
+
+Usage (from the FastAPI directory):
+    python benchmarks/date_range.py --books 5000000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from models.book import Book
+from services.date_index import DateIndex
+from title_search import current_rss_mb, percentiles
+
+BUILD_BATCH_SIZE = 10_000
+FIRST_DATE = date(1900, 1, 1)
+SCAN_QUERIES = 3
+
+def publication_date(book_id, days):
+    return FIRST_DATE + timedelta(days=random.Random(book_id).randrange(days))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=5_000_000)
+    parser.add_argument("--years", type=int, default=120)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    days = args.years * 365
+    generator = random.Random(42)
+    # Millones de objetos de larga vida: el recolector cíclico solo añadiría pasadas
+    gc.disable()
+    books = [Book(id=book_id, title="", author_id=1,
+                  publication_date=publication_date(book_id, days))
+             for book_id in range(1, args.books + 1)]
+    index = DateIndex()
+    baseline = current_rss_mb()
+    started = time.perf_counter()
+    for first in range(0, args.books, BUILD_BATCH_SIZE):
+        index.add_many(books[first:first + BUILD_BATCH_SIZE])
+    seconds = time.perf_counter() - started
+    growth = current_rss_mb() - baseline
+    report = {
+        "books": args.books,
+        "index": index.statistics(),
+        "build": {
+            "books_per_second": round(args.books / seconds),
+            "rss_growth_mb": round(growth, 1),
+            "bytes_per_book": round(growth * 2**20 / args.books),
+        },
+        "ranges": {},
+    }
+
+    def random_range():
+        start = FIRST_DATE + timedelta(days=generator.randrange(days))
+        return start, start + timedelta(days=generator.randrange(1, 3650))
+
+    for descending in (False, True):
+        for with_cursor in (False, True):
+            latencies = []
+            for _ in range(args.queries):
+                published_from, published_to = random_range()
+                after = None
+                if with_cursor:
+                    book = books[generator.randrange(args.books)]
+                    after = (book.publication_date, book.id)
+                started = time.perf_counter()
+                index.page(published_from, published_to, descending, after, args.limit)
+                latencies.append(time.perf_counter() - started)
+            name = ("latest_first" if descending else "oldest_first") + (
+                "_after_cursor" if with_cursor else "")
+            report["ranges"][name] = percentiles(latencies)
+
+    scans = []
+    for _ in range(SCAN_QUERIES):
+        published_from, published_to = random_range()
+        started = time.perf_counter()
+        matches = [book for book in books
+                   if published_from <= book.publication_date <= published_to]
+        matches.sort(key=lambda book: (book.publication_date, book.id))
+        del matches[args.limit:]
+        scans.append(time.perf_counter() - started)
+    report["scan_ms"] = round(sum(scans) / len(scans) * 1000, 1)
+
+    updates = min(args.books, 20_000)
+    started = time.perf_counter()
+    for position in generator.sample(range(args.books), updates):
+        book = books[position]
+        index.remove(book)
+        index.add(book.model_copy(update={"publication_date": FIRST_DATE}))
+    report["updates_per_second"] = round(updates / (time.perf_counter() - started))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark of the memory used by the streaming book export.
+
+Seeds an in-memory BookService, then measures the resident set size (RSS)
+while the NDJSON export is consumed batch by batch, and compares it with
+building the whole list response the way GET /books/book?all=true does.
+
+Usage (from the FastAPI directory):
+    python benchmarks/export_memory.py --rows 1000000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from fastapi.encoders import jsonable_encoder
+from helpers.export import EXPORT_BATCH_SIZE, iter_export
+from models.book import Book
+from services.book_service import BookService
+
+BOOK_FIELDS = ("id", "title", "author_id", "publication_date", "version")
+
+def current_rss_mb():
+    """
+    Returns the current resident set size of the process in MiB.
+    """
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def seed(service, rows):
+    """
+    Fills the service with `rows` synthetic books.
+    """
+    start = date(1900, 1, 1)
+    service.create_books([
+        Book(id=i, title=f"Libro número {i}", author_id=i % 5000 + 1,
+             publication_date=start + timedelta(days=i % 40000))
+        for i in range(1, rows + 1)
+    ])
+
+def measure_export(service, sample_every):
+    """
+    Consumes the NDJSON export and returns (bytes, peak RSS, seconds).
+    """
+    written = 0
+    peak = current_rss_mb()
+    started = time.perf_counter()
+    export = iter_export(service.iter_book_rows(EXPORT_BATCH_SIZE), BOOK_FIELDS, "ndjson")
+    for batch_number, chunk in enumerate(export):
+        written += len(chunk)
+        if batch_number % sample_every == 0:
+            peak = max(peak, current_rss_mb())
+    return written, max(peak, current_rss_mb()), time.perf_counter() - started
+
+def measure_full_list(service):
+    """
+    Serializes the full list in memory and returns (bytes, peak RSS, seconds).
+    """
+    started = time.perf_counter()
+    body = json.dumps(jsonable_encoder(service.get_all_books())).encode()
+    peak = current_rss_mb()
+    return len(body), peak, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-full-list", action="store_true",
+                        help="Do not measure the in-memory list serialization.")
+    args = parser.parse_args()
+
+    service = BookService()
+    seed(service, args.rows)
+    gc.collect()
+    baseline = current_rss_mb()
+
+    report = {"rows": args.rows, "baseline_rss_mb": round(baseline, 1)}
+    written, peak, seconds = measure_export(service, sample_every=10)
+    report["streaming_export"] = {
+        "bytes": written,
+        "peak_rss_mb": round(peak, 1),
+        "rss_growth_mb": round(peak - baseline, 1),
+        "seconds": round(seconds, 2),
+    }
+    if not args.skip_full_list:
+        gc.collect()
+        written, peak, seconds = measure_full_list(service)
+        report["full_list"] = {
+            "bytes": written,
+            "peak_rss_mb": round(peak, 1),
+            "rss_growth_mb": round(peak - baseline, 1),
+            "seconds": round(seconds, 2),
+        }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
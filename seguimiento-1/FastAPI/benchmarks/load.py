@@ -0,0 +1,288 @@
+"""
+End-to-end load benchmark of the book and author routes.
+
+Seeds synthetic authors and books, then runs a mixed read/write workload
+over every route of author_route.py and book_route.py with a fixed number
+of concurrent clients. By default the application is driven in-process
+through httpx's ASGI transport; with --url the requests go over a real
+socket to a running server (which must use the same dataset size).
+
+The report is printed as JSON (and optionally written with --output):
+throughput, p50/p95/p99 latency per operation and overall, error counts
+and the peak RSS of this process.
+
+Usage (from the FastAPI directory):
+    python benchmarks/load.py --scale 100k --concurrency 32 --duration 30
+    python benchmarks/load.py --url http://localhost:8000 --scale 1k
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+# Operación -> peso relativo dentro de la carga mixta
+WORKLOAD = {
+    "get_book": 30,
+    "list_books": 10,
+    "get_author": 15,
+    "list_authors": 5,
+    "get_author_books": 10,
+    "create_book": 8,
+    "update_book": 6,
+    "delete_book": 4,
+    "create_author": 3,
+    "update_author": 3,
+    "delete_author": 1,
+    "bulk_books": 1,
+    "bulk_authors": 1,
+    "export_authors": 1,
+    "export_books": 1,
+    "book_cache": 1,
+    "author_cache": 1,
+}
+START_DATE = date(1900, 1, 1)
+
+def synthetic_author(author_id):
+    return {"id": author_id, "name": f"Autor {author_id}",
+            "nationality": f"Nacionalidad {author_id % 200}"}
+
+def synthetic_book(book_id, author_count):
+    return {"id": book_id, "title": f"Libro número {book_id}",
+            "author_id": book_id % author_count + 1,
+            "publication_date": (START_DATE + timedelta(days=book_id % 40000)).isoformat()}
+
+class Workload:
+    """
+    Generates the requests of the mixed workload and tracks the live ids.
+    """
+
+    def __init__(self, books, authors, seed, excluded=()):
+        self.random = random.Random(seed)
+        self.book_count = books
+        self.author_count = authors
+        self.next_id = itertools.count(max(books, authors) + 1)
+        self.created_books = []
+        self.created_authors = []
+        self.operations = [name for name in WORKLOAD if name not in excluded]
+        self.weights = [WORKLOAD[name] for name in self.operations]
+
+    def choose(self):
+        return self.random.choices(self.operations, self.weights)[0]
+
+    def request(self, operation):  # pylint: disable=too-many-return-statements
+        """
+        Returns (method, path, json body or None) for an operation.
+        """
+        rnd = self.random
+        book_id = rnd.randint(1, self.book_count)
+        author_id = rnd.randint(1, self.author_count)
+        if operation == "get_book":
+            return "GET", f"/books/book/{book_id}", None
+        if operation == "list_books":
+            return "GET", "/books/book?limit=100", None
+        if operation == "get_author":
+            return "GET", f"/authors/author/{author_id}", None
+        if operation == "list_authors":
+            return "GET", "/authors/author?limit=100", None
+        if operation == "get_author_books":
+            return "GET", f"/authors/author/{author_id}/books", None
+        if operation == "create_book":
+            new_id = next(self.next_id)
+            self.created_books.append(new_id)
+            return "POST", "/books/book", synthetic_book(new_id, self.author_count)
+        if operation == "update_book":
+            book = synthetic_book(book_id, self.author_count)
+            book["title"] += " (revisado)"
+            return "PUT", f"/books/book/{book_id}", book
+        if operation == "delete_book":
+            if not self.created_books:
+                return self.request("create_book")
+            return "DELETE", f"/books/book/{self.created_books.pop()}", None
+        if operation == "create_author":
+            new_id = next(self.next_id)
+            self.created_authors.append(new_id)
+            return "POST", "/authors/author", synthetic_author(new_id)
+        if operation == "update_author":
+            author = synthetic_author(author_id)
+            author["name"] += " (revisado)"
+            return "PUT", f"/authors/author/{author_id}", author
+        if operation == "delete_author":
+            if not self.created_authors:
+                return self.request("create_author")
+            return "DELETE", f"/authors/author/{self.created_authors.pop()}", None
+        if operation == "bulk_books":
+            ids = [next(self.next_id) for _ in range(100)]
+            self.created_books.extend(ids)
+            return "POST", "/books/bulk", [synthetic_book(i, self.author_count) for i in ids]
+        if operation == "bulk_authors":
+            ids = [next(self.next_id) for _ in range(100)]
+            self.created_authors.extend(ids)
+            return "POST", "/authors/bulk", [synthetic_author(i) for i in ids]
+        if operation == "export_authors":
+            return "GET", "/authors/export", None
+        if operation == "export_books":
+            return "GET", "/books/export", None
+        if operation == "book_cache":
+            return "GET", "/books/cache", None
+        return "GET", "/authors/cache", None
+
+async def seed_over_http(client, books, authors):
+    """
+    Loads the dataset through the NDJSON bulk endpoints.
+    """
+    for path, count, make in (("/authors/bulk", authors, synthetic_author),
+                              ("/books/bulk", books,
+                               lambda i: synthetic_book(i, authors))):
+        for start in range(1, count + 1, 50_000):
+            stop = min(start + 50_000, count + 1)
+            body = "\n".join(json.dumps(make(i)) for i in range(start, stop))
+            response = await client.post(path, content=body,
+                                         headers={"content-type": "application/x-ndjson"})
+            response.raise_for_status()
+
+def seed_in_process(books, authors):
+    """
+    Loads the dataset straight into the services of the application.
+    """
+    # pylint: disable=import-outside-toplevel
+    from models.author import Author
+    from models.book import Book
+    from services.instances import author_service, book_service
+    for start in range(1, authors + 1, 50_000):
+        author_service.create_authors([Author(**synthetic_author(i))
+                                       for i in range(start, min(start + 50_000, authors + 1))])
+    for start in range(1, books + 1, 50_000):
+        book_service.create_books([Book(**synthetic_book(i, authors))
+                                   for i in range(start, min(start + 50_000, books + 1))])
+
+async def run_client(client, workload, deadline, results):
+    """
+    Sends requests until `deadline`, recording (operation, seconds, ok).
+    """
+    while time.perf_counter() < deadline:
+        operation = workload.choose()
+        method, path, body = workload.request(operation)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        results.append((operation, time.perf_counter() - started, ok))
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(timings, elapsed):
+    timings = sorted(timings)
+    return {
+        "requests": len(timings),
+        "throughput_rps": round(len(timings) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 3) if timings else None,
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3) if timings else None,
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 3) if timings else None,
+    }
+
+def peak_rss_mb():
+    # ru_maxrss está en KiB en Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+async def run(args):
+    books = SCALES.get(args.scale.lower()) or int(args.scale)
+    authors = max(1, books // args.books_per_author)
+    headers = {"x-api-key": args.api_key} if args.api_key else {}
+    workload = Workload(books, authors, args.seed, args.exclude)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, headers=headers, timeout=60)
+        lifespan = None
+    else:
+        sys.path.insert(0, str(APP_DIR))
+        from main import app  # pylint: disable=import-outside-toplevel
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                   base_url="http://benchmark", headers=headers, timeout=60)
+        lifespan = app.router.lifespan_context(app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            seeding = time.perf_counter()
+            if args.url or args.seed_over_http:
+                await seed_over_http(client, books, authors)
+            else:
+                seed_in_process(books, authors)
+            seed_seconds = time.perf_counter() - seeding
+
+            results = []
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(run_client(client, workload, deadline, results)
+                                   for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    by_operation = {}
+    for operation, seconds, ok in results:
+        entry = by_operation.setdefault(operation, {"timings": [], "errors": 0})
+        entry["timings"].append(seconds)
+        entry["errors"] += not ok
+    return {
+        "target": args.url or "in-process",
+        "storage_backend": os.getenv("STORAGE_BACKEND", "memory"),
+        "books": books,
+        "authors": authors,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "seed_s": round(seed_seconds, 2),
+        "overall": {**summarize([seconds for _, seconds, _ in results], elapsed),
+                    "errors": sum(not ok for _, _, ok in results)},
+        "operations": {
+            operation: {**summarize(entry["timings"], elapsed), "errors": entry["errors"]}
+            for operation, entry in sorted(by_operation.items())
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", default="1k",
+                        help="Number of books: 1k, 100k, 1m or an integer.")
+    parser.add_argument("--books-per-author", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load.")
+    parser.add_argument("--url", help="Base URL of a running server (real socket).")
+    parser.add_argument("--seed-over-http", action="store_true",
+                        help="Seed through the bulk endpoints also in-process.")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY"))
+    parser.add_argument("--exclude", nargs="*", default=[], choices=list(WORKLOAD),
+                        help="Operations left out of the workload (e.g. export_books).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the workload.")
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark of the per-request overhead of MetricsMiddleware.
+
+Drives a minimal ASGI application directly (no HTTP server, no client) with
+and without the middleware and reports the extra time per request, plus the
+cost of a single MetricsRegistry.observe call.
+
+Usage (from the FastAPI directory):
+    python benchmarks/metrics_overhead.py --requests 200000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from helpers.metrics import MetricsMiddleware, MetricsRegistry
+
+class FakeRoute:  # pylint: disable=too-few-public-methods
+    """
+    Stands in for the route that the FastAPI router stores in the scope.
+    """
+    path = "/books/book/{book_id}"
+
+ROUTE = FakeRoute()
+BODY = b'{"id":1,"title":"Cien a\xc3\xb1os de soledad","author_id":1}'
+
+async def endpoint(scope, receive, send):
+    """
+    Minimal ASGI application: reads the request and sends a small body.
+    """
+    scope["route"] = ROUTE
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": BODY})
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(_message):
+    pass
+
+async def drive(app, requests):
+    """
+    Sends `requests` requests to `app` and returns the seconds taken.
+    """
+    started = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/books/book/1"}
+        await app(scope, receive, send)
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    middleware = MetricsMiddleware(endpoint, MetricsRegistry())
+    bare = min(asyncio.run(drive(endpoint, args.requests)) for _ in range(args.repeat))
+    measured = min(asyncio.run(drive(middleware, args.requests)) for _ in range(args.repeat))
+
+    registry = MetricsRegistry()
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        registry.observe("GET", ROUTE.path, 200, 0.0042, 0, len(BODY))
+    observe = time.perf_counter() - started
+
+    print(json.dumps({
+        "requests": args.requests,
+        "bare_us_per_request": round(bare / args.requests * 1e6, 3),
+        "with_metrics_us_per_request": round(measured / args.requests * 1e6, 3),
+        "overhead_us_per_request": round((measured - bare) / args.requests * 1e6, 3),
+        "observe_us": round(observe / args.requests * 1e6, 3),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
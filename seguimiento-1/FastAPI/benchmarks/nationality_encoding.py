@@ -0,0 +1,140 @@
+"""
+Benchmark of the dictionary encoding of the author nationality.
+
+Each author is built with its own nationality string, the way every
+request parses one, and stored two ways, each in a fresh process:
+- plain: in a MemoryStore, as the authors were kept before the encoding,
+  filtering by nationality with a scan of string comparisons, plus the
+  name index (PrefixIndex) the service keeps either way
+- encoded: through AuthorService, which shares one string per distinct
+  nationality and serves the filter from its code -> author ids index
+
+Both modes hold the name index so that the difference is the encoding
+alone: the nationality strings saved against the code -> ids index.
+
+Reports the resident set size (RSS) growth per author and the time of a
+full nationality filter and of its first page.
+
+Usage (from the FastAPI directory):
+    python benchmarks/nationality_encoding.py --authors 5000000
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from helpers.pagination import DEFAULT_PAGE_LIMIT
+from models.author import Author
+from services.author_service import AuthorService
+from services.book_service import BookService
+from services.memory_store import MemoryStore
+from services.prefix_index import PrefixIndex
+
+MODES = ("plain", "encoded")
+SEED_BATCH_SIZE = 10_000
+
+def current_rss_mb():
+    """
+    Returns the current resident set size of the process in MiB.
+    """
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def nationality_of(author_id, nationalities):
+    # Cadena nueva en cada llamada, como la que deja cada petición
+    return f"Nacionalidad {author_id % nationalities}"
+
+def seed(put_batch, authors, nationalities):
+    for first in range(1, authors + 1, SEED_BATCH_SIZE):
+        put_batch([
+            Author(id=i, name=f"Autor {i}", nationality=nationality_of(i, nationalities))
+            for i in range(first, min(first + SEED_BATCH_SIZE, authors + 1))
+        ])
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+def measure(mode, authors, nationalities):
+    """
+    Runs every measurement for one storage mode in the current process.
+    """
+    # Millones de objetos de larga vida: el recolector cíclico solo añadiría pasadas
+    gc.disable()
+    baseline = current_rss_mb()
+    if mode == "plain":
+        store = MemoryStore()
+        name_index = PrefixIndex()
+
+        def put_batch(batch):
+            for author in batch:
+                store.put(author)
+            name_index.add_many((author.id, author.name) for author in batch)
+
+        def filter_all(nationality):
+            return [author for author in store.values() if author.nationality == nationality]
+
+        def first_page(nationality):
+            return store.page(None, DEFAULT_PAGE_LIMIT,
+                              where=lambda author: author.nationality == nationality)
+    else:
+        service = AuthorService(BookService())
+        put_batch = service.create_authors
+        filter_all = service.get_all_authors
+
+        def first_page(nationality):
+            return service.get_authors_page(None, DEFAULT_PAGE_LIMIT, nationality)
+    _, seconds = timed(lambda: seed(put_batch, authors, nationalities))
+    growth = current_rss_mb() - baseline
+    report = {
+        "seed_seconds": round(seconds, 2),
+        "rss_growth_mb": round(growth, 1),
+        "bytes_per_author": round(growth * 2**20 / authors),
+    }
+    # Se consulta la última nacionalidad: sus autores están repartidos por todo el almacén
+    nationality = nationality_of(nationalities - 1, nationalities)
+    found, seconds = timed(lambda: filter_all(nationality))
+    report["filter_all"] = {"authors": len(found), "seconds": round(seconds, 4)}
+    _, seconds = timed(lambda: first_page(nationality))
+    report["first_page_ms"] = round(seconds * 1000, 3)
+    if mode == "encoded":
+        report["distinct_nationalities"] = len(service.nationalities)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--authors", type=int, default=5_000_000)
+    parser.add_argument("--nationalities", type=int, default=300)
+    parser.add_argument("--mode", choices=MODES,
+                        help="Measure only this mode, in this process.")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.authors, args.nationalities)))
+        return
+    # Un proceso por modo: la RSS de uno no se mezcla con la del otro
+    report = {"authors": args.authors, "nationalities": args.nationalities}
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--authors", str(args.authors),
+             "--nationalities", str(args.nationalities), "--mode", mode],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        report[mode] = json.loads(output)
+    plain, encoded = report["plain"], report["encoded"]
+    report["saved_bytes_per_author"] = plain["bytes_per_author"] - encoded["bytes_per_author"]
+    report["saved_mb"] = round(plain["rss_growth_mb"] - encoded["rss_growth_mb"], 1)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark of the recovery time of the journaled in-memory services.
+
+Writes `--records` books (plus one author per 200 books) through a
+journaled BookService in bulk batches, then measures how long a fresh
+process state takes to recover them:
+- journal: replaying every change from the append-only log
+- snapshot: loading a snapshot taken after the writes
+- snapshot_and_tail: loading that snapshot and replaying `--tail` updates
+  written after it
+
+Usage (from the FastAPI directory):
+    python benchmarks/recovery.py --records 1000000
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from models.author import Author
+from models.book import Book
+from services.author_service import AuthorService
+from services.book_service import BookService
+from services.change_log import ChangeLog
+from services.journal import Journal
+
+BATCH_SIZE = 1000
+BOOKS_PER_AUTHOR = 200
+
+def open_services(directory):
+    """
+    Builds journaled services on `directory`, recovering what it holds.
+
+    :return: Tuple (book_service, author_service, journal, recovery).
+    """
+    change_log = ChangeLog(1000)
+    book_service = BookService(change_log)
+    author_service = AuthorService(book_service, change_log)
+    # Sin instantáneas periódicas: el benchmark las pide explícitamente
+    journal = Journal(directory, snapshot_seconds=0)
+    recovery = journal.open(book_service, author_service, change_log)
+    return book_service, author_service, journal, recovery
+
+def write_records(directory, records):
+    """
+    Writes the authors and books in bulk batches and returns the seconds.
+    """
+    book_service, author_service, journal, _ = open_services(directory)
+    start = date(1900, 1, 1)
+    started = time.perf_counter()
+    authors = records // BOOKS_PER_AUTHOR + 1
+    author_service.create_authors([
+        Author(id=i, name=f"Autor {i}", nationality="CO") for i in range(1, authors + 1)
+    ])
+    for first in range(1, records + 1, BATCH_SIZE):
+        book_service.create_books([
+            Book(id=i, title=f"Libro número {i}", author_id=i % authors + 1,
+                 publication_date=start + timedelta(days=i % 40000))
+            for i in range(first, min(first + BATCH_SIZE, records + 1))
+        ])
+        journal.wait_durable()
+    seconds = time.perf_counter() - started
+    journal.close()
+    return seconds
+
+def measure_recovery(directory):
+    """
+    Recovers the services from `directory` and reports the time taken.
+    """
+    gc.collect()
+    book_service, _, journal, recovery = open_services(directory)
+    result = {
+        "books": len(book_service.books),
+        "loaded": recovery["loaded"],
+        "replayed": recovery["replayed"],
+        "seconds": round(recovery["seconds"], 2),
+    }
+    return result, book_service, journal
+
+def directory_size_mb(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory)) / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=100_000,
+                        help="Updates written after the snapshot.")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="journal-benchmark-")
+    try:
+        report = {"records": args.records}
+        write_seconds = write_records(directory, args.records)
+        report["write"] = {
+            "seconds": round(write_seconds, 2),
+            "records_per_second": round(args.records / write_seconds),
+            "journal_mb": round(directory_size_mb(directory), 1),
+        }
+
+        report["journal"], _, journal = measure_recovery(directory)
+        journal.snapshot()
+        journal.close()
+        report["snapshot_mb"] = round(directory_size_mb(directory), 1)
+
+        report["snapshot"], book_service, journal = measure_recovery(directory)
+        for book_id in range(1, min(args.tail, args.records) + 1):
+            book = book_service.get_book_by_id(book_id)
+            book_service.update_book(book_id, book.model_copy(update={"title": "Nuevo"}))
+        journal.close()
+
+        report["snapshot_and_tail"], _, journal = measure_recovery(directory)
+        journal.close()
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Performance regression gate for the book and author services and routes.
+
+Runs timed scenarios (create, get, list, update and delete of books and
+authors) at the service layer and through the routes (in-process ASGI).
+After a warm-up pass, the scenarios are run round-robin --runs times so
+that slow phases of a noisy machine hit all of them alike, and each
+sample is divided by a fixed CPU-bound calibration workload timed right
+before it. The resulting relative costs are compared with the committed
+baseline (benchmarks/baseline.json) using Welch's t-test: a scenario
+regresses when its mean relative cost is significantly (one-sided, 95 %)
+higher than the baseline mean increased by --threshold. The script exits
+with status 1 if any scenario regresses. Absolute times per operation are
+reported for information only.
+
+The scenarios listed in ACCEPTED_COSTS are compared with their baseline
+mean multiplied by the factor accepted there, with the reason: the indexes
+each write has maintained since the baseline was recorded, and the
+versioning, change feed, conditional GET and list parameters of the routes. The baseline itself is
+never re-recorded to absorb them: each factor is reviewed on its own, and
+any cost beyond it still fails the gate.
+
+Timings depend on the machine, so the baseline must be recorded on the
+runner that enforces the gate:
+    python benchmarks/regression_gate.py --update-baseline
+
+Usage (from the FastAPI directory):
+    python benchmarks/regression_gate.py --threshold 0.10
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+import httpx
+from models.author import Author
+from models.book import Book
+from services.author_service import AuthorService
+from services.book_service import BookService
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+SEED_RECORDS = 10_000
+BOOK_INDEXES = ("search (user-021), title prefix (user-022), date (user-023) "
+                "and /stats tallies (user-024) indexes")
+AUTHOR_INDEXES = "name prefix (user-022), nationality (user-020) and /stats tally (user-024)"
+CONDITIONAL_GET = "If-None-Match/If-Modified-Since headers, ETag and Last-Modified (user-015)"
+LIST_PARAMETERS = ("conditional GET (user-015) and the nationality (user-020), date range "
+                   "(user-023) and ?ids= (user-025) parameters")
+ROUTE_WRITES = ("If-Match and ETag (user-014), the /changes log and event stream "
+                "(user-016, user-017) and the indexes above")
+# Escenario -> (factor aceptado sobre la media de la línea base, motivo).
+# Medido con 10k registros: trabajo que la línea base no hacía y que las peticiones
+# siguientes añadieron a propósito. Un coste mayor sigue siendo una regresión.
+ACCEPTED_COSTS = {
+    "service.book.create": (5.0, BOOK_INDEXES),
+    "service.book.update": (2.2, BOOK_INDEXES),
+    "service.book.delete": (17.0, BOOK_INDEXES),
+    "service.author.create": (4.5, AUTHOR_INDEXES),
+    "service.author.update": (2.0, AUTHOR_INDEXES),
+    "service.author.delete": (15.0, AUTHOR_INDEXES),
+    "route.book.create": (1.25, ROUTE_WRITES),
+    "route.book.update": (1.25, ROUTE_WRITES),
+    "route.book.delete": (1.25, ROUTE_WRITES),
+    "route.author.create": (1.25, ROUTE_WRITES),
+    "route.author.update": (1.25, ROUTE_WRITES),
+    "route.author.delete": (1.25, ROUTE_WRITES),
+    "route.book.get": (1.3, CONDITIONAL_GET),
+    "route.author.get": (1.3, CONDITIONAL_GET),
+    "route.book.list": (1.35, LIST_PARAMETERS),
+    "route.author.list": (1.35, LIST_PARAMETERS),
+}
+# Cuantiles de la t de Student para 0.95 y 0.975 con 1..30 grados de libertad
+T_95 = (6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812,
+        1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725,
+        1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703, 1.701, 1.699, 1.697)
+T_975 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+def t_quantile(table, normal, degrees):
+    """
+    Student t quantile from `table`, or the normal one beyond 30 d.o.f.
+    """
+    if degrees > len(table):
+        return normal
+    return table[max(1, int(degrees)) - 1]
+
+def make_book(book_id, title="Libro"):
+    return Book(id=book_id, title=f"{title} {book_id}", author_id=book_id % 1000 + 1,
+                publication_date=date(2000, 1, 1))
+
+def make_author(author_id, name="Autor"):
+    return Author(id=author_id, name=f"{name} {author_id}", nationality="Colombiana")
+
+def seeded_book_service():
+    service = BookService()
+    service.create_books([make_book(i) for i in range(1, SEED_RECORDS + 1)])
+    return service
+
+def seeded_author_service():
+    service = AuthorService(BookService())
+    service.create_authors([make_author(i) for i in range(1, SEED_RECORDS + 1)])
+    return service
+
+def service_scenarios(operations):
+    """
+    Returns {name: callable} timing `operations` service calls each.
+    Every callable returns the seconds spent in the timed section.
+    """
+    ids = list(range(SEED_RECORDS + 1, SEED_RECORDS + operations + 1))
+    existing = list(range(1, operations + 1))
+
+    def timed(setup, body):
+        def scenario():
+            state = setup()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                body(state)
+                return time.perf_counter() - started
+            finally:
+                gc.enable()
+        return scenario
+
+    return {
+        "service.book.create": timed(seeded_book_service, lambda s: [
+            s.create_book(make_book(i)) for i in ids]),
+        "service.book.get": timed(seeded_book_service, lambda s: [
+            s.get_book_by_id(i) for i in existing]),
+        "service.book.list": timed(seeded_book_service, lambda s: [
+            s.get_books_page(i, 100) for i in existing]),
+        "service.book.update": timed(seeded_book_service, lambda s: [
+            s.update_book(i, make_book(i, "Revisado")) for i in existing]),
+        "service.book.delete": timed(seeded_book_service, lambda s: [
+            s.delete_book(i) for i in existing]),
+        "service.author.create": timed(seeded_author_service, lambda s: [
+            s.create_author(make_author(i)) for i in ids]),
+        "service.author.get": timed(seeded_author_service, lambda s: [
+            s.get_author_by_id(i) for i in existing]),
+        "service.author.list": timed(seeded_author_service, lambda s: [
+            s.get_authors_page(i, 100) for i in existing]),
+        "service.author.update": timed(seeded_author_service, lambda s: [
+            s.update_author(i, make_author(i, "Revisado")) for i in existing]),
+        "service.author.delete": timed(seeded_author_service, lambda s: [
+            s.delete_author(i) for i in existing]),
+    }
+
+def route_scenarios(operations):
+    """
+    Returns {name: callable} timing `operations` requests each through the
+    in-process ASGI app. Each create run is undone by the delete run.
+    """
+    from main import app  # pylint: disable=import-outside-toplevel
+    headers = {"x-api-key": os.getenv("API_KEY")} if os.getenv("API_KEY") else {}
+    ids = list(range(10 * SEED_RECORDS + 1, 10 * SEED_RECORDS + operations + 1))
+
+    async def send_all(requests):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gate",
+                                     headers=headers) as client:
+            started = time.perf_counter()
+            for method, path, body in requests:
+                (await client.request(method, path, json=body)).raise_for_status()
+            return time.perf_counter() - started
+
+    def book_json(i, title="Libro"):
+        return make_book(i, title).model_dump(mode="json")
+
+    def author_json(i, name="Autor"):
+        return make_author(i, name).model_dump(mode="json")
+
+    def timed(requests):
+        return lambda: asyncio.run(send_all(requests))
+
+    return {
+        "route.author.create": timed([("POST", "/authors/author", author_json(i))
+                                      for i in ids]),
+        "route.author.get": timed([("GET", f"/authors/author/{i}", None) for i in ids]),
+        "route.author.list": timed([("GET", "/authors/author?limit=100", None)
+                                    for _ in ids]),
+        "route.author.update": timed([("PUT", f"/authors/author/{i}", author_json(i, "Otro"))
+                                      for i in ids]),
+        "route.book.create": timed([("POST", "/books/book", book_json(i)) for i in ids]),
+        "route.book.get": timed([("GET", f"/books/book/{i}", None) for i in ids]),
+        "route.book.list": timed([("GET", "/books/book?limit=100", None) for _ in ids]),
+        "route.book.update": timed([("PUT", f"/books/book/{i}", book_json(i, "Otro"))
+                                    for i in ids]),
+        "route.book.delete": timed([("DELETE", f"/books/book/{i}", None) for i in ids]),
+        "route.author.delete": timed([("DELETE", f"/authors/author/{i}", None) for i in ids]),
+    }
+
+def summarize(samples):
+    """
+    Mean, standard deviation and 95 % confidence interval of the samples.
+    """
+    mean = statistics.fmean(samples)
+    stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    margin = t_quantile(T_975, 1.960, len(samples) - 1) * stdev / math.sqrt(len(samples))
+    return {
+        "mean": mean,
+        "stdev": stdev,
+        "runs": len(samples),
+        "ci95": [mean - margin, mean + margin],
+    }
+
+def is_regression(current, baseline, threshold, accepted=1.0):
+    """
+    Welch's one-sided t-test of current mean > baseline mean * accepted *
+    (1 + threshold).
+    """
+    allowed = baseline["mean"] * accepted * (1 + threshold)
+    allowed_stdev = baseline["stdev"] * accepted * (1 + threshold)
+    var_current = current["stdev"] ** 2 / current["runs"]
+    var_baseline = allowed_stdev ** 2 / baseline["runs"]
+    difference = current["mean"] - allowed
+    standard_error = math.sqrt(var_current + var_baseline)
+    if standard_error == 0:
+        return difference > 0
+    degrees = (var_current + var_baseline) ** 2 / (
+        var_current ** 2 / max(1, current["runs"] - 1)
+        + var_baseline ** 2 / max(1, baseline["runs"] - 1))
+    return difference / standard_error > t_quantile(T_95, 1.645, degrees)
+
+def calibration():
+    """
+    Fixed CPU-bound workload used as the unit of the relative costs.
+    Returns the seconds it took.
+    """
+    started = time.perf_counter()
+    table = {}
+    for i in range(100_000):
+        table[i] = str(i)
+    for i in range(100_000):
+        table.get(i)
+    return time.perf_counter() - started
+
+def measure(scenarios, runs):
+    """
+    Warms every scenario up, then runs them round-robin `runs` times.
+
+    :param scenarios: {name: (callable returning seconds, operations per call)}.
+    :return: {name: summary of the relative costs, plus the mean us/op}.
+    """
+    for scenario, _ in scenarios.values():
+        scenario()
+    relative = {name: [] for name in scenarios}
+    absolute = {name: [] for name in scenarios}
+    for _ in range(runs):
+        for name, (scenario, operations) in scenarios.items():
+            unit = calibration()
+            seconds = scenario()
+            relative[name].append(seconds / unit)
+            absolute[name].append(seconds / operations * 1e6)
+    return {
+        name: {**summarize(relative[name]),
+               "us_per_op": statistics.median(absolute[name])}
+        for name in scenarios
+    }
+
+def round_summary(summary):
+    return {key: (round(value, 3) if isinstance(value, float) else
+                  [round(bound, 3) for bound in value] if isinstance(value, list) else value)
+            for key, value in summary.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10, help="Timed runs per scenario.")
+    parser.add_argument("--operations", type=int, default=2000,
+                        help="Operations per service-layer run.")
+    parser.add_argument("--route-operations", type=int, default=300,
+                        help="Requests per route-level run.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Tolerated slowdown before a regression (0.10 = 10 %%).")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Record the current results as the new baseline.")
+    args = parser.parse_args()
+
+    scenarios = {name: (scenario, args.operations)
+                 for name, scenario in service_scenarios(args.operations).items()}
+    scenarios.update({name: (scenario, args.route_operations)
+                      for name, scenario in route_scenarios(args.route_operations).items()})
+    results = measure(scenarios, args.runs)
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps({
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "scenarios": {name: round_summary(summary) for name, summary in results.items()},
+        }, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["scenarios"]
+    regressions = []
+    report = {}
+    for name, current in results.items():
+        entry = {"current": round_summary(current)}
+        if name in baseline:
+            entry["baseline_mean"] = baseline[name]["mean"]
+            entry["change"] = round(current["mean"] / baseline[name]["mean"] - 1, 3)
+            accepted, reason = ACCEPTED_COSTS.get(name, (1.0, None))
+            if reason:
+                entry["accepted"] = {"factor": accepted, "reason": reason}
+            entry["regression"] = is_regression(current, baseline[name], args.threshold,
+                                                accepted)
+            if entry["regression"]:
+                regressions.append(name)
+        report[name] = entry
+    print(json.dumps({"threshold": args.threshold, "regressions": regressions,
+                      "scenarios": report}, indent=2))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark of the JSON serialization of list responses.
+
+Compares the default FastAPI path for routes that return pydantic models
+(jsonable_encoder followed by JSONResponse rendering) with the fast path
+used by the routes (TypeAdapter(list[Book]).dump_json), for lists of
+10k and 100k books. Reports the best and median time of each path.
+
+Usage (from the FastAPI directory):
+    python benchmarks/serialization.py --sizes 10000 100000 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from helpers.responses import BOOK_LIST_ADAPTER, json_response
+from models.book import Book
+
+def make_books(count):
+    """
+    Builds `count` synthetic books.
+    """
+    start = date(1900, 1, 1)
+    return [
+        Book(id=i, title=f"Libro número {i}", author_id=i % 5000 + 1,
+             publication_date=start + timedelta(days=i % 40000))
+        for i in range(1, count + 1)
+    ]
+
+def default_path(books):
+    """
+    What FastAPI does for a route returning the list without response_model.
+    """
+    return JSONResponse(jsonable_encoder(books)).body
+
+def fast_path(books):
+    """
+    What the routes do now.
+    """
+    return json_response(BOOK_LIST_ADAPTER, books).body
+
+def time_call(function, books, repeat):
+    """
+    Returns the timings in milliseconds of `repeat` calls.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(books)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        books = make_books(size)
+        assert json.loads(default_path(books)) == json.loads(fast_path(books))
+        default_ms = time_call(default_path, books, args.repeat)
+        fast_ms = time_call(fast_path, books, args.repeat)
+        report.append({
+            "items": size,
+            "jsonable_encoder_ms": {"best": round(min(default_ms), 2),
+                                    "median": round(statistics.median(default_ms), 2)},
+            "dump_json_ms": {"best": round(min(fast_ms), 2),
+                             "median": round(statistics.median(fast_ms), 2)},
+            "speedup": round(statistics.median(default_ms) / statistics.median(fast_ms), 1),
+        })
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark of the incremental counts behind the /stats endpoints.
+
+Loads `--books` books of `--authors` authors into a BookService, in bulk
+batches the way a bulk import does, and reports:
+- reads: latency percentiles of the count of one author, and the time of
+  the whole books per author and books per year maps, read from the
+  counts the service keeps
+- scan: the time of the same maps computed by a group-by over every
+  stored book, as each request would without the counts
+- writes: the cost the counts add to each write, from the increment and
+  decrement rates of a Tally
+- recount: the time of the admin recount, which blocks the writes
+
+Usage (from the FastAPI directory):
+    python benchmarks/stats_counters.py --books 1000000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from models.book import Book
+from services.book_service import BookService
+from services.tally import Tally
+from title_search import percentiles
+
+SEED_BATCH_SIZE = 10_000
+FIRST_DATE = date(1900, 1, 1)
+DAYS = 120 * 365
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--authors", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    generator = random.Random(42)
+    # Millones de objetos de larga vida: el recolector cíclico solo añadiría pasadas
+    gc.disable()
+    service = BookService()
+    for first in range(1, args.books + 1, SEED_BATCH_SIZE):
+        service.create_books([
+            Book(id=book_id, title=f"Libro {book_id}",
+                 author_id=generator.randint(1, args.authors),
+                 publication_date=FIRST_DATE + timedelta(days=generator.randrange(DAYS)))
+            for book_id in range(first, min(first + SEED_BATCH_SIZE, args.books + 1))
+        ])
+
+    latencies = []
+    for _ in range(args.queries):
+        author_id = generator.randint(1, args.authors)
+        _, seconds = timed(lambda: service.count_books_by_author(author_id))
+        latencies.append(seconds)
+    by_author, author_seconds = timed(service.count_books_by_author)
+    by_year, year_seconds = timed(service.count_books_by_year)
+    report = {
+        "books": args.books,
+        "reads": {
+            "one_author": percentiles(latencies),
+            "books_per_author_ms": round(author_seconds * 1000, 2),
+            "books_per_year_ms": round(year_seconds * 1000, 2),
+            "groups": {"authors": len(by_author), "years": len(by_year)},
+        },
+    }
+
+    def scan():
+        books = service.books.values()
+        return (Counter(book.author_id for book in books),
+                Counter(book.publication_date.year for book in books))
+
+    (scanned_authors, scanned_years), seconds = timed(scan)
+    assert scanned_authors == by_author and scanned_years == by_year
+    report["scan_ms"] = round(seconds * 1000, 1)
+
+    tally = Tally()
+    groups = [generator.randint(1, args.authors) for _ in range(args.books)]
+    _, increment_seconds = timed(lambda: [tally.increment(group) for group in groups])
+    _, decrement_seconds = timed(lambda: [tally.decrement(group) for group in groups])
+    report["writes"] = {
+        "increments_per_second": round(args.books / increment_seconds),
+        "decrements_per_second": round(args.books / decrement_seconds),
+    }
+    recount, seconds = timed(service.recount_statistics)
+    report["recount"] = {"seconds": round(seconds, 2), **recount}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark of the prefix index behind GET /books/suggest and GET /authors/suggest.
+
+Builds a PrefixIndex over `--books` synthetic titles (the same generator as
+benchmarks/title_search.py), in bulk the way a restore or a bulk import
+does, and reports:
+- build: titles indexed per second and resident set size (RSS) growth
+- suggestions: latency percentiles of `--queries` suggestions per prefix
+  length, the prefixes cut from the titles of random books
+- updates: single-title adds, removals and title changes per second
+
+Usage (from the FastAPI directory):
+    python benchmarks/suggest.py --books 5000000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from services.prefix_index import PrefixIndex
+from title_search import WordSampler, build_vocabulary, current_rss_mb, percentiles, title
+
+LIMIT = 10
+BUILD_BATCH_SIZE = 10_000
+PREFIX_LENGTHS = (1, 2, 3, 4, 6, 10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=5_000_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    generator = random.Random(42)
+    sampler = WordSampler(build_vocabulary(args.vocabulary, generator))
+    index = PrefixIndex()
+    # Millones de objetos de larga vida: el recolector cíclico solo añadiría pasadas
+    gc.disable()
+    baseline = current_rss_mb()
+    seconds = 0.0
+    for first in range(1, args.books + 1, BUILD_BATCH_SIZE):
+        batch = [(book_id, title(sampler, book_id))
+                 for book_id in range(first, min(first + BUILD_BATCH_SIZE, args.books + 1))]
+        started = time.perf_counter()
+        index.add_many(batch)
+        seconds += time.perf_counter() - started
+    growth = current_rss_mb() - baseline
+    report = {
+        "books": args.books,
+        "index": index.statistics(),
+        "build": {
+            "titles_per_second": round(args.books / seconds),
+            "rss_growth_mb": round(growth, 1),
+        },
+        "suggestions": {},
+    }
+
+    for length in PREFIX_LENGTHS:
+        latencies = []
+        hits = 0
+        for _ in range(args.queries):
+            prefix = title(sampler, generator.randint(1, args.books))[:length]
+            started = time.perf_counter()
+            hits += len(index.suggest(prefix, LIMIT))
+            latencies.append(time.perf_counter() - started)
+        report["suggestions"][f"{length}_chars"] = {**percentiles(latencies),
+                                                    "average_hits": round(hits / args.queries, 1)}
+
+    updates = min(args.books, 20_000)
+    book_ids = generator.sample(range(1, args.books + 1), updates)
+    old_titles = [title(sampler, book_id) for book_id in book_ids]
+    new_titles = [title(sampler, book_id, revision=1) for book_id in book_ids]
+    timings = {}
+    started = time.perf_counter()
+    for book_id, old, new in zip(book_ids, old_titles, new_titles):
+        index.replace(book_id, old, new)
+    timings["replaces_per_second"] = round(updates / (time.perf_counter() - started))
+    started = time.perf_counter()
+    for book_id, new in zip(book_ids, new_titles):
+        index.remove(book_id, new)
+    timings["removes_per_second"] = round(updates / (time.perf_counter() - started))
+    started = time.perf_counter()
+    for book_id, old in zip(book_ids, old_titles):
+        index.add(book_id, old)
+    timings["adds_per_second"] = round(updates / (time.perf_counter() - started))
+    report["updates"] = timings
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
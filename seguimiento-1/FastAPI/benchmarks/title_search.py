@@ -0,0 +1,135 @@
+"""
+Benchmark of the inverted index behind GET /books/search.
+
+Builds a SearchIndex over `--books` synthetic titles of 2 to 7 words,
+drawn from a Zipf-distributed vocabulary of `--vocabulary` accented,
+Spanish-like words (plus stopwords), and reports:
+- build: titles indexed per second and resident set size (RSS) growth
+- queries: latency percentiles of `--queries` searches per query shape,
+  with the words drawn from the same distribution (so frequent words are
+  also frequent in queries)
+- updates: title changes (PUT of a book with a new title) per second
+
+Usage (from the FastAPI directory):
+    python benchmarks/title_search.py --books 5000000
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+# pylint: disable=wrong-import-position
+from services.search_index import SearchIndex
+
+SYLLABLES = ("ca", "lo", "mi", "ñe", "ra", "só", "tu", "ve", "lá", "do", "gre", "chi",
+             "an", "pé", "ru", "que", "bi", "fó", "sa", "ní")
+FILLERS = ("de", "la", "el", "y", "los", "en")
+LIMIT = 20
+
+def current_rss_mb():
+    """
+    Returns the current resident set size of the process in MiB.
+    """
+    with open("/proc/self/statm", encoding="ascii") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def build_vocabulary(size, generator):
+    words = set()
+    while len(words) < size:
+        word = "".join(generator.choices(SYLLABLES, k=generator.randint(2, 4)))
+        words.add(word.capitalize() if generator.random() < 0.3 else word)
+    return sorted(words)
+
+class WordSampler:
+    """
+    Draws words with Zipf (1/rank) frequencies.
+    """
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.cumulative = list(itertools.accumulate(1 / rank
+                                                    for rank in range(1, len(vocabulary) + 1)))
+
+    def sample(self, count, generator):
+        return generator.choices(self.vocabulary, cum_weights=self.cumulative, k=count)
+
+def title(sampler, book_id, revision=0):
+    """
+    Returns the title of a book, the same on every call for the same
+    `book_id` and `revision`.
+    """
+    generator = random.Random(book_id * 1000 + revision)
+    words = sampler.sample(generator.randint(2, 7), generator)
+    if generator.random() < 0.5:
+        words.insert(1, generator.choice(FILLERS))
+    return " ".join(words)
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--books", type=int, default=5_000_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    generator = random.Random(42)
+    sampler = WordSampler(build_vocabulary(args.vocabulary, generator))
+    index = SearchIndex()
+    # Millones de objetos de larga vida: el recolector cíclico solo añadiría pasadas
+    gc.disable()
+    baseline = current_rss_mb()
+    seconds = 0.0
+    for book_id in range(1, args.books + 1):
+        text = title(sampler, book_id)
+        started = time.perf_counter()
+        index.add(book_id, text)
+        seconds += time.perf_counter() - started
+    growth = current_rss_mb() - baseline
+    report = {
+        "books": args.books,
+        "index": index.statistics(),
+        "build": {
+            "titles_per_second": round(args.books / seconds),
+            "rss_growth_mb": round(growth, 1),
+        },
+        "queries": {},
+    }
+
+    for words in (1, 2, 3):
+        latencies = []
+        hits = 0
+        for _ in range(args.queries):
+            query = " ".join(sampler.sample(words, generator))
+            started = time.perf_counter()
+            hits += len(index.search(query, LIMIT))
+            latencies.append(time.perf_counter() - started)
+        report["queries"][f"{words}_words"] = {**percentiles(latencies),
+                                               "average_hits": round(hits / args.queries, 1)}
+
+    updates = min(args.books, 20_000)
+    started = time.perf_counter()
+    for book_id in generator.sample(range(1, args.books + 1), updates):
+        index.replace(book_id, title(sampler, book_id), title(sampler, book_id, revision=1))
+    report["updates_per_second"] = round(updates / (time.perf_counter() - started))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: the application modules import each other relative
+to the app directory, as when uvicorn runs from there.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
@@ -0,0 +1,51 @@
+"""
+Tests of the secondary indexes of the in-memory author service.
+"""
+
+import random
+from models.author import Author
+from services.author_service import AuthorService
+from services.book_service import BookService
+
+NATIONALITIES = ("Colombiana", "Chilena", "Peruana")
+
+def make_author(author_id, nationality, name="Autor"):
+    return Author(id=author_id, name=f"{name} {author_id}", nationality=nationality)
+
+def assert_nationality_index_matches_store(service):
+    authors = service.get_all_authors()
+    for nationality in NATIONALITIES + ("Desconocida",):
+        expected = sorted(author.id for author in authors if author.nationality == nationality)
+        assert [author.id for author in service.get_all_authors(nationality)] == expected
+        # Paginación por cursor sobre el índice
+        pages, after_id = [], None
+        while page := service.get_authors_page(after_id, 7, nationality):
+            pages.extend(author.id for author in page)
+            after_id = page[-1].id
+        assert pages == expected
+        assert service.count_authors_by_nationality().get(nationality, 0) == len(expected)
+
+def test_insert_update_and_delete_keep_the_nationality_index_consistent():
+    rng = random.Random(20)
+    service = AuthorService(BookService())
+    service.create_authors([make_author(i, rng.choice(NATIONALITIES)) for i in range(1, 800)])
+    for _ in range(1500):
+        author_id = rng.randrange(1, 1200)
+        operation = rng.random()
+        # Un id existente se actualiza: crearlo de nuevo devuelve 409
+        if operation < 0.4 and author_id not in service.authors:
+            service.create_author(make_author(author_id, rng.choice(NATIONALITIES)))
+        elif operation < 0.7:
+            service.update_author(author_id, make_author(author_id, rng.choice(NATIONALITIES)))
+        else:
+            service.delete_author(author_id)
+    assert_nationality_index_matches_store(service)
+
+def test_empty_nationality_leaves_the_index():
+    service = AuthorService(BookService())
+    service.create_author(make_author(1, "Chilena"))
+    service.update_author(1, make_author(1, "Peruana"))
+    assert service.get_all_authors("Chilena") == []
+    service.delete_author(1)
+    assert not service.authors_by_nationality
+    assert_nationality_index_matches_store(service)
@@ -0,0 +1,48 @@
+"""
+Tests of the chunked writes of the bulk create endpoints.
+"""
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from peewee import DataError
+from helpers.bulk_import import bulk_create
+from models.author import Author
+
+def make_client(create_many):
+    app = FastAPI()
+
+    @app.post("/bulk")
+    async def create_bulk(request: Request, chunk_size: int = 2):
+        return await bulk_create(request, Author, create_many, chunk_size)
+
+    return TestClient(app)
+
+def test_database_error_fails_only_its_chunk():
+    stored = []
+
+    def create_many(authors):
+        if any(len(author.name) > 10 for author in authors):
+            raise DataError("Data too long for column 'name'")
+        stored.extend(authors)
+        return len(authors)
+
+    names = ["Ana", "Bea", "Nombre demasiado largo", "Dora", "Eva"]
+    body = [{"id": i, "name": name, "nationality": "CO"} for i, name in enumerate(names)]
+    summary = make_client(create_many).post("/bulk", json=body).json()
+    assert summary["received"] == 5
+    assert summary["created"] == 3
+    assert summary["failed"] == 2
+    assert [error["index"] for error in summary["errors"]] == [2, 3]
+    assert "Data too long" in summary["errors"][0]["message"]
+    assert [author.name for author in stored] == ["Ana", "Bea", "Eva"]
+
+def test_id_out_of_range_fails_only_its_row():
+    stored = []
+    body = [{"id": i, "name": "Ana", "nationality": "CO"} for i in (1, 2**63, -2**63 - 1, 2)]
+    summary = make_client(stored.extend).post("/bulk", json=body).json()
+    assert summary["created"] == 2
+    assert [error["index"] for error in summary["errors"]] == [1, 2]
+    assert [author.id for author in stored] == [1, 2]
+    invalid = make_client(stored.extend).post("/bulk", content=b"{}")
+    assert invalid.status_code == 400
+    assert invalid.json()["detail"]["status_code"] == 400
@@ -0,0 +1,21 @@
+"""
+Tests of the fan-out of the change log to the event stream subscribers.
+"""
+
+import asyncio
+from services.change_broker import ChangeBroker
+from services.change_log import CREATE, ChangeLog
+
+def test_subscribe_returns_the_sequence_the_subscription_starts_after():
+    change_log = ChangeLog(100)
+    broker = ChangeBroker(change_log, 10, lambda entry: entry["seq"])
+
+    async def scenario():
+        change_log.append("book", CREATE, 1)
+        subscription, last_seq = broker.subscribe()
+        seq = change_log.append("book", CREATE, 2)
+        return last_seq, seq, await subscription.get(1)
+
+    last_seq, seq, changes = asyncio.run(scenario())
+    assert seq == last_seq + 1
+    assert changes == [(seq, seq)]
@@ -0,0 +1,67 @@
+"""
+Tests of the columnar book store and of the book service indexes on top
+of it.
+"""
+
+from datetime import date
+import pytest
+from models.book import Book
+from services.book_service import BookService
+from services.columnar_store import ColumnarBookStore
+
+def make_book(book_id, title="Libro", author_id=1, published=date(2000, 1, 1)):
+    # Sin validar: los ids fuera de rango llegan al almacén como desde un snapshot
+    return Book.model_construct(id=book_id, title=f"{title} {book_id}", author_id=author_id,
+                                publication_date=published)
+
+def columns_length(store):
+    columns = store.columns
+    return {len(columns.ids), len(columns.author_ids), len(columns.dates),
+            len(columns.versions), len(columns.title_ends) - 1}
+
+def test_insert_update_and_delete_keep_the_index_on_the_latest_rows():
+    store = ColumnarBookStore()
+    for book_id in (5, 1, 9, 3):
+        store.put(make_book(book_id))
+    store.put(make_book(3, "Revisado"))
+    assert store.pop(9).id == 9
+    assert store.pop(9) is None
+    assert [book.id for book in store.values()] == [1, 3, 5]
+    assert store.get(3).title == "Revisado 3"
+    assert [book.id for book in store.page(1, 1)] == [3]
+    assert len(store) == 3 and 9 not in store
+    assert columns_length(store) == {5}
+
+def test_value_out_of_range_leaves_the_columns_untouched():
+    store = ColumnarBookStore()
+    store.put(make_book(1))
+    for book in (make_book(2**63), make_book(2, author_id=2**63), make_book(-2**63 - 1)):
+        with pytest.raises(OverflowError):
+            store.put(book)
+    assert columns_length(store) == {1}
+    assert store.values() == [make_book(1)]
+    store.put(make_book(2))
+    assert [book.id for book in store.values()] == [1, 2]
+
+def test_failed_update_keeps_the_service_indexes_on_the_previous_book():
+    service = BookService(store=ColumnarBookStore())
+    service.create_book(make_book(1, "Cien años", author_id=7))
+    with pytest.raises(OverflowError):
+        service.update_book(1, make_book(1, "Otro", author_id=2**63))
+    with pytest.raises(OverflowError):
+        service.create_book(make_book(2, "Otro", author_id=2**63))
+    assert service.get_book_by_id(2) is None
+    book = service.get_book_by_id(1)
+    assert (book.title, book.author_id, book.version) == ("Cien años 1", 7, 1)
+    assert service.get_books_by_author(7) == [book]
+    assert service.search_books("años", 10) == [book]
+    assert service.suggest_books("cien", 10) == [book]
+    assert service.books_per_author.get(7) == 1
+
+def test_failed_batch_indexes_the_books_stored_before_the_failure():
+    service = BookService(store=ColumnarBookStore())
+    with pytest.raises(OverflowError):
+        service.create_books([make_book(1), make_book(2**63), make_book(3)])
+    assert [book.id for book in service.get_all_books()] == [1]
+    assert [book.id for book in service.search_books("libro", 10)] == [1]
+    assert service.books_per_author.get(1) == 1
@@ -0,0 +1,68 @@
+"""
+Tests of the (publication_date, id) index behind the date range queries.
+"""
+
+from datetime import date, timedelta
+import random
+import pytest
+from models.book import Book
+from services import sorted_keys
+from services.book_service import BookService
+
+FIRST_DAY = date(1990, 1, 1)
+
+@pytest.fixture(autouse=True)
+def small_sublists(monkeypatch):
+    # Sublistas pequeñas para que las pruebas las partan y vacíen
+    monkeypatch.setattr(sorted_keys, "SUBLIST_SIZE", 2)
+
+def random_book(rng, book_id):
+    return Book(id=book_id, title=f"Libro {book_id}", author_id=rng.randrange(1, 5),
+                publication_date=FIRST_DAY + timedelta(days=rng.randrange(0, 40)))
+
+def expected_ids(books, published_from, published_to, descending):
+    selected = [book for book in books
+                if (published_from is None or book.publication_date >= published_from)
+                and (published_to is None or book.publication_date <= published_to)]
+    selected.sort(key=lambda book: (book.publication_date, book.id), reverse=descending)
+    return [book.id for book in selected]
+
+def walk_pages(service, published_from, published_to, descending, limit):
+    ids, after = [], None
+    while page := service.get_books_by_date(published_from, published_to, descending,
+                                            after, limit):
+        ids.extend(book.id for book in page)
+        after = (page[-1].publication_date, page[-1].id)
+    return ids
+
+def test_book_writes_keep_the_date_index_consistent():
+    rng = random.Random(23)
+    service = BookService()
+    service.create_books([random_book(rng, book_id) for book_id in range(1, 80)])
+    for _ in range(800):
+        book = random_book(rng, rng.randrange(-20, 120))
+        operation = rng.random()
+        # Un id existente se actualiza: crearlo de nuevo devuelve 409
+        if operation < 0.35 and book.id not in service.books:
+            service.create_book(book)
+        elif operation < 0.5:
+            # Solo cambia el título: el índice de fechas no se toca
+            current = service.get_book_by_id(book.id)
+            if current is not None:
+                service.update_book(book.id, current.model_copy(update={"title": "Otro"}))
+        elif operation < 0.75:
+            service.update_book(book.id, book)
+        else:
+            service.delete_book(book.id)
+    books = service.get_all_books()
+    assert len(service.books_by_date) == len(books)
+    ranges = [(None, None), (FIRST_DAY + timedelta(days=10), FIRST_DAY + timedelta(days=20)),
+              (FIRST_DAY + timedelta(days=39), None), (None, FIRST_DAY)]
+    for published_from, published_to in ranges:
+        for descending in (False, True):
+            expected = expected_ids(books, published_from, published_to, descending)
+            for limit in (1, 7, 1000):
+                assert walk_pages(service, published_from, published_to, descending,
+                                  limit) == expected
+    for year, count in service.count_books_by_year().items():
+        assert count == sum(book.publication_date.year == year for book in books)
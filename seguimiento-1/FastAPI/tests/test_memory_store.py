@@ -0,0 +1,43 @@
+"""
+Tests of the record snapshot of the in-memory store.
+"""
+
+import threading
+from models.author import Author
+from services.memory_store import MemoryStore
+
+def make_author(author_id):
+    return Author(id=author_id, name=f"Autor {author_id}", nationality="Chilena")
+
+def test_values_is_copied_once_per_write_without_the_lock():
+    store = MemoryStore()
+    store.put(make_author(1))
+    store.put(make_author(2))
+    snapshot = store.values()
+    assert [author.id for author in snapshot] == [1, 2]
+    # Sin escrituras nuevas se reutiliza la misma tupla
+    assert store.values() is snapshot
+    store.pop(1)
+    found = []
+    # Un lector no espera al cerrojo que otro hilo tiene tomado
+    with store.lock:
+        reader = threading.Thread(target=lambda: found.append(store.values()))
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+    assert [author.id for author in found[0]] == [2]
+    assert [author.id for author in snapshot] == [1, 2]
+
+def test_pages_walk_the_ids_in_order_past_the_deleted_ones():
+    store = MemoryStore()
+    for author_id in (5, 1, 9, 3, 7, 2):
+        store.put(make_author(author_id))
+    store.pop(3)
+    store.pop(5)
+    pages, after_id = [], None
+    while page := store.page(after_id, 2):
+        pages.append([author.id for author in page])
+        after_id = page[-1].id
+    assert pages == [[1, 2], [7, 9]]
+    assert [author.id for author in store.page(None, None)] == [1, 2, 7, 9]
+    assert [author.id for author in store.page(2, None, where=lambda a: a.id > 7)] == [9]
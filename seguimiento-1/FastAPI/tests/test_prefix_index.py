@@ -0,0 +1,70 @@
+"""
+Tests of the sorted prefix index behind the title and name suggestions.
+"""
+
+import random
+import pytest
+from models.author import Author
+from models.book import Book
+from services import sorted_keys
+from services.author_service import AuthorService
+from services.book_service import BookService
+from services.prefix_index import normalize
+
+WORDS = ("Cien", "años", "Ciencia", "cólera", "Amor", "amores", "Otoño", "otro")
+
+@pytest.fixture(autouse=True)
+def small_sublists(monkeypatch):
+    # Sublistas pequeñas para que las pruebas las partan y vacíen
+    monkeypatch.setattr(sorted_keys, "SUBLIST_SIZE", 2)
+
+def random_text(rng):
+    return " ".join(rng.choices(WORDS, k=rng.randint(1, 3)))
+
+def expected_suggestions(records, text_of, prefix, limit):
+    prefix = normalize(prefix)
+    matches = sorted((normalize(text_of(record)), str(record.id), record.id)
+                     for record in records if normalize(text_of(record)).startswith(prefix))
+    return [record_id for _, _, record_id in matches[:limit]]
+
+def assert_suggestions_match(records, suggest, text_of):
+    for prefix in ("", "c", "CIEN", "cien a", "ciénc", "amor", "o", "z"):
+        for limit in (1, 5, 1000):
+            found = [record.id for record in suggest(prefix, limit)]
+            assert found == expected_suggestions(records, text_of, prefix, limit)
+
+def test_book_writes_keep_the_title_index_consistent():
+    rng = random.Random(22)
+    service = BookService()
+    service.create_books([Book(id=i, title=random_text(rng), author_id=1,
+                               publication_date="2000-01-01") for i in range(1, 60)])
+    for _ in range(600):
+        book = Book(id=rng.randrange(1, 90), title=random_text(rng), author_id=1,
+                    publication_date="2000-01-01")
+        operation = rng.random()
+        # Un id existente se actualiza: crearlo de nuevo devuelve 409
+        if operation < 0.35 and book.id not in service.books:
+            service.create_book(book)
+        elif operation < 0.7:
+            service.update_book(book.id, book)
+        else:
+            service.delete_book(book.id)
+    books = service.get_all_books()
+    assert len(service.title_index) == len(books)
+    assert_suggestions_match(books, service.suggest_books, lambda book: book.title)
+
+def test_author_writes_keep_the_name_index_consistent():
+    rng = random.Random(23)
+    service = AuthorService(BookService())
+    for _ in range(600):
+        author = Author(id=rng.randrange(1, 90), name=random_text(rng), nationality="Chilena")
+        operation = rng.random()
+        if operation < 0.35 and author.id not in service.authors:
+            service.create_author(author)
+        elif operation < 0.7:
+            service.update_author(author.id, author)
+        else:
+            service.delete_author(author.id)
+    authors = service.get_all_authors()
+    assert len(service.name_index) == len(authors)
+    assert_suggestions_match(authors, service.suggest_authors, lambda author: author.name)
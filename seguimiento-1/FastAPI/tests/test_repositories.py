@@ -0,0 +1,117 @@
+"""
+Tests of the peewee repositories against a SQLite database: versions and
+compare-and-swap writes, tombstones, keyset pages, batch lookups and the
+/stats counts kept in the write transactions.
+"""
+
+from datetime import date
+import pytest
+from fastapi import HTTPException
+from peewee import SqliteDatabase
+import database
+from database import (AuthorModel, BookModel, GroupCountModel, RevisionModel,
+                      TombstoneModel, initialize_database)
+from models.author import Author
+from models.book import Book
+from repositories import author_repository, book_repository, group_counts
+from repositories.author_repository import AuthorRepository
+from repositories.book_repository import BookRepository
+from services.change_log import ChangeLog
+
+MODELS = [AuthorModel, BookModel, RevisionModel, GroupCountModel, TombstoneModel]
+
+def make_book(book_id, title="Libro", author_id=1, published=date(2000, 1, 1)):
+    return Book(id=book_id, title=f"{title} {book_id}", author_id=author_id,
+                publication_date=published)
+
+@pytest.fixture(name="repositories")
+def fixture_repositories(tmp_path, monkeypatch):
+    sqlite = SqliteDatabase(str(tmp_path / "books.db"), pragmas={"foreign_keys": 1})
+    for module in (database, book_repository, author_repository, group_counts):
+        monkeypatch.setattr(module, "database", sqlite)
+    with sqlite.bind_ctx(MODELS):
+        initialize_database()
+        change_log = ChangeLog(100)
+        books = BookRepository(change_log)
+        authors = AuthorRepository(books, change_log)
+        authors.create_authors([Author(id=1, name="Autor", nationality="Chilena"),
+                                Author(id=2, name="Otro", nationality="Peruana")])
+        yield books, authors
+    sqlite.close()
+
+def test_updates_are_versioned_and_checked_against_if_match(repositories):
+    books, _ = repositories
+    books.create_book(make_book(1))
+    revision = books.get_books_revision()
+    assert books.update_book(1, make_book(1, "Nuevo"), {1}).version == 2
+    assert books.get_books_revision() != revision
+    with pytest.raises(HTTPException) as error:
+        books.update_book(1, make_book(1, "Otro"), {1})
+    assert error.value.status_code == 412
+    with pytest.raises(HTTPException) as error:
+        books.delete_book(1, {1})
+    assert error.value.status_code == 412
+    assert books.get_book_by_id(1).title == "Nuevo 1"
+    with pytest.raises(HTTPException) as error:
+        books.create_book(make_book(1))
+    assert error.value.status_code == 409
+
+def test_write_retries_when_the_row_changed_after_it_was_read(repositories, monkeypatch):
+    books, _ = repositories
+    books.create_book(make_book(1))
+    read_book = BookRepository._read_book  # pylint: disable=protected-access
+    reads = []
+
+    def read_then_race(book_id):
+        row = read_book(book_id)
+        reads.append(row[2])
+        if len(reads) == 1:
+            # Otra escritura entre la lectura y el compare-and-swap
+            BookModel.update(version=BookModel.version + 1).where(
+                BookModel.id == book_id).execute()
+        return row
+
+    monkeypatch.setattr(BookRepository, "_read_book", staticmethod(read_then_race))
+    # La escritura simulada va en la misma transacción y se deshace con el intento fallido
+    assert books.update_book(1, make_book(1, "Nuevo")).version == 2
+    assert reads == [1, 1]
+
+def test_recreated_ids_continue_from_their_tombstone(repositories):
+    books, authors = repositories
+    books.create_books([make_book(1), make_book(2, author_id=2)])
+    books.update_book(1, make_book(1))
+    books.delete_book(1)
+    assert books.create_book(make_book(1)).version == 3
+    # El borrado en cascada entierra también los libros del autor
+    authors.delete_author(2)
+    assert books.get_book_by_id(2) is None
+    assert books.create_books([make_book(2)]) == 1
+    assert books.get_book_by_id(2).version == 2
+    assert authors.create_author(Author(id=2, name="Otro", nationality="Peruana")).version == 2
+
+def test_pages_and_batch_lookups_follow_the_ids(repositories):
+    books, _ = repositories
+    books.create_books([make_book(book_id) for book_id in (5, 1, 4, 2, 3)])
+    assert [book.id for book in books.get_books_page(None, 2)] == [1, 2]
+    assert [book.id for book in books.get_books_page(2, 2)] == [3, 4]
+    found, missing = books.get_books_by_ids([4, 9, 1])
+    assert [book.id for book in found] == [4, 1]
+    assert missing == [9]
+    # Sin índice FULLTEXT (SQLite) la búsqueda recorre los títulos por id
+    books.update_book(4, make_book(4, "Cien soledades"))
+    assert [book.id for book in books.search_books("soledades cien", 10)] == [4]
+
+def test_counts_follow_every_write(repositories):
+    books, authors = repositories
+    books.create_books([make_book(1), make_book(2, published=date(2001, 1, 1)),
+                        make_book(3, author_id=2), make_book(4, published=date(2002, 1, 1))])
+    books.update_book(2, make_book(2, author_id=2, published=date(2001, 1, 1)))
+    books.delete_book(1)
+    assert books.count_books_by_author() == {1: 1, 2: 2}
+    assert books.count_books_by_year() == {2000: 1, 2001: 1, 2002: 1}
+    authors.delete_author(2)
+    assert books.count_books_by_author() == {1: 1}
+    assert books.count_books_by_year() == {2002: 1}
+    assert authors.count_authors_by_nationality() == {"Chilena": 1}
+    # Un recuento completo no encuentra nada que corregir
+    assert books.recount_statistics()["books_per_author"] == {"groups": 1, "corrected": 0}
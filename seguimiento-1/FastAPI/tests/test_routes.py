@@ -0,0 +1,171 @@
+"""
+Tests of the HTTP contracts of the routes with the in-memory backend:
+keyset pagination, batch lookups, conditional requests, the cache, the
+change feed and journal recovery.
+"""
+
+import os
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+# pylint: disable=wrong-import-position
+from helpers.api_key_auth import API_KEY, API_KEY_NAME
+from main import app
+from routes import author_route, book_route, change_route, stats_route
+from services.author_service import AuthorService
+from services.book_service import BookService
+from services.cache import LRUCache
+from services.cached_service import CachedAuthorService, CachedBookService
+from services.change_log import ChangeLog
+from services.journal import Journal
+
+HEADERS = {API_KEY_NAME: API_KEY} if API_KEY else {}
+
+def book(book_id, title="Libro", author_id=1, published="2000-01-01"):
+    return {"id": book_id, "title": f"{title} {book_id}", "author_id": author_id,
+            "publication_date": published}
+
+def author(author_id, name="Autor", nationality="Chilena"):
+    return {"id": author_id, "name": f"{name} {author_id}", "nationality": nationality}
+
+def install(monkeypatch, book_store, author_store, change_log):
+    """
+    Points the routes at the given services, wrapped in their caches as in
+    services/instances.py.
+    """
+    book_service = CachedBookService(book_store, LRUCache(100))
+    author_service = CachedAuthorService(author_store, LRUCache(100), book_service)
+    for module in (book_route, author_route, stats_route):
+        monkeypatch.setattr(module, "book_service", book_service)
+    for module in (author_route, stats_route):
+        monkeypatch.setattr(module, "author_service", author_service)
+    monkeypatch.setattr(change_route, "change_log", change_log)
+
+def make_services(change_log):
+    book_store = BookService(change_log)
+    return book_store, AuthorService(book_store, change_log)
+
+@pytest.fixture(name="client")
+def fixture_client(monkeypatch):
+    change_log = ChangeLog(100)
+    install(monkeypatch, *make_services(change_log), change_log)
+    with TestClient(app, headers=HEADERS) as client:
+        client.post("/authors/author", json=author(1))
+        yield client
+
+def test_keyset_pagination_walks_every_book_once(client):
+    client.post("/books/bulk", json=[book(book_id) for book_id in (4, 2, 5, 1, 3)])
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client.get("/books/book", params=params)
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        if len(pages) == 1:
+            # Un libro borrado a mitad del recorrido no desplaza las páginas siguientes
+            client.delete("/books/book/3")
+    assert pages == [[1, 2], [4, 5]]
+    response = client.get("/books/book", params={"cursor": "no es un cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["message"] == "Invalid cursor"
+
+def test_ids_lookup_keeps_the_order_and_reports_the_missing_ids(client):
+    client.post("/books/bulk", json=[book(book_id) for book_id in (1, 2, 3)])
+    result = client.get("/books/book", params={"ids": "3,9,1,3"}).json()
+    assert [item["id"] for item in result["books"]] == [3, 1]
+    assert result["missing"] == [9]
+    result = client.get("/authors/author", params={"ids": "2,1"}).json()
+    assert [item["id"] for item in result["authors"]] == [1]
+    assert result["missing"] == [2]
+    response = client.get("/books/book", params={"ids": "1,x"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["message"] == "Every id must be an integer"
+
+def test_conditional_requests_follow_the_versions(client):
+    created = client.post("/books/book", json=book(1))
+    assert created.headers["ETag"] == '"1"'
+    response = client.get("/books/book/1", headers={"If-None-Match": '"1"'})
+    assert response.status_code == 304 and not response.content
+    listing = client.get("/books/book")
+    assert listing.headers["ETag"].startswith('W/"')
+    assert "Last-Modified" in listing.headers
+    response = client.get("/books/book", headers={"If-None-Match": listing.headers["ETag"]})
+    assert response.status_code == 304
+    response = client.get("/books/book",
+                          headers={"If-Modified-Since": listing.headers["Last-Modified"]})
+    assert response.status_code == 304
+
+    updated = client.put("/books/book/1", json=book(1, "Nuevo"), headers={"If-Match": '"1"'})
+    assert updated.status_code == 200 and updated.headers["ETag"] == '"2"'
+    assert client.put("/books/book/1", json=book(1, "Otro"),
+                      headers={"If-Match": '"1"'}).status_code == 412
+    assert client.delete("/books/book/1", headers={"If-Match": '"1"'}).status_code == 412
+    assert client.get("/books/book/1").json()["title"] == "Nuevo 1"
+    response = client.get("/books/book", headers={"If-None-Match": listing.headers["ETag"]})
+    assert response.status_code == 200
+    assert client.delete("/books/book/1", headers={"If-Match": '"2"'}).status_code == 200
+    assert client.get("/books/book/1").json() is None
+    # El id recreado sigue desde la versión que tenía al borrarse
+    assert client.post("/books/book", json=book(1)).headers["ETag"] == '"3"'
+    assert client.post("/books/book", json=book(1)).status_code == 409
+
+def test_cache_serves_the_reads_until_a_write(client):
+    client.post("/books/book", json=book(1))
+    client.get("/books/book/1")
+    client.get("/books/book/1")
+    statistics = client.get("/books/cache").json()
+    assert (statistics["hits"], statistics["misses"]) == (1, 1)
+    client.put("/books/book/1", json=book(1, "Nuevo"))
+    assert client.get("/books/book/1").json()["title"] == "Nuevo 1"
+    assert client.get("/books/cache").json()["misses"] == 2
+    # El borrado en cascada de un autor también deja sus libros fuera de la caché
+    client.delete("/authors/author/1")
+    assert client.get("/books/book/1").json() is None
+
+def test_changes_feed_reports_the_writes_in_order(client):
+    start = client.get("/changes", params={"since": 0}).json()["last_seq"]
+    client.post("/books/bulk", json=[book(1), book(2)])
+    client.put("/books/book/2", json=book(2, "Nuevo"))
+    client.delete("/books/book/1")
+    first = client.get("/changes", params={"since": start, "limit": 3}).json()
+    assert [(change["entity"], change["operation"], change["id"])
+            for change in first["changes"]] == [("book", "create", 1), ("book", "create", 2),
+                                                ("book", "update", 2)]
+    assert first["has_more"] and not first["resync_required"]
+    rest = client.get("/changes", params={"since": first["changes"][-1]["seq"]}).json()
+    assert [(change["operation"], change["id"]) for change in rest["changes"]] == [
+        ("delete", 1)]
+    assert not rest["has_more"]
+    assert first["changes"][2]["data"]["version"] == 2
+    assert client.get("/changes", params={"since": rest["last_seq"] + 5}).json()[
+        "resync_required"]
+
+def test_journal_recovers_the_writes_made_through_the_routes(tmp_path, monkeypatch):
+    change_log = ChangeLog(100)
+    book_store, author_store = make_services(change_log)
+    journal = Journal(str(tmp_path), 0)
+    journal.open(book_store, author_store, change_log)
+    install(monkeypatch, book_store, author_store, change_log)
+    with TestClient(app, headers=HEADERS) as client:
+        client.post("/authors/author", json=author(1))
+        client.post("/books/bulk", json=[book(1), book(2), book(3)])
+        client.put("/books/book/2", json=book(2, "Nuevo"))
+        client.delete("/books/book/3")
+    journal.close()
+
+    change_log = ChangeLog(100)
+    book_store, author_store = make_services(change_log)
+    journal = Journal(str(tmp_path), 0)
+    journal.open(book_store, author_store, change_log)
+    install(monkeypatch, book_store, author_store, change_log)
+    with TestClient(app, headers=HEADERS) as client:
+        books = client.get("/books/book", params={"all": "true"}).json()
+        assert [(item["id"], item["title"], item["version"]) for item in books] == [
+            (1, "Libro 1", 1), (2, "Nuevo 2", 2)]
+        assert client.get("/authors/author/1").headers["ETag"] == '"1"'
+        assert client.post("/books/book", json=book(3)).headers["ETag"] == '"2"'
+    journal.close()
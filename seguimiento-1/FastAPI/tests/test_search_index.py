@@ -0,0 +1,87 @@
+"""
+Tests of the BM25 inverted index over the book titles.
+"""
+
+import math
+import random
+import pytest
+from services import search_index, sorted_keys
+from services.search_index import SearchIndex, tokenize, term_stats
+
+WORDS = ("cien", "años", "soledad", "amor", "tiempo", "cólera", "otoño", "patriarca")
+
+def brute_force(titles, query, limit):
+    """
+    Scores every title with BM25 and returns the best `limit` (doc_id, score).
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+    documents = {doc_id: tokenize(title) for doc_id, title in titles.items()}
+    average_length = sum(map(len, documents.values())) / max(len(documents), 1) or 1.0
+    hits = []
+    for doc_id, words in documents.items():
+        if not terms <= set(words):
+            continue
+        stats = term_stats(words)
+        score = 0.0
+        for term in terms:
+            frequency = sum(1 for words in documents.values() if term in words)
+            weight = math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+            score += weight * SearchIndex._saturation(stats[term], average_length)
+        hits.append((doc_id, score))
+    hits.sort(key=lambda hit: (-hit[1], hit[0]))
+    return hits[:limit]
+
+def assert_index_matches(index, titles, rng):
+    assert index.documents == len(titles)
+    assert index.total_length == sum(len(tokenize(title)) for title in titles.values())
+    for buckets in index.postings.values():
+        for ids in buckets.values():
+            assert len(ids) == len(list(ids)) > 0
+            assert list(ids) == sorted(set(ids))
+    for query in [*WORDS, *(" ".join(rng.sample(WORDS, 2)) for _ in range(20))]:
+        expected = brute_force(titles, query, 10)
+        found = index.search(query, 10)
+        assert [doc_id for doc_id, _ in found] == [doc_id for doc_id, _ in expected]
+        assert [score for _, score in found] == pytest.approx([score for _, score in expected])
+
+@pytest.fixture(autouse=True)
+def small_buckets(monkeypatch):
+    # Cubos grandes a partir de 8 ids, para que las pruebas los partan y vacíen
+    monkeypatch.setattr(search_index, "LARGE_BUCKET", 8)
+    monkeypatch.setattr(sorted_keys, "SUBLIST_SIZE", 2)
+
+def test_insert_update_and_delete_keep_the_postings_consistent():
+    rng = random.Random(21)
+    index = SearchIndex()
+    titles = {}
+
+    def random_title():
+        return " ".join(rng.choices(WORDS, k=rng.randint(1, 4)))
+
+    for _ in range(3000):
+        doc_id = rng.randrange(1, 400)
+        operation = rng.random()
+        if doc_id not in titles:
+            titles[doc_id] = random_title()
+            index.add(doc_id, titles[doc_id])
+        elif operation < 0.5:
+            title = random_title()
+            index.replace(doc_id, titles[doc_id], title)
+            titles[doc_id] = title
+        else:
+            index.remove(doc_id, titles.pop(doc_id))
+    assert_index_matches(index, titles, rng)
+    assert index.statistics()["large_buckets"] > 0
+
+def test_removing_every_document_empties_the_index():
+    index = SearchIndex()
+    titles = {doc_id: f"Cien años {doc_id % 3}" for doc_id in range(50, 0, -1)}
+    for doc_id, title in titles.items():
+        index.add(doc_id, title)
+    assert_index_matches(index, titles, random.Random(0))
+    for doc_id, title in titles.items():
+        index.remove(doc_id, title)
+    assert index.postings == {}
+    assert index.search("cien", 10) == []
@@ -0,0 +1,49 @@
+"""
+Tests of the /stats counts of the memory backend and their recount.
+"""
+
+from collections import Counter
+from datetime import date
+from models.author import Author
+from models.book import Book
+from services.author_service import AuthorService
+from services.book_service import BookService
+
+def book(book_id, author_id, year):
+    return Book(id=book_id, title=f"Libro {book_id}", author_id=author_id,
+                publication_date=date(year, 1, 1))
+
+def test_recount_applies_the_writes_made_while_it_counts():
+    service = BookService()
+    service.create_books([book(i, i % 3, 2000 + i % 4) for i in range(1, 40)])
+    snapshot = service.books.rows_snapshot
+
+    def rows_snapshot(fields):
+        rows = snapshot(fields)
+        # Escrituras durante el recuento, que ya no tiene el cerrojo
+        yield next(rows)
+        service.create_book(book(100, 7, 1999))
+        service.delete_book(2)
+        service.update_book(3, book(3, 7, 2010))
+        yield from rows
+
+    service.books.rows_snapshot = rows_snapshot
+    service.books_per_author.counts[0] += 5
+    result = service.recount_statistics()
+    books = service.get_all_books()
+    assert service.count_books_by_author() == dict(Counter(b.author_id for b in books))
+    assert service.count_books_by_year() == dict(
+        Counter(b.publication_date.year for b in books))
+    assert result["books_per_author"]["corrected"] == 1
+    assert result["books_per_year"]["corrected"] == 0
+    assert service.books_per_author.tracked == service.books_per_year.tracked == []
+
+def test_author_recount_repairs_the_nationality_counts():
+    service = AuthorService(BookService())
+    for author_id in range(1, 10):
+        service.create_author(Author(id=author_id, name=f"Autor {author_id}",
+                                     nationality="Chilena" if author_id % 2 else "Peruana"))
+    service.authors_per_nationality.counts["Boliviana"] = 2
+    result = service.recount_statistics()
+    assert result == {"authors_per_nationality": {"groups": 2, "corrected": 1}}
+    assert service.count_authors_by_nationality() == {"Chilena": 5, "Peruana": 4}
@@ -0,0 +1,74 @@
+"""
+Tests of the versions of the in-memory services across creates, deletes
+and journal recovery.
+"""
+
+from datetime import date
+import pytest
+from fastapi import HTTPException
+from models.author import Author
+from models.book import Book
+from services.author_service import AuthorService
+from services.book_service import BookService
+from services.change_log import ChangeLog
+from services.journal import Journal
+
+def make_book(book_id, author_id=1):
+    return Book(id=book_id, title=f"Libro {book_id}", author_id=author_id,
+                publication_date=date(2000, 1, 1))
+
+def make_services(change_log=None):
+    book_service = BookService(change_log)
+    return book_service, AuthorService(book_service, change_log)
+
+def test_create_on_an_existing_id_is_a_conflict():
+    book_service, author_service = make_services()
+    book_service.create_book(make_book(1))
+    author_service.create_author(Author(id=1, name="Autor", nationality="Chilena"))
+    with pytest.raises(HTTPException) as error:
+        book_service.create_book(make_book(1, author_id=2))
+    assert error.value.status_code == 409
+    with pytest.raises(HTTPException):
+        author_service.create_author(Author(id=1, name="Otro", nationality="Peruana"))
+    # Un lote con un id existente o repetido no guarda ningún libro
+    for batch in ([make_book(2), make_book(1)], [make_book(3), make_book(3)]):
+        with pytest.raises(HTTPException):
+            book_service.create_books(batch)
+    assert [book.id for book in book_service.get_all_books()] == [1]
+    assert book_service.get_book_by_id(1).author_id == 1
+    assert author_service.get_author_by_id(1).name == "Autor"
+
+def test_versions_keep_growing_after_a_delete():
+    book_service, author_service = make_services()
+    author_service.create_author(Author(id=1, name="Autor", nationality="Chilena"))
+    book_service.create_books([make_book(1), make_book(2)])
+    book_service.update_book(1, make_book(1))
+    book_service.delete_book(1)
+    assert book_service.create_book(make_book(1)).version == 3
+    # El borrado en cascada también guarda la versión de los libros
+    author_service.delete_author(1)
+    book_service.create_books([make_book(1), make_book(2)])
+    assert [book.version for book in book_service.get_all_books()] == [4, 2]
+    assert author_service.create_author(
+        Author(id=1, name="Autor", nationality="Chilena")).version == 2
+
+def test_recovery_keeps_the_versions_of_the_deleted_ids(tmp_path):
+    change_log = ChangeLog(100)
+    book_service, author_service = make_services(change_log)
+    journal = Journal(str(tmp_path), 0)
+    journal.open(book_service, author_service, change_log)
+    book_service.create_books([make_book(1), make_book(2)])
+    book_service.update_book(1, make_book(1))
+    book_service.delete_book(1)
+    journal.snapshot()
+    book_service.update_book(2, make_book(2))
+    book_service.delete_book(2)
+    journal.close()
+
+    book_service, author_service = make_services()
+    journal = Journal(str(tmp_path), 0)
+    journal.open(book_service, author_service, ChangeLog(100))
+    journal.close()
+    assert book_service.get_all_books() == []
+    assert book_service.create_book(make_book(1)).version == 3
+    assert book_service.create_book(make_book(2)).version == 3